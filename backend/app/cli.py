@@ -0,0 +1,119 @@
+"""
+Operational commands for the backend.
+
+Usage:
+    python -m app.cli init-db     Create missing tables and indexes, and add
+                                  the columns listed in _ADDED_COLUMNS
+                                  (app/database/database.py) to older tables
+    python -m app.cli check-db    Verify the database is reachable
+    python -m app.cli rebuild-summaries [--account-id ID]
+                                  Backfill the account summary tables; init-db
+                                  runs it after adding the per-result *_pnl
+                                  summary columns, which start at 0
+    python -m app.cli check-indexes [--users N] [--books-per-account N]
+                                  EXPLAIN every route query against a seeded
+                                  journal and fail on sequential scans
+"""
+import argparse
+import asyncio
+import sys
+
+from sqlalchemy import text
+
+from app.database.database import AsyncSessionLocal, async_engine, check_connection, init_db, load_models
+
+async def init_db_command(args):
+    await init_db()
+    print("Database tables created")
+
+async def check_db_command(args):
+    await check_connection()
+    print("Database connection successful!")
+
+async def rebuild_summaries_command(args):
+    from app.utils.summaries import rebuild_summaries
+
+    async with AsyncSessionLocal() as db:
+        accounts = await rebuild_summaries(db, account_id=args.account_id)
+        await db.commit()
+    print(f"Rebuilt summaries for {accounts} account(s)")
+
+async def check_indexes_command(args):
+    from app.utils.query_plans import explain, route_queries, seed_plan_fixture, sequential_scans
+
+    failures = []
+    async with async_engine.connect() as connection:
+        # Seed and explain inside one transaction that is always rolled back
+        transaction = await connection.begin()
+        try:
+            fixture = await seed_plan_fixture(
+                connection,
+                users=args.users,
+                accounts_per_user=args.accounts_per_user,
+                books_per_account=args.books_per_account,
+                plans_per_user=args.plans_per_user,
+            )
+            if connection.dialect.name == "postgresql":
+                # Only fall back to a sequential scan when no index can serve the query
+                await connection.execute(text("SET LOCAL enable_seqscan = off"))
+
+            for route, statement in route_queries(fixture):
+                scans = sequential_scans(await explain(connection, statement))
+                print(f"{'SEQ SCAN' if scans else 'ok':<9} {route}")
+                for line in scans:
+                    print(f"          {line}")
+                if scans:
+                    failures.append(route)
+        finally:
+            await transaction.rollback()
+
+    if failures:
+        raise RuntimeError(f"{len(failures)} route query(ies) use a sequential scan: {', '.join(failures)}")
+    print("Every route query is served by an index")
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    init_parser = subparsers.add_parser("init-db", help="Create missing tables")
+    init_parser.set_defaults(handler=init_db_command)
+
+    check_parser = subparsers.add_parser("check-db", help="Verify the database is reachable")
+    check_parser.set_defaults(handler=check_db_command)
+
+    rebuild_parser = subparsers.add_parser(
+        "rebuild-summaries", help="Backfill the account summary tables from the daily books"
+    )
+    rebuild_parser.add_argument("--account-id", type=int, default=None, help="Only rebuild this account")
+    rebuild_parser.set_defaults(handler=rebuild_summaries_command)
+
+    indexes_parser = subparsers.add_parser(
+        "check-indexes", help="Fail if any route query falls back to a sequential scan"
+    )
+    indexes_parser.add_argument("--users", type=int, default=20, help="Users to seed")
+    indexes_parser.add_argument("--accounts-per-user", type=int, default=3, help="Accounts seeded per user")
+    indexes_parser.add_argument("--books-per-account", type=int, default=365, help="Daily books seeded per account")
+    indexes_parser.add_argument("--plans-per-user", type=int, default=250, help="Trading plans seeded per user")
+    indexes_parser.set_defaults(handler=check_indexes_command)
+
+    return parser
+
+async def _run(args):
+    # Commands use the ORM without the app, so its mappers need every model
+    load_models()
+    try:
+        await args.handler(args)
+    finally:
+        await async_engine.dispose()
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        asyncio.run(_run(args))
+    except Exception as e:
+        print(f"{args.command} failed: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,14 @@
-from sqlalchemy import create_engine
+from sqlalchemy import event, inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, StaticPool
 import os
+import sqlite3
+
+from app.utils.config import env_bool
+from app.utils.metrics import METRICS_ENABLED, instrument_engine, timed_pool_class
+from app.utils.slow_queries import SLOW_QUERY_LOG_ENABLED, install_slow_query_log
 
 # PostgreSQL database URL using environment variables with fallback
 POSTGRES_USER = os.getenv("POSTGRES_USER", "neondb_owner")
@@ -9,29 +16,234 @@ POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD", "npg_z1xhaVPNv0Rq")
 POSTGRES_SERVER = os.getenv("POSTGRES_SERVER", "ep-wispy-sunset-a143i16t-pooler.ap-southeast-1.aws.neon.tech")
 POSTGRES_DB = os.getenv("POSTGRES_DB", "neondb")
 
-# Build connection string with SSL mode required for cloud databases
-SQLALCHEMY_DATABASE_URL = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_SERVER}/{POSTGRES_DB}?sslmode=require"
+# A full URL overrides the settings above; sqlite:///path/to/app.db selects
+# the embedded SQLite mode. sqlite:///:memory: is for tests and throwaway
+# demos only: the whole process shares a single connection, so concurrent
+# requests share one transaction and see each other's uncommitted writes.
+DATABASE_URL = os.getenv(
+    "DATABASE_URL",
+    f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_SERVER}/{POSTGRES_DB}?sslmode=require",
+)
+
+def _async_url(database_url: str):
+    """The same database, addressed through its async driver"""
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend == "sqlite":
+        return url.set(drivername="sqlite+aiosqlite")
+    if backend == "postgresql":
+        # asyncpg spells sslmode as "ssl"
+        async_query = dict(url.query)
+        if "sslmode" in async_query:
+            async_query["ssl"] = async_query.pop("sslmode")
+        return url.set(drivername="postgresql+asyncpg", query=async_query)
+    raise RuntimeError(f"Unsupported DATABASE_URL backend: {backend}")
+
+ASYNC_SQLALCHEMY_DATABASE_URL = _async_url(DATABASE_URL)
+IS_SQLITE = ASYNC_SQLALCHEMY_DATABASE_URL.get_backend_name() == "sqlite"
+
+# Connection pool tuning, sized per worker process
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = env_bool("DB_POOL_PRE_PING", "false")
+
+# Server-side statement timeout in milliseconds (0 disables it)
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+
+# Embedded mode tuning: fsync policy, page cache (KiB), memory-mapped I/O
+# (bytes) and how long a writer waits for the write lock (seconds)
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL").upper()
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_BUSY_TIMEOUT = float(os.getenv("SQLITE_BUSY_TIMEOUT", "30"))
+
+# Create tables and check connectivity when the app starts (off by default;
+# use `python -m app.cli init-db` instead)
+DB_INIT_ON_STARTUP = env_bool("DB_INIT_ON_STARTUP", "false")
+
+_async_connect_args = {}
+
+if IS_SQLITE:
+    # UPDATE ... FROM, RETURNING and row values are used throughout
+    if sqlite3.sqlite_version_info < (3, 35):
+        raise RuntimeError(f"SQLite 3.35 or newer is required, found {sqlite3.sqlite_version}")
+
+    _async_connect_args = {"timeout": SQLITE_BUSY_TIMEOUT}
+    if ASYNC_SQLALCHEMY_DATABASE_URL.database in (None, "", ":memory:"):
+        # An in-memory database lives and dies with its only connection, which
+        # every session shares (see DATABASE_URL above)
+        _async_pool_class = StaticPool
+        _pool_options = {}
+    else:
+        # WAL lets readers share the file while one writer appends; overflow
+        # connections would only queue on the write lock, so there are none
+        _async_pool_class = AsyncAdaptedQueuePool
+        _pool_options = dict(pool_size=DB_POOL_SIZE, max_overflow=0, pool_timeout=DB_POOL_TIMEOUT)
+else:
+    _async_pool_class = AsyncAdaptedQueuePool
+    _pool_options = dict(
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
+    if DB_STATEMENT_TIMEOUT_MS > 0:
+        _async_connect_args["server_settings"] = {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}
+
+if METRICS_ENABLED:
+    # Same pool, but each checkout records how long it waited
+    _async_pool_class = timed_pool_class(_async_pool_class)
+
+# Create async SQLAlchemy engine used by the request handlers (no connection
+# is opened until first use)
+async_engine = create_async_engine(
+    ASYNC_SQLALCHEMY_DATABASE_URL, connect_args=_async_connect_args, poolclass=_async_pool_class, **_pool_options
+)
+
+# Per-connection SQLite settings; journal_mode=WAL is persistent in the file
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    # Account deletes rely on ON DELETE CASCADE, which SQLite enforces only on request
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+    # Stop the driver from opening transactions itself; _begin_immediate does it
+    dbapi_connection.isolation_level = None
+
+# SQLite ignores SELECT ... FOR UPDATE, so lock_account cannot serialize
+# balance read-modify-writes. Taking the write lock when the transaction
+# begins does: concurrent transactions queue for up to SQLITE_BUSY_TIMEOUT
+# instead of reading a balance another writer is about to replace. Read-only
+# sessions queue too, which is the price of the embedded mode; keep them short.
+def _begin_immediate(connection):
+    connection.exec_driver_sql("BEGIN IMMEDIATE")
 
-# Create SQLAlchemy engine
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+if IS_SQLITE:
+    event.listen(async_engine.sync_engine, "connect", _set_sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "begin", _begin_immediate)
 
-# Test database connection
-try:
-    with engine.connect() as connection:
-        print("Database connection successful!")
-except Exception as e:
-    print(f"Database connection failed: {e}")
+if METRICS_ENABLED:
+    instrument_engine(async_engine.sync_engine)
 
-# Create SessionLocal class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Opt-in: log and EXPLAIN statements slower than SLOW_QUERY_THRESHOLD_MS
+if SLOW_QUERY_LOG_ENABLED:
+    install_slow_query_log(async_engine)
+
+# Create AsyncSessionLocal class; objects stay usable after commit so
+# handlers can return them without an extra refresh round trip
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
 
 # Create Base class
 Base = declarative_base()
 
 # Dependency to get DB session
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+# Verify the database is reachable
+async def check_connection():
+    async with async_engine.connect() as connection:
+        await connection.execute(text("SELECT 1"))
+
+# Tables created before account deletes moved to the database keep a plain
+# foreign key; switch it to ON DELETE CASCADE without rewriting the data
+_CASCADE_DAILY_BOOKS_FK = text("""
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM pg_constraint
+        WHERE conname = 'trading_daily_books_account_id_fkey' AND confdeltype <> 'c'
+    ) THEN
+        ALTER TABLE trading_daily_books DROP CONSTRAINT trading_daily_books_account_id_fkey;
+        ALTER TABLE trading_daily_books ADD CONSTRAINT trading_daily_books_account_id_fkey
+            FOREIGN KEY (account_id) REFERENCES accounts (id) ON DELETE CASCADE;
+    END IF;
+END $$;
+""")
+
+# Full-text search over the journal's free text (PostgreSQL only). A stored
+# generated column is rewritten by the database on every insert and update,
+# whichever code path writes the row; summary outranks remarks and sentiment
+_SEARCH_VECTOR_COLUMN = text("""
+ALTER TABLE trading_daily_books ADD COLUMN IF NOT EXISTS search_vector tsvector
+GENERATED ALWAYS AS (
+    setweight(to_tsvector('english', coalesce(summary, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(remarks, '')), 'B') ||
+    setweight(to_tsvector('english', coalesce(sentiment, '')), 'C')
+) STORED
+""")
+
+_SEARCH_VECTOR_INDEX = text(
+    "CREATE INDEX IF NOT EXISTS ix_trading_daily_books_search_vector "
+    "ON trading_daily_books USING GIN (search_vector)"
+)
+
+# create_all skips tables that already exist, so indexes added to a model
+# later are created here
+def _create_missing_indexes(connection):
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+# create_all does not alter existing tables either. Columns added to a
+# model after its table shipped are listed here with their own DDL; see
+# init-db in app/cli.py. New summary columns are filled by rebuild-summaries
+_SUMMARY_PNL_COLUMNS = (
+    "profit_pnl", "loss_pnl", "liquidated_pnl", "breakeven_pnl", "no_trade_pnl", "no_result_pnl",
+)
+_ADDED_COLUMNS = [
+    *(
+        (table, column, "FLOAT NOT NULL DEFAULT 0")
+        for table in ("account_summaries", "account_monthly_summaries")
+        for column in _SUMMARY_PNL_COLUMNS
+    ),
+    ("accounts", "pending_delete", "BOOLEAN NOT NULL DEFAULT false"),
+]
+
+def _add_columns(connection):
+    """Add the columns of _ADDED_COLUMNS a table still lacks; returns the tables altered"""
+    inspector = inspect(connection)
+    existing = {}
+    altered = set()
+    for table, column, definition in _ADDED_COLUMNS:
+        if table not in existing:
+            existing[table] = {row["name"] for row in inspector.get_columns(table)}
+        if column not in existing[table]:
+            connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {definition}"))
+            altered.add(table)
+    return altered
+
+def load_models():
+    """Import every model module so all tables and relationship targets are registered on Base"""
+    from app.models import user, account, trading_plan, trading_daily_book, account_summary, balance_ledger, collection_version  # noqa: F401
+
+# Create all tables and indexes that do not exist yet
+async def init_db():
+    load_models()
+
+    async with async_engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+        altered = await connection.run_sync(_add_columns)
+        await connection.run_sync(_create_missing_indexes)
+        if connection.dialect.name == "postgresql":
+            await connection.execute(_CASCADE_DAILY_BOOKS_FK)
+            await connection.execute(_SEARCH_VECTOR_COLUMN)
+            await connection.execute(_SEARCH_VECTOR_INDEX)
+
+    # New summary columns start at their default; recompute them from the books
+    if altered & {"account_summaries", "account_monthly_summaries"}:
+        from app.utils.summaries import rebuild_summaries
+
+        async with AsyncSessionLocal() as db:
+            await rebuild_summaries(db)
+            await db.commit()
@@ -1,17 +1,21 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.database.database import engine
-from app.models import user, account, trading_plan, trading_daily_book
-from app.routes import auth, users, accounts, trading_plans, trading_daily_books
+from app.database.database import DB_INIT_ON_STARTUP, async_engine, init_db
+from app.routes import auth, users, accounts, trading_plans, trading_daily_books, analytics, dashboard, metrics, admin
+from app.utils.compression import COMPRESSION_ENABLED, CompressionMiddleware
+from app.utils.metrics import METRICS_ENABLED, MetricsMiddleware
 
-# Create database tables
-user.Base.metadata.create_all(bind=engine)
-account.Base.metadata.create_all(bind=engine)
-trading_plan.Base.metadata.create_all(bind=engine)
-trading_daily_book.Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Schema setup is opt-in so importing or booting a worker never waits on the DB
+    if DB_INIT_ON_STARTUP:
+        await init_db()
+    yield
+    await async_engine.dispose()
 
 # Create FastAPI app
-app = FastAPI(title="Token Auth API")
+app = FastAPI(title="Token Auth API", lifespan=lifespan)
 
 # Configure CORS
 origins = [
@@ -25,14 +29,28 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Next-Offset", "ETag"],
 )
 
+# Negotiated gzip/brotli for everything above the size threshold
+if COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
+# Outermost, so latency covers every other middleware
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(users.router)
 app.include_router(accounts.router)
 app.include_router(trading_plans.router)
 app.include_router(trading_daily_books.router)
+app.include_router(analytics.router)
+app.include_router(dashboard.router)
+app.include_router(admin.router)
+if METRICS_ENABLED:
+    app.include_router(metrics.router)
 
 @app.get("/")
 async def root():
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey
+from sqlalchemy import Boolean, Column, Integer, String, Float, ForeignKey, false
 from sqlalchemy.orm import relationship
 from app.database.database import Base
 
@@ -10,10 +10,16 @@ class Account(Base):
     purpose = Column(String)
     broker = Column(String)
     account_balance = Column(Float)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    # Set while a large account is purged in the background; such accounts
+    # are hidden from every listing and no longer accept writes
+    pending_delete = Column(Boolean, nullable=False, default=False, server_default=false())
     
     # Relationship with user
     user = relationship("User", back_populates="accounts")
     
-    # Relationship with trading daily books
-    daily_books = relationship("TradingDailyBook", back_populates="account", cascade="all, delete-orphan")
+    # Relationship with trading daily books; the database cascades the delete,
+    # so the ORM never loads the journal just to remove it
+    daily_books = relationship(
+        "TradingDailyBook", back_populates="account", cascade="all, delete-orphan", passive_deletes=True
+    )
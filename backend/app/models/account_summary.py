@@ -0,0 +1,39 @@
+from sqlalchemy import Column, Integer, Float, Date, ForeignKey
+from app.database.database import Base
+
+class SummaryColumnsMixin:
+    """Aggregate columns shared by the per-account and per-month summaries"""
+    entries = Column(Integer, default=0, nullable=False)
+    profit_count = Column(Integer, default=0, nullable=False)
+    loss_count = Column(Integer, default=0, nullable=False)
+    liquidated_count = Column(Integer, default=0, nullable=False)
+    breakeven_count = Column(Integer, default=0, nullable=False)
+    no_trade_count = Column(Integer, default=0, nullable=False)
+    no_result_count = Column(Integer, default=0, nullable=False)
+    total_pnl = Column(Float, default=0.0, nullable=False)
+    total_withdrawals = Column(Float, default=0.0, nullable=False)
+    # P&L of the entries with each result; the server default fills rows
+    # that existed before these columns until the summaries are rebuilt
+    profit_pnl = Column(Float, default=0.0, server_default="0", nullable=False)
+    loss_pnl = Column(Float, default=0.0, server_default="0", nullable=False)
+    liquidated_pnl = Column(Float, default=0.0, server_default="0", nullable=False)
+    breakeven_pnl = Column(Float, default=0.0, server_default="0", nullable=False)
+    no_trade_pnl = Column(Float, default=0.0, server_default="0", nullable=False)
+    no_result_pnl = Column(Float, default=0.0, server_default="0", nullable=False)
+    peak_balance = Column(Float, nullable=True)
+    last_entry_date = Column(Date, nullable=True)
+
+class AccountSummary(SummaryColumnsMixin, Base):
+    """Materialized totals of an account's daily books, kept in step on every write"""
+    __tablename__ = "account_summaries"
+
+    account_id = Column(Integer, ForeignKey("accounts.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+
+class AccountMonthlySummary(SummaryColumnsMixin, Base):
+    """Materialized totals of an account's daily books for one calendar month"""
+    __tablename__ = "account_monthly_summaries"
+
+    account_id = Column(Integer, ForeignKey("accounts.id", ondelete="CASCADE"), primary_key=True)
+    month = Column(Date, primary_key=True)  # First day of the month
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
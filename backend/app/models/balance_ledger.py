@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+from app.database.database import Base
+from datetime import datetime
+
+class BalanceLedgerEntry(Base):
+    """Append-only record of every change to an account balance"""
+    __tablename__ = "account_balance_ledger"
+
+    id = Column(Integer, primary_key=True, index=True)
+    account_id = Column(Integer, ForeignKey("accounts.id", ondelete="CASCADE"), index=True)
+    user_id = Column(Integer, ForeignKey("users.id"))
+    book_id = Column(Integer, nullable=True)  # Daily book that caused the change, if any
+    delta = Column(Float)
+    balance_after = Column(Float)
+    reason = Column(String)
+    created_at = Column(DateTime, default=datetime.utcnow)
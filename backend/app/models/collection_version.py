@@ -0,0 +1,10 @@
+from sqlalchemy import Column, Integer, BigInteger, String, ForeignKey
+from app.database.database import Base
+
+class CollectionVersion(Base):
+    """Per-user change counter of one collection, bumped by every write to it"""
+    __tablename__ = "collection_versions"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    collection = Column(String, primary_key=True)
+    version = Column(BigInteger, default=0, nullable=False)
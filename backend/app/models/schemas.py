@@ -1,6 +1,7 @@
-from pydantic import BaseModel, EmailStr
-from datetime import date
-from typing import Optional
+from pydantic import BaseModel, EmailStr, Field
+from datetime import date, datetime
+import datetime as datetime_module
+from typing import Dict, List, Optional
 from enum import Enum
 
 class UserBase(BaseModel):
@@ -48,6 +49,18 @@ class Account(AccountBase):
     class Config:
         from_attributes = True
 
+class BalanceLedgerEntry(BaseModel):
+    id: int
+    account_id: int
+    book_id: Optional[int] = None
+    delta: float
+    balance_after: float
+    reason: str
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
 # Trading Plan schemas
 class TradingPlanBase(BaseModel):
     day: str
@@ -64,9 +77,13 @@ class TradingPlanBase(BaseModel):
     plan_date: date
 
 class TradingPlanCreate(TradingPlanBase):
-    pass
+    # Sizing fields may be left out and derived server-side
+    required_lots: Optional[float] = None
+    rounded_lots: Optional[float] = None
+    risk_amount: Optional[float] = None
+    risk_percentage: Optional[float] = None
 
-class TradingPlanUpdate(TradingPlanBase):
+class TradingPlanUpdate(TradingPlanCreate):
     pass
 
 class TradingPlan(TradingPlanBase):
@@ -76,6 +93,55 @@ class TradingPlan(TradingPlanBase):
     class Config:
         from_attributes = True
 
+# Position sizing schemas
+class SizingScenario(BaseModel):
+    account_balance: float
+    daily_target: float
+    tp_pips: float = Field(gt=0)
+    sl_pips: float = Field(ge=0)
+    risk_amount: Optional[float] = None
+    instrument: Optional[str] = None
+
+class SizingRequest(BaseModel):
+    scenarios: List[SizingScenario] = Field(max_length=10000)
+
+class SizingResult(BaseModel):
+    instrument: str
+    pip_value: float
+    required_lots: float
+    rounded_lots: float
+    risk_amount: float
+    risk_percentage: float
+
+class Instrument(BaseModel):
+    symbol: str
+    contract_size: float
+    pip_size: float
+    pip_value: float
+    lot_step: float
+
+class TargetMode(str, Enum):
+    FIXED = "fixed"
+    PERCENT = "percent"
+
+class PlanProjectionRequest(BaseModel):
+    account_balance: float = Field(gt=0)
+    start_date: date
+    days: int = Field(gt=0, le=1000)
+    target_mode: TargetMode = TargetMode.PERCENT
+    daily_target: float = Field(gt=0)  # Amount, or % of balance when compounding
+    risk_percentage: float = Field(ge=0, le=100)
+    sl_pips: float = Field(ge=0)
+    tp_pips: float = Field(gt=0)
+    instrument: Optional[str] = None
+    trading_days_only: bool = True
+    save: bool = False
+
+class PlanProjection(BaseModel):
+    saved: bool
+    final_balance: float
+    plans: List[TradingPlanBase]
+
 # Trading Daily Book schemas
 class TradingResult(str, Enum):
     LOSS_OVERALL = "Loss Overall"
@@ -99,8 +165,23 @@ class TradingDailyBookBase(BaseModel):
 class TradingDailyBookCreate(TradingDailyBookBase):
     pass
 
+class TradingDailyBookImportRow(TradingDailyBookBase):
+    # Chained from the previous row of the same account during import
+    starting_balance: Optional[float] = None
+
+class ImportRowError(BaseModel):
+    row: int
+    error: str
+
+class ImportResult(BaseModel):
+    imported: int
+    failed: int
+    errors: List[ImportRowError]
+
 class TradingDailyBookUpdate(BaseModel):
-    date: Optional[date] = None
+    # Annotated via the module path: a bare `date` would resolve to this
+    # field's own default (None) and reject every date sent by the client
+    date: Optional[datetime_module.date] = None
     account_id: Optional[int] = None
     ending_balance: Optional[float] = None
     sentiment: Optional[str] = None
@@ -116,6 +197,9 @@ class TradingDailyBook(TradingDailyBookBase):
     class Config:
         from_attributes = True
 
+class TradingDailyBookSearchHit(TradingDailyBook):
+    rank: float  # Relevance in [0, 1), higher is better
+
 class AccountWithBalance(BaseModel):
     id: int
     account_name: str
@@ -123,3 +207,97 @@ class AccountWithBalance(BaseModel):
 
     class Config:
         from_attributes = True
+
+# Analytics schemas
+class EquityPoint(BaseModel):
+    date: date
+    balance: float
+    cumulative_pnl: float
+
+class AccountPerformance(BaseModel):
+    account_id: int
+    account_name: str
+    account_balance: float
+    entries: int
+    net_pnl: float
+    total_withdrawals: float
+    max_drawdown: float
+    max_drawdown_pct: float
+    win_rate: float
+    results: Dict[TradingResult, int]
+    average_daily_return: float
+    equity_curve: List[EquityPoint] = []
+
+class AccountSummary(BaseModel):
+    account_id: int
+    entries: int
+    profit_count: int
+    loss_count: int
+    liquidated_count: int
+    breakeven_count: int
+    no_trade_count: int
+    no_result_count: int
+    total_pnl: float
+    total_withdrawals: float
+    profit_pnl: float
+    loss_pnl: float
+    liquidated_pnl: float
+    breakeven_pnl: float
+    no_trade_pnl: float
+    no_result_pnl: float
+    peak_balance: Optional[float] = None
+    last_entry_date: Optional[date] = None
+
+    class Config:
+        from_attributes = True
+
+class AccountMonthlySummary(AccountSummary):
+    month: date
+
+# P&L calendar schemas
+class CalendarDay(BaseModel):
+    date: date
+    pnl: float
+    result: TradingResult
+    entries: int
+
+class CalendarMonth(BaseModel):
+    month: date
+    pnl: float
+    entries: int
+    days: List[CalendarDay]
+
+# Dashboard schemas
+class DashboardAccount(BaseModel):
+    id: int
+    account_name: str
+    broker: str
+    account_balance: float
+    month_to_date_pnl: float
+    month_to_date_withdrawals: float
+    month_to_date_entries: int
+
+class ResultTotals(BaseModel):
+    count: int
+    pnl: float
+
+class Dashboard(BaseModel):
+    as_of: date
+    accounts: List[DashboardAccount]
+    todays_plans: List[TradingPlan]
+    recent_books: List[TradingDailyBook]
+    results: Dict[TradingResult, ResultTotals]
+
+# Admin schemas
+class SlowQuery(BaseModel):
+    sql: str
+    calls: int
+    total_ms: float
+    mean_ms: float
+    max_ms: float
+    last_ms: float
+    last_seen: datetime
+    parameter_shape: str
+    routes: Dict[str, int]
+    plan: Optional[str] = None
+    plan_captured_at: Optional[datetime] = None
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from app.database.database import Base
 from datetime import date
@@ -22,17 +22,29 @@ class TradingDailyBook(Base):
     sentiment = Column(String, nullable=True)
     withdraw = Column(Float, default=0.0)
     summary = Column(String, nullable=True)
-    result = Column(Enum(TradingResult), default=TradingResult.NO_RESULT)
+    # Native ENUM on PostgreSQL; elsewhere a VARCHAR guarded by a CHECK constraint
+    result = Column(
+        Enum(TradingResult, name="tradingresult", create_constraint=True, validate_strings=True),
+        default=TradingResult.NO_RESULT
+    )
     remarks = Column(String, nullable=True)
     
     # Foreign key to account
-    account_id = Column(Integer, ForeignKey("accounts.id"))
+    account_id = Column(Integer, ForeignKey("accounts.id", ondelete="CASCADE"))
     user_id = Column(Integer, ForeignKey("users.id"))
     
     # Relationships
     account = relationship("Account", back_populates="daily_books")
     user = relationship("User", back_populates="daily_books")
     
+    __table_args__ = (
+        # Journal listing, keyset pages and exports: every user-scoped read
+        # filters on user_id and walks (date, id) newest first
+        Index("ix_trading_daily_books_user_date_id", user_id, date.desc(), id.desc()),
+        # Per-account reads: balance chaining, summaries, analytics, deletes
+        Index("ix_trading_daily_books_account_date_id", account_id, date, id),
+    )
+    
     @classmethod
     def from_dict(cls, data_dict, **kwargs):
         """
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, Date, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Boolean, Date, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.database.database import Base
 from datetime import date
@@ -23,3 +23,8 @@ class TradingPlan(Base):
     
     # Relationship with user
     user = relationship("User", back_populates="trading_plans")
+    
+    __table_args__ = (
+        # Plan listing and exports filter on user_id and order by plan_date
+        Index("ix_trading_plans_user_plan_date", user_id, plan_date, id),
+    )
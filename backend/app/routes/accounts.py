@@ -1,34 +1,53 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 
 from app.database.database import get_db
-from app.models.schemas import Account as AccountSchema, AccountCreate, AccountUpdate
+from app.models.schemas import (
+    Account as AccountSchema,
+    AccountCreate,
+    AccountUpdate,
+    BalanceLedgerEntry as BalanceLedgerEntrySchema
+)
 from app.models.account import Account
+from app.models.balance_ledger import BalanceLedgerEntry
 from app.utils.auth import get_current_active_user
 from app.models.user import User
+from app.utils.etags import ACCOUNTS, TRADING_DAILY_BOOKS, bump_versions, conditional_get
+from app.utils.ledger import lock_account, set_account_balance, ACCOUNT_OPENED, MANUAL_ADJUSTMENT
+from app.utils.queries import account_query, accounts_query, ledger_query
+from app.utils.purge import (
+    ACCOUNT_PURGE_THRESHOLD,
+    count_daily_books,
+    delete_account_rows,
+    mark_pending_delete,
+    purge_account,
+    start_purge
+)
+from app.utils.summaries import account_month_collections
 
 router = APIRouter(prefix="/accounts", tags=["accounts"])
 
-@router.get("/", response_model=List[AccountSchema])
-def get_accounts(
+@router.get("/", response_model=List[AccountSchema], dependencies=[conditional_get(ACCOUNTS)])
+async def get_accounts(
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get all accounts for the current user"""
-    accounts = db.query(Account).filter(Account.user_id == current_user.id).all()
+    result = await db.execute(accounts_query(current_user.id))
+    accounts = result.scalars().all()
     return accounts
 
-@router.get("/{account_id}", response_model=AccountSchema)
-def get_account(
+@router.get("/{account_id}", response_model=AccountSchema, dependencies=[conditional_get(ACCOUNTS)])
+async def get_account(
     account_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get account by ID"""
-    account = db.query(Account).filter(
-        Account.id == account_id, Account.user_id == current_user.id
-    ).first()
+    result = await db.execute(account_query(current_user.id, account_id))
+    account = result.scalars().first()
     
     if not account:
         raise HTTPException(
@@ -38,11 +57,27 @@ def get_account(
     
     return account
 
+@router.get(
+    "/{account_id}/ledger",
+    response_model=List[BalanceLedgerEntrySchema],
+    dependencies=[conditional_get(ACCOUNTS)]
+)
+async def get_account_ledger(
+    account_id: int,
+    before_id: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=500),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get the balance ledger of an account, newest first"""
+    result = await db.execute(ledger_query(current_user.id, account_id, before_id, limit))
+    return result.scalars().all()
+
 @router.post("/", response_model=AccountSchema, status_code=status.HTTP_201_CREATED)
-def create_account(
+async def create_account(
     account_data: AccountCreate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new account"""
     db_account = Account(
@@ -51,22 +86,32 @@ def create_account(
     )
     
     db.add(db_account)
-    db.commit()
-    db.refresh(db_account)
+    await db.flush()
+    
+    # Open the account's balance ledger
+    db.add(BalanceLedgerEntry(
+        account_id=db_account.id,
+        user_id=current_user.id,
+        delta=db_account.account_balance,
+        balance_after=db_account.account_balance,
+        reason=ACCOUNT_OPENED
+    ))
+    
+    await bump_versions(db, current_user.id, ACCOUNTS)
+    await db.commit()
+    await db.refresh(db_account)
     
     return db_account
 
 @router.put("/{account_id}", response_model=AccountSchema)
-def update_account(
+async def update_account(
     account_id: int,
     account_data: AccountUpdate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update an existing account"""
-    account = db.query(Account).filter(
-        Account.id == account_id, Account.user_id == current_user.id
-    ).first()
+    account = await lock_account(db, account_id, current_user.id)
     
     if not account:
         raise HTTPException(
@@ -74,33 +119,60 @@ def update_account(
             detail="Account not found"
         )
     
-    # Update account fields
-    for key, value in account_data.dict().items():
+    # Update account fields; balance changes go through the ledger
+    values = account_data.dict()
+    new_balance = values.pop("account_balance")
+    for key, value in values.items():
         setattr(account, key, value)
+    if new_balance != account.account_balance:
+        set_account_balance(db, account, new_balance, MANUAL_ADJUSTMENT)
     
-    db.commit()
-    db.refresh(account)
+    await bump_versions(db, current_user.id, ACCOUNTS)
+    await db.commit()
+    await db.refresh(account)
     
     return account
 
-@router.delete("/{account_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_account(
+@router.delete(
+    "/{account_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    responses={status.HTTP_202_ACCEPTED: {"description": "Large account scheduled for background purge"}}
+)
+async def delete_account(
     account_id: int,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Delete an account"""
-    account = db.query(Account).filter(
+    """Delete an account, purging very large journals in the background"""
+    result = await db.execute(select(Account.pending_delete).filter(
         Account.id == account_id, Account.user_id == current_user.id
-    ).first()
+    ).with_for_update())
+    pending_delete = result.scalar()
     
-    if not account:
+    if pending_delete is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Account not found"
         )
     
-    db.delete(account)
-    db.commit()
+    # Large journals are removed in batches after the response is sent
+    if pending_delete or await count_daily_books(db, account_id) > ACCOUNT_PURGE_THRESHOLD:
+        if not pending_delete:
+            # Committed before answering, so the account stays hidden and
+            # read-only even if this process dies before the purge finishes
+            await mark_pending_delete(db, account_id, current_user.id)
+            await bump_versions(db, current_user.id, ACCOUNTS)
+            await db.commit()
+        # A purge interrupted by a restart is resumed by the next delete
+        if start_purge(account_id):
+            background_tasks.add_task(purge_account, account_id, current_user.id)
+        return Response(status_code=status.HTTP_202_ACCEPTED)
+    
+    # Daily books, summaries and ledger rows go with it via ON DELETE CASCADE
+    months = await account_month_collections(db, account_id)
+    await delete_account_rows(db, account_id, current_user.id)
+    await bump_versions(db, current_user.id, ACCOUNTS, TRADING_DAILY_BOOKS, *months)
+    await db.commit()
     
     return None
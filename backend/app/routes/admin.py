@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, Query, status
+from typing import List
+
+from app.models.schemas import SlowQuery
+from app.utils.auth import AuthenticatedUser, get_current_admin_user
+from app.utils.slow_queries import SLOW_QUERY_LOG_ENABLED, SLOW_QUERY_THRESHOLD_MS, slow_query_log
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+@router.get("/slow-queries", response_model=List[SlowQuery])
+async def get_slow_queries(
+    limit: int = Query(20, ge=1, le=200),
+    order_by: str = Query("total_ms", pattern="^(total_ms|max_ms|calls)$"),
+    current_user: AuthenticatedUser = Depends(get_current_admin_user)
+):
+    """
+    Top statements recorded by the slow-query log (SLOW_QUERY_LOG_ENABLED),
+    grouped by normalized SQL with their routes and latest EXPLAIN plan.
+    """
+    return slow_query_log.top(limit=limit, order_by=order_by)
+
+@router.get("/slow-queries/config")
+async def get_slow_query_config(current_user: AuthenticatedUser = Depends(get_current_admin_user)):
+    """Whether the slow-query log is recording and its threshold"""
+    return {"enabled": SLOW_QUERY_LOG_ENABLED, "threshold_ms": SLOW_QUERY_THRESHOLD_MS}
+
+@router.delete("/slow-queries", status_code=status.HTTP_204_NO_CONTENT)
+async def clear_slow_queries(current_user: AuthenticatedUser = Depends(get_current_admin_user)):
+    """Reset the slow-query table"""
+    slow_query_log.clear()
+    return None
@@ -0,0 +1,122 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from datetime import date
+
+from app.database.database import get_db
+from app.models.schemas import (
+    AccountPerformance,
+    AccountSummary as AccountSummarySchema,
+    AccountMonthlySummary as AccountMonthlySummarySchema,
+    CalendarMonth
+)
+from app.models.account import Account
+from app.utils.analytics import account_performance, empty_performance
+from app.utils.auth import get_current_active_user
+from app.utils.etags import ACCOUNTS, TRADING_DAILY_BOOKS, conditional_get
+from app.utils.pnl_calendar import CALENDAR_MAX_MONTHS, calendar_months, month_range
+from app.utils.queries import (
+    account_query,
+    accounts_query,
+    account_summaries_query,
+    monthly_summaries_query,
+    performance_books_query
+)
+from app.utils.summaries import next_month
+from app.models.user import User
+
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+# Every view here is derived from the accounts and their daily books
+JOURNAL_ETAG = conditional_get(ACCOUNTS, TRADING_DAILY_BOOKS)
+
+MONTH_PATTERN = r"^\d{4}-(0[1-9]|1[0-2])$"
+
+def _parse_month(value: str) -> date:
+    year, month = value.split("-")
+    return date(int(year), int(month), 1)
+
+@router.get("/accounts", response_model=List[AccountPerformance], dependencies=[JOURNAL_ETAG])
+async def get_account_performance(
+    account_id: Optional[int] = None,
+    from_date: Optional[date] = Query(None, alias="from"),
+    to_date: Optional[date] = Query(None, alias="to"),
+    include_curve: bool = True,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get the equity curve and performance statistics of each account:
+    net P&L, max drawdown, win rate, result counts, average daily return
+    and total withdrawals.
+    """
+    account_rows = (
+        account_query(current_user.id, account_id) if account_id is not None else accounts_query(current_user.id)
+    ).with_only_columns(Account.id, Account.account_name, Account.account_balance)
+    
+    accounts = (await db.execute(account_rows.order_by(Account.id))).all()
+    rows = (await db.execute(
+        performance_books_query(current_user.id, account_id, from_date, to_date)
+    )).all()
+    
+    performance = account_performance(rows, include_curve=include_curve)
+    
+    return [
+        {
+            "account_id": account.id,
+            "account_name": account.account_name,
+            "account_balance": account.account_balance,
+            **performance.get(account.id, empty_performance()),
+        }
+        for account in accounts
+    ]
+
+@router.get("/summaries", response_model=List[AccountSummarySchema], dependencies=[JOURNAL_ETAG])
+async def get_account_summaries(
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get the materialized per-account totals of the daily books"""
+    result = await db.execute(account_summaries_query(current_user.id))
+    return result.scalars().all()
+
+@router.get("/summaries/monthly", response_model=List[AccountMonthlySummarySchema], dependencies=[JOURNAL_ETAG])
+async def get_account_monthly_summaries(
+    account_id: Optional[int] = None,
+    from_date: Optional[date] = Query(None, alias="from"),
+    to_date: Optional[date] = Query(None, alias="to"),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get the materialized per-account, per-month totals of the daily books"""
+    result = await db.execute(monthly_summaries_query(current_user.id, account_id, from_date, to_date))
+    return result.scalars().all()
+
+@router.get("/calendar", response_model=List[CalendarMonth], dependencies=[JOURNAL_ETAG])
+async def get_pnl_calendar(
+    from_month: Optional[str] = Query(None, alias="from", pattern=MONTH_PATTERN, description="First month, YYYY-MM"),
+    to_month: Optional[str] = Query(None, alias="to", pattern=MONTH_PATTERN, description="Last month, YYYY-MM"),
+    account_id: Optional[int] = None,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get the daily P&L and result of each month in a range, summed across
+    accounts unless account_id is given. Defaults to the last 12 months.
+    """
+    last = _parse_month(to_month) if to_month else date.today().replace(day=1)
+    first = _parse_month(from_month) if from_month else next_month(last.replace(year=last.year - 1))
+    
+    if first > last:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="from must not be after to"
+        )
+    months = month_range(first, last)
+    if len(months) > CALENDAR_MAX_MONTHS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {CALENDAR_MAX_MONTHS} months per request"
+        )
+    
+    return await calendar_months(db, current_user.id, months, account_id)
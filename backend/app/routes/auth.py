@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 
 from app.database.database import get_db
@@ -9,16 +10,20 @@ from app.models.user import User
 from app.utils.auth import (
     authenticate_user, 
     create_access_token, 
-    get_password_hash, 
+    hash_password_async, 
+    get_current_active_user,
+    principal_cache,
+    AuthenticatedUser,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
 @router.post("/register", response_model=UserSchema)
-def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
     # Check if user with this email already exists
-    db_user = db.query(User).filter(User.email == user_data.email).first()
+    result = await db.execute(select(User).filter(User.email == user_data.email))
+    db_user = result.scalars().first()
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -26,7 +31,8 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Check if username is already taken
-    db_username = db.query(User).filter(User.username == user_data.username).first()
+    result = await db.execute(select(User).filter(User.username == user_data.username))
+    db_username = result.scalars().first()
     if db_username:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -34,7 +40,7 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await hash_password_async(user_data.password)
     db_user = User(
         email=user_data.email,
         username=user_data.username,
@@ -43,15 +49,15 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
     
     # Add user to database
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     
     return db_user
 
 @router.post("/login", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
     # Authenticate user
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -66,3 +72,8 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
     )
     
     return {"access_token": access_token, "token_type": "bearer"}
+
+@router.get("/cache-stats")
+async def get_auth_cache_stats(current_user: AuthenticatedUser = Depends(get_current_active_user)):
+    """Hit/miss counters of the in-process authenticated-principal cache"""
+    return principal_cache.stats()
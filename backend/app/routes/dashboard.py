@@ -0,0 +1,60 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from datetime import date
+
+from app.database.database import get_db
+from app.models.schemas import Dashboard
+from app.utils.auth import get_current_active_user
+from app.utils.etags import ACCOUNTS, TRADING_DAILY_BOOKS, TRADING_PLANS, conditional_get
+from app.utils.queries import dashboard_accounts_query, plans_of_day_query, recent_books_query, result_totals_query
+from app.utils.summaries import RESULT_COUNT_COLUMNS, RESULT_PNL_COLUMNS
+from app.models.user import User
+
+router = APIRouter(prefix="/dashboard", tags=["dashboard"])
+
+@router.get(
+    "/",
+    response_model=Dashboard,
+    dependencies=[conditional_get(ACCOUNTS, TRADING_PLANS, TRADING_DAILY_BOOKS)]
+)
+async def get_dashboard(
+    day: Optional[date] = None,
+    recent: int = Query(10, ge=0, le=100),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Everything the dashboard draws, in four queries whatever the journal
+    size: account balances with month-to-date P&L from the monthly
+    summaries, the plans of `day` (today by default), the `recent` newest
+    daily books, and the count and P&L of each trading result from the
+    account summaries.
+    """
+    day = day or date.today()
+    
+    # Balances joined with the materialized summary of the current month
+    accounts = (await db.execute(dashboard_accounts_query(current_user.id, day))).mappings().all()
+    
+    todays_plans = (await db.execute(plans_of_day_query(current_user.id, day))).scalars().all()
+    
+    recent_books = []
+    if recent:
+        recent_books = (await db.execute(recent_books_query(current_user.id, recent))).scalars().all()
+    
+    # Per-result counts and P&L summed over the account summaries, one row
+    # per account instead of the whole journal
+    totals = (await db.execute(result_totals_query(current_user.id))).mappings().one()
+    results = {
+        result: {"count": totals[count_column], "pnl": totals[RESULT_PNL_COLUMNS[result]]}
+        for result, count_column in RESULT_COUNT_COLUMNS.items()
+        if totals[count_column]
+    }
+    
+    return {
+        "as_of": day,
+        "accounts": accounts,
+        "todays_plans": todays_plans,
+        "recent_books": recent_books,
+        "results": results,
+    }
@@ -0,0 +1,34 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.pool import QueuePool
+
+from app.database.database import async_engine
+from app.utils.auth import principal_cache
+from app.utils.hashing import pending_password_jobs
+from app.utils.metrics import register_collector, render_metrics
+from app.utils.pnl_calendar import calendar_cache_stats
+from app.utils.search import search_index_stats
+
+router = APIRouter(tags=["metrics"])
+
+# Point-in-time values read from their owners at scrape time
+if isinstance(async_engine.pool, QueuePool):
+    # Only queue pools have a size; the in-memory SQLite mode's static pool does not
+    register_collector("db_pool_size", "Configured size of the async connection pool", lambda: async_engine.pool.size())
+    register_collector("db_pool_checked_out", "Connections currently checked out", lambda: async_engine.pool.checkedout())
+    register_collector("db_pool_overflow", "Connections open beyond the pool size", lambda: async_engine.pool.overflow())
+register_collector("password_hash_jobs_pending", "Admitted bcrypt jobs, running or queued", pending_password_jobs)
+register_collector("auth_principal_cache_size", "Entries in the principal cache", lambda: principal_cache.stats()["size"])
+register_collector(
+    "auth_principal_cache_hits_total", "Principal cache hits since start", lambda: principal_cache.hits, kind="counter"
+)
+register_collector(
+    "auth_principal_cache_misses_total", "Principal cache misses since start", lambda: principal_cache.misses, kind="counter"
+)
+register_collector("search_indexes", "Users with an in-process search index", lambda: search_index_stats()["size"])
+register_collector("calendar_cache_months", "Closed P&L calendar months cached", lambda: calendar_cache_stats()["size"])
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """Request, database and pool metrics in the Prometheus text format"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
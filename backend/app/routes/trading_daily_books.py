@@ -1,54 +1,303 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Response, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from datetime import date
+from itertools import islice
 
 from app.database.database import get_db
 from app.models.schemas import (
     TradingDailyBook as TradingDailyBookSchema,
     TradingDailyBookCreate,
     TradingDailyBookUpdate,
-    AccountWithBalance
+    TradingDailyBookSearchHit,
+    AccountWithBalance,
+    ImportResult
 )
-from app.models.trading_daily_book import TradingDailyBook
+from app.models.trading_daily_book import TradingDailyBook, TradingResult
 from app.models.account import Account
 from app.utils.auth import get_current_active_user
 from app.models.user import User
+from app.utils.etags import ACCOUNTS, TRADING_DAILY_BOOKS, bump_versions, conditional_get
+from app.utils.pagination import NEXT_CURSOR_HEADER, NEXT_OFFSET_HEADER, encode_cursor, decode_cursor
+from app.utils.summaries import book_month_key, refresh_summaries
+from app.utils.queries import (
+    account_query,
+    accounts_query,
+    daily_book_query,
+    daily_books_export_query,
+    daily_books_query,
+    writable_daily_book_query
+)
+from app.utils.importer import SUPPORTED_FORMATS, detect_format, iter_import_rows
+from app.utils.export import streaming_export
+from app.utils.serialization import (
+    FAST_LIST_RESPONSES,
+    fast_item_response,
+    fast_list_response,
+    parse_fields,
+    schema_columns
+)
+from app.utils.ledger import (
+    lock_account,
+    set_account_balance,
+    DAILY_BOOK_CREATED,
+    DAILY_BOOK_UPDATED,
+    DAILY_BOOK_DELETED,
+    DAILY_BOOK_IMPORT
+)
+from app.utils.balance_chain import recompute_balance_chain
+from app.utils.search import search_books
 
 router = APIRouter(prefix="/trading-daily-books", tags=["trading daily books"])
 
-@router.get("/", response_model=List[TradingDailyBookSchema])
-def get_trading_daily_books(
+# Rows inserted per statement/transaction by the bulk importer
+IMPORT_BATCH_SIZE = 1000
+
+# Per-row errors kept in the import report (the failed count is always exact)
+IMPORT_MAX_REPORTED_ERRORS = 1000
+
+# Columns written by the export endpoint, in file order
+EXPORT_COLUMNS = (
+    "id", "date", "account_id", "starting_balance", "ending_balance", "withdraw",
+    "result", "sentiment", "summary", "remarks",
+)
+
+@router.get(
+    "/",
+    response_model=List[TradingDailyBookSchema],
+    dependencies=[conditional_get(TRADING_DAILY_BOOKS)]
+)
+async def get_trading_daily_books(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    account_id: Optional[int] = None,
+    from_date: Optional[date] = Query(None, alias="from"),
+    to_date: Optional[date] = Query(None, alias="to"),
+    result: Optional[TradingResult] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. date,result"),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get all trading daily books for the current user"""
-    daily_books = db.query(TradingDailyBook).filter(
-        TradingDailyBook.user_id == current_user.id
-    ).order_by(TradingDailyBook.date.desc()).all()
+    """
+    Get a page of trading daily books for the current user, newest first.
+    Pages are keyset-paginated on (date, id); the cursor for the next page
+    is returned in the X-Next-Cursor header. With `fields`, only those
+    columns are selected and returned.
+    """
+    selected = parse_fields(fields, TradingDailyBookSchema)
+    
+    # Resume strictly after the last row of the previous page
+    before = decode_cursor(cursor) if cursor else None
+    query = daily_books_query(current_user.id, account_id, from_date, to_date, result, before)
+    
+    # Column rows encoded straight to JSON, without ORM instances; the
+    # cursor columns are always read, but only returned when selected
+    column_rows = FAST_LIST_RESPONSES or selected is not None
+    if column_rows:
+        columns = None if selected is None else {*selected, "date", "id"}
+        query = query.with_only_columns(*schema_columns(TradingDailyBookSchema, TradingDailyBook, columns))
+    
+    # Fetch one extra row to know whether another page exists
+    rows = await db.execute(query.limit(limit + 1))
+    daily_books = rows.all() if column_rows else rows.scalars().all()
+    
+    if len(daily_books) > limit:
+        daily_books = daily_books[:limit]
+        last = daily_books[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.date, last.id)
+    
+    if column_rows:
+        return fast_list_response(TradingDailyBookSchema, daily_books, response, selected)
     return daily_books
 
-@router.get("/accounts", response_model=List[AccountWithBalance])
-def get_accounts_with_balance(
+@router.get("/accounts", response_model=List[AccountWithBalance], dependencies=[conditional_get(ACCOUNTS)])
+async def get_accounts_with_balance(
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get all accounts with their current balance for the dropdown selection"""
-    accounts = db.query(Account).filter(
-        Account.user_id == current_user.id
-    ).all()
+    result = await db.execute(accounts_query(current_user.id))
+    accounts = result.scalars().all()
     return accounts
 
-@router.get("/{book_id}", response_model=TradingDailyBookSchema)
-def get_trading_daily_book(
+@router.get("/export")
+async def export_trading_daily_books(
+    file_format: str = Query("csv", alias="format", pattern="^(csv|ndjson)$"),
+    account_id: Optional[int] = None,
+    from_date: Optional[date] = Query(None, alias="from"),
+    to_date: Optional[date] = Query(None, alias="to"),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Stream the full trading journal of the current user as CSV or NDJSON"""
+    query = daily_books_export_query(current_user.id, EXPORT_COLUMNS, account_id, from_date, to_date)
+    return streaming_export(query, EXPORT_COLUMNS, file_format, "trading-daily-books")
+
+@router.get(
+    "/search",
+    response_model=List[TradingDailyBookSearchHit],
+    dependencies=[conditional_get(TRADING_DAILY_BOOKS)]
+)
+async def search_trading_daily_books(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    account_id: Optional[int] = None,
+    from_date: Optional[date] = Query(None, alias="from"),
+    to_date: Optional[date] = Query(None, alias="to"),
+    result: Optional[TradingResult] = None,
+    sort: str = Query("rank", pattern="^(rank|date)$"),
+    offset: int = Query(0, ge=0, le=10000),
+    limit: int = Query(50, ge=1, le=100),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Full-text search over the summary, remarks and sentiment of the current
+    user's daily books. `q` takes web-search syntax: words must all match,
+    "quoted words" must be adjacent and -word excludes. Results are ranked
+    by relevance (or newest first with sort=date); the offset of the next
+    page is returned in the X-Next-Offset header.
+    """
+    # Fetch one extra hit to know whether another page exists
+    hits = await search_books(
+        db, current_user.id, q, account_id, from_date, to_date, result, sort, offset, limit + 1
+    )
+    
+    if len(hits) > limit:
+        hits = hits[:limit]
+        response.headers[NEXT_OFFSET_HEADER] = str(offset + limit)
+    
+    return hits
+
+@router.post("/import", response_model=ImportResult)
+async def import_trading_daily_books(
+    file: UploadFile = File(...),
+    file_format: Optional[str] = Query(None, alias="format", pattern="^(csv|ndjson)$"),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Bulk import trading daily books from a CSV or NDJSON upload.
+    Rows are streamed, validated and inserted in batches of IMPORT_BATCH_SIZE,
+    one transaction per batch. Each row's starting balance is chained from
+    the previous row of the same account; invalid rows are reported and skipped.
+    Every account is then rechained from its earliest imported date.
+    """
+    file_format = file_format or detect_format(file.filename, file.content_type)
+    if file_format not in SUPPORTED_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Unsupported file format, upload a .csv or .ndjson file"
+        )
+    
+    # Running balance of every account the user owns
+    result = await db.execute(
+        accounts_query(current_user.id).with_only_columns(Account.id, Account.account_balance)
+    )
+    balances = {account_id: balance for account_id, balance in result.all()}
+    first_dates = {}
+    
+    imported = 0
+    errors = []
+    failed = 0
+    batch = []
+    batch_rows = []
+    batch_start_balances = {}
+    
+    def record_error(row_number, message):
+        nonlocal failed
+        failed += 1
+        if len(errors) < IMPORT_MAX_REPORTED_ERRORS:
+            errors.append({"row": row_number, "error": message})
+    
+    async def flush_batch():
+        nonlocal imported
+        if not batch:
+            return
+        try:
+            await db.execute(insert(TradingDailyBook), batch)
+            await refresh_summaries(db, {
+                book_month_key(row["account_id"], row["date"]) for row in batch
+            })
+            await bump_versions(db, current_user.id, ACCOUNTS, TRADING_DAILY_BOOKS)
+            await db.commit()
+            imported += len(batch)
+        except Exception as e:
+            await db.rollback()
+            # Undo the balance chain advanced by the failed batch
+            balances.update(batch_start_balances)
+            for row_number in batch_rows:
+                record_error(row_number, f"Batch insert failed: {e.__class__.__name__}")
+        batch.clear()
+        batch_rows.clear()
+        batch_start_balances.clear()
+    
+    rows = iter_import_rows(file.file, file_format)
+    while True:
+        # Reading and validating the upload blocks, so each batch of rows is
+        # parsed in the threadpool rather than on the event loop
+        parsed = await run_in_threadpool(list, islice(rows, IMPORT_BATCH_SIZE))
+        if not parsed:
+            break
+        
+        for row_number, row, error in parsed:
+            if error:
+                record_error(row_number, error)
+                continue
+            if row.account_id not in balances:
+                record_error(row_number, "Account not found or does not belong to you")
+                continue
+            
+            batch_start_balances.setdefault(row.account_id, balances[row.account_id])
+            values = row.model_dump()
+            values["starting_balance"] = balances[row.account_id]
+            values["user_id"] = current_user.id
+            balances[row.account_id] = row.ending_balance
+            first_dates[row.account_id] = min(first_dates.get(row.account_id, row.date), row.date)
+            
+            batch.append(values)
+            batch_rows.append(row_number)
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                await flush_batch()
+    
+    await flush_batch()
+    
+    # Rows may be dated before existing entries or out of order: rechain each
+    # account from its earliest imported date, which also moves its balance
+    # to the end of the chain. Accounts are locked in id order
+    if first_dates:
+        for account_id, from_date in sorted(first_dates.items()):
+            await recompute_balance_chain(
+                db, account_id, current_user.id, from_date, 0,
+                inclusive=True, reason=DAILY_BOOK_IMPORT
+            )
+        await bump_versions(db, current_user.id, ACCOUNTS, TRADING_DAILY_BOOKS)
+        await db.commit()
+    
+    return {"imported": imported, "failed": failed, "errors": errors}
+
+@router.get(
+    "/{book_id}",
+    response_model=TradingDailyBookSchema,
+    dependencies=[conditional_get(TRADING_DAILY_BOOKS)]
+)
+async def get_trading_daily_book(
     book_id: int,
+    response: Response,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. date,result"),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get trading daily book by ID"""
-    book = db.query(TradingDailyBook).filter(
-        TradingDailyBook.id == book_id, TradingDailyBook.user_id == current_user.id
-    ).first()
+    """Get trading daily book by ID, optionally only the given fields"""
+    selected = parse_fields(fields, TradingDailyBookSchema)
+    query = daily_book_query(current_user.id, book_id)
+    if selected is not None:
+        query = query.with_only_columns(*schema_columns(TradingDailyBookSchema, TradingDailyBook, selected))
+    
+    result = await db.execute(query)
+    book = result.first() if selected is not None else result.scalars().first()
     
     if not book:
         raise HTTPException(
@@ -56,19 +305,20 @@ def get_trading_daily_book(
             detail="Trading daily book entry not found"
         )
     
+    if selected is not None:
+        return fast_item_response(TradingDailyBookSchema, book, response, selected)
     return book
 
 @router.post("/", response_model=TradingDailyBookSchema, status_code=status.HTTP_201_CREATED)
-def create_trading_daily_book(
+async def create_trading_daily_book(
     book_data: TradingDailyBookCreate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new trading daily book entry and update account balance"""
-    # Verify account exists and belongs to user
-    account = db.query(Account).filter(
-        Account.id == book_data.account_id, Account.user_id == current_user.id
-    ).first()
+    # Verify account exists and belongs to user, and lock it so concurrent
+    # entries chain their balances one after another
+    account = await lock_account(db, book_data.account_id, current_user.id)
     
     if not account:
         raise HTTPException(
@@ -98,27 +348,36 @@ def create_trading_daily_book(
     )
     
     db.add(db_book)
+    await db.flush()
     
     # Update the account balance to match the ending balance
-    account.account_balance = book_data.ending_balance
+    set_account_balance(db, account, book_data.ending_balance, DAILY_BOOK_CREATED, db_book.id)
+    
+    # Keep the account summaries in step within the same transaction
+    await refresh_summaries(db, [book_month_key(book_data.account_id, book_data.date)])
     
-    db.commit()
-    db.refresh(db_book)
+    await bump_versions(db, current_user.id, ACCOUNTS, TRADING_DAILY_BOOKS)
+    await db.commit()
+    await db.refresh(db_book)
     
     return db_book
 
 @router.put("/{book_id}", response_model=TradingDailyBookSchema)
-def update_trading_daily_book(
+async def update_trading_daily_book(
     book_id: int,
     book_data: TradingDailyBookUpdate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Update an existing trading daily book entry and account balance if needed"""
+    """
+    Update an existing trading daily book entry. When its balance, date or
+    account changes, the balance chain of the later entries is recomputed
+    and the account balance reset to the latest entry.
+    """
     # Get the existing book entry
-    book = db.query(TradingDailyBook).filter(
-        TradingDailyBook.id == book_id, TradingDailyBook.user_id == current_user.id
-    ).first()
+    # Entries of an account pending deletion can no longer be changed
+    result = await db.execute(writable_daily_book_query(current_user.id, book_id))
+    book = result.scalars().first()
     
     if not book:
         raise HTTPException(
@@ -129,14 +388,16 @@ def update_trading_daily_book(
     # Check if account is changing
     account_changing = book_data.account_id is not None and book_data.account_id != book.account_id
     
+    # Check if date is changing
+    date_changing = book_data.date is not None and book_data.date != book.date
+    
     # Check if ending balance is changing
     balance_changing = book_data.ending_balance is not None and book_data.ending_balance != book.ending_balance
     
     # If account is changing, verify new account exists and belongs to user
     if account_changing:
-        new_account = db.query(Account).filter(
-            Account.id == book_data.account_id, Account.user_id == current_user.id
-        ).first()
+        result = await db.execute(account_query(current_user.id, book_data.account_id))
+        new_account = result.scalars().first()
         
         if not new_account:
             raise HTTPException(
@@ -144,34 +405,63 @@ def update_trading_daily_book(
                 detail="New account not found or does not belong to you"
             )
     
+    previous_account_id = book.account_id
+    previous_date = book.date
+    
     # Update book entry fields
     for key, value in book_data.dict(exclude_unset=True).items():
         setattr(book, key, value)
     
-    # If ending balance is changing, update the account balance
-    if balance_changing or account_changing:
-        # Get current account
-        account = db.query(Account).filter(Account.id == book.account_id).first()
-        
-        if account:
-            # Update account balance
-            account.account_balance = book_data.ending_balance or book.ending_balance
+    # A moved entry whose ending balance was also edited keeps that balance
+    keep_ending = book.ending_balance if balance_changing else None
     
-    db.commit()
-    db.refresh(book)
+    if account_changing:
+        # Rechain both accounts from where the entry left and where it landed,
+        # locking them in id order to avoid deadlocks
+        for account_id, from_date in sorted([
+            (previous_account_id, previous_date), (book.account_id, book.date)
+        ]):
+            await recompute_balance_chain(
+                db, account_id, current_user.id, from_date, book.id,
+                inclusive=True, reason=DAILY_BOOK_UPDATED, book_id=book.id,
+                buckets=[book_month_key(account_id, from_date)],
+                keep_ending=keep_ending if account_id == book.account_id else None
+            )
+    elif date_changing:
+        # The month the entry left may lie after everything still in the chain
+        await recompute_balance_chain(
+            db, book.account_id, current_user.id, min(previous_date, book.date), book.id,
+            inclusive=True, reason=DAILY_BOOK_UPDATED, book_id=book.id,
+            buckets=[book_month_key(book.account_id, previous_date), book_month_key(book.account_id, book.date)],
+            keep_ending=keep_ending
+        )
+    elif balance_changing:
+        # The edited entry keeps its new ending balance; later entries follow it
+        await recompute_balance_chain(
+            db, book.account_id, current_user.id, book.date, book.id,
+            inclusive=False, reason=DAILY_BOOK_UPDATED, book_id=book.id,
+            buckets=[book_month_key(book.account_id, book.date)]
+        )
+    else:
+        # Nothing moved in the chain; only this entry's month changes
+        await refresh_summaries(db, [book_month_key(book.account_id, book.date)])
+    
+    await bump_versions(db, current_user.id, ACCOUNTS, TRADING_DAILY_BOOKS)
+    await db.commit()
+    await db.refresh(book)
     
     return book
 
 @router.delete("/{book_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_trading_daily_book(
+async def delete_trading_daily_book(
     book_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Delete a trading daily book entry"""
-    book = db.query(TradingDailyBook).filter(
-        TradingDailyBook.id == book_id, TradingDailyBook.user_id == current_user.id
-    ).first()
+    """Delete a trading daily book entry and rechain the entries after it"""
+    # Entries of an account pending deletion can no longer be changed
+    result = await db.execute(writable_daily_book_query(current_user.id, book_id))
+    book = result.scalars().first()
     
     if not book:
         raise HTTPException(
@@ -179,7 +469,15 @@ def delete_trading_daily_book(
             detail="Trading daily book entry not found"
         )
     
-    db.delete(book)
-    db.commit()
+    account_id, book_date = book.account_id, book.date
+    
+    await db.delete(book)
+    await recompute_balance_chain(
+        db, account_id, current_user.id, book_date, book_id,
+        inclusive=True, reason=DAILY_BOOK_DELETED, book_id=book_id,
+        buckets=[book_month_key(account_id, book_date)]
+    )
+    await bump_versions(db, current_user.id, ACCOUNTS, TRADING_DAILY_BOOKS)
+    await db.commit()
     
     return None
@@ -1,35 +1,217 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from datetime import date
 
 from app.database.database import get_db
-from app.models.schemas import TradingPlan as TradingPlanSchema, TradingPlanCreate, TradingPlanUpdate
+from app.models.schemas import (
+    TradingPlan as TradingPlanSchema,
+    TradingPlanCreate,
+    TradingPlanUpdate,
+    SizingRequest,
+    SizingResult,
+    Instrument,
+    PlanProjectionRequest,
+    PlanProjection,
+    TargetMode
+)
 from app.models.trading_plan import TradingPlan
 from app.utils.auth import get_current_active_user
 from app.models.user import User
+from app.utils.etags import TRADING_PLANS, bump_versions, conditional_get
+from app.utils.export import streaming_export
+from app.utils.queries import trading_plan_query, trading_plans_export_query, trading_plans_query
+from app.utils.serialization import (
+    FAST_LIST_RESPONSES,
+    fast_item_response,
+    fast_list_response,
+    parse_fields,
+    schema_columns
+)
+from app.utils.sizing import (
+    INSTRUMENTS,
+    compute_sizing,
+    normalize_instrument,
+    project_plans,
+    unknown_instruments
+)
 
 router = APIRouter(prefix="/trading-plans", tags=["trading plans"])
 
-@router.get("/", response_model=List[TradingPlanSchema])
-def get_trading_plans(
+# Columns written by the export endpoint, in file order
+EXPORT_COLUMNS = (
+    "id", "plan_date", "day", "account_balance", "daily_target", "required_lots",
+    "rounded_lots", "risk_amount", "risk_percentage", "sl_pips", "tp_pips",
+    "status", "reason",
+)
+
+SIZING_FIELDS = ("required_lots", "rounded_lots", "risk_amount", "risk_percentage")
+
+def _check_instruments(symbols):
+    unknown = unknown_instruments(symbols)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown instrument(s): {', '.join(unknown)}"
+        )
+
+def _plan_values(plan_data, derive: bool, instrument: Optional[str]):
+    """Plan column values, with the sizing fields computed server-side when asked or missing"""
+    values = plan_data.dict()
+    if derive or any(values[field] is None for field in SIZING_FIELDS):
+        _check_instruments([instrument])
+        sizing = compute_sizing(
+            [values["account_balance"]],
+            [values["daily_target"]],
+            [values["tp_pips"]],
+            [values["sl_pips"]],
+            risk_amount=[values["risk_amount"]],
+            instruments=[instrument],
+        )
+        for field in SIZING_FIELDS:
+            values[field] = float(sizing[field][0])
+    return values
+
+@router.get("/", response_model=List[TradingPlanSchema], dependencies=[conditional_get(TRADING_PLANS)])
+async def get_trading_plans(
+    response: Response,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. plan_date,status"),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get all trading plans for the current user"""
-    trading_plans = db.query(TradingPlan).filter(TradingPlan.user_id == current_user.id).all()
+    """Get all trading plans for the current user, optionally only the given fields"""
+    selected = parse_fields(fields, TradingPlanSchema)
+    query = trading_plans_query(current_user.id)
+    
+    # Column rows encoded straight to JSON, without ORM instances
+    if FAST_LIST_RESPONSES or selected is not None:
+        rows = await db.execute(query.with_only_columns(
+            *schema_columns(TradingPlanSchema, TradingPlan, selected)
+        ))
+        return fast_list_response(TradingPlanSchema, rows.all(), response, selected)
+    
+    result = await db.execute(query)
+    trading_plans = result.scalars().all()
     return trading_plans
 
-@router.get("/{plan_id}", response_model=TradingPlanSchema)
-def get_trading_plan(
+@router.get("/export")
+async def export_trading_plans(
+    file_format: str = Query("csv", alias="format", pattern="^(csv|ndjson)$"),
+    from_date: Optional[date] = Query(None, alias="from"),
+    to_date: Optional[date] = Query(None, alias="to"),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Stream all trading plans of the current user as CSV or NDJSON"""
+    query = trading_plans_export_query(current_user.id, EXPORT_COLUMNS, from_date, to_date)
+    return streaming_export(query, EXPORT_COLUMNS, file_format, "trading-plans")
+
+@router.get("/instruments", response_model=List[Instrument])
+async def get_instruments(current_user: User = Depends(get_current_active_user)):
+    """List the instruments and pip values known to the sizing engine"""
+    return [
+        {
+            "symbol": symbol,
+            "contract_size": spec.contract_size,
+            "pip_size": spec.pip_size,
+            "pip_value": spec.pip_value,
+            "lot_step": spec.lot_step,
+        }
+        for symbol, spec in INSTRUMENTS.items()
+    ]
+
+@router.post("/sizing", response_model=List[SizingResult])
+async def size_positions(
+    sizing_request: SizingRequest,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Compute lot sizes and risk for a batch of scenarios in one vectorized pass"""
+    scenarios = sizing_request.scenarios
+    if not scenarios:
+        return []
+    _check_instruments([scenario.instrument for scenario in scenarios])
+    
+    sizing = compute_sizing(
+        [scenario.account_balance for scenario in scenarios],
+        [scenario.daily_target for scenario in scenarios],
+        [scenario.tp_pips for scenario in scenarios],
+        [scenario.sl_pips for scenario in scenarios],
+        risk_amount=[scenario.risk_amount for scenario in scenarios],
+        instruments=[scenario.instrument for scenario in scenarios],
+    )
+    columns = {name: values.tolist() for name, values in sizing.items()}
+    return [
+        {
+            "instrument": normalize_instrument(scenario.instrument),
+            **{name: values[index] for name, values in columns.items()},
+        }
+        for index, scenario in enumerate(scenarios)
+    ]
+
+@router.post("/projection", response_model=PlanProjection)
+async def project_trading_plans(
+    projection: PlanProjectionRequest,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Project a horizon of daily trading plans from a starting balance, with a
+    fixed or compounding daily target. With save=true every plan is inserted
+    in one bulk statement and one transaction.
+    """
+    _check_instruments([projection.instrument])
+    
+    columns = project_plans(
+        account_balance=projection.account_balance,
+        start_date=projection.start_date,
+        days=projection.days,
+        daily_target=projection.daily_target,
+        compounding=projection.target_mode == TargetMode.PERCENT,
+        risk_percentage=projection.risk_percentage,
+        sl_pips=projection.sl_pips,
+        tp_pips=projection.tp_pips,
+        instrument=projection.instrument,
+        trading_days_only=projection.trading_days_only,
+    )
+    
+    plan_fields = ("plan_date", "day", "account_balance", "daily_target", *SIZING_FIELDS)
+    values = {field: columns[field].tolist() for field in plan_fields}
+    plans = [
+        {
+            **{field: values[field][index] for field in plan_fields},
+            "sl_pips": projection.sl_pips,
+            "tp_pips": projection.tp_pips,
+            "status": False,
+        }
+        for index in range(projection.days)
+    ]
+    
+    if projection.save:
+        await db.execute(insert(TradingPlan), [
+            {**plan, "user_id": current_user.id} for plan in plans
+        ])
+        await bump_versions(db, current_user.id, TRADING_PLANS)
+        await db.commit()
+    
+    final_balance = plans[-1]["account_balance"] + plans[-1]["daily_target"]
+    return {"saved": projection.save, "final_balance": round(final_balance, 2), "plans": plans}
+
+@router.get("/{plan_id}", response_model=TradingPlanSchema, dependencies=[conditional_get(TRADING_PLANS)])
+async def get_trading_plan(
     plan_id: int,
+    response: Response,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. plan_date,status"),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get trading plan by ID"""
-    plan = db.query(TradingPlan).filter(
-        TradingPlan.id == plan_id, TradingPlan.user_id == current_user.id
-    ).first()
+    """Get trading plan by ID, optionally only the given fields"""
+    selected = parse_fields(fields, TradingPlanSchema)
+    query = trading_plan_query(current_user.id, plan_id)
+    if selected is not None:
+        query = query.with_only_columns(*schema_columns(TradingPlanSchema, TradingPlan, selected))
+    
+    result = await db.execute(query)
+    plan = result.first() if selected is not None else result.scalars().first()
     
     if not plan:
         raise HTTPException(
@@ -37,37 +219,47 @@ def get_trading_plan(
             detail="Trading plan not found"
         )
     
+    if selected is not None:
+        return fast_item_response(TradingPlanSchema, plan, response, selected)
     return plan
 
 @router.post("/", response_model=TradingPlanSchema, status_code=status.HTTP_201_CREATED)
-def create_trading_plan(
+async def create_trading_plan(
     plan_data: TradingPlanCreate,
+    derive: bool = False,
+    instrument: Optional[str] = None,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Create a new trading plan"""
+    """
+    Create a new trading plan.
+    Lot sizes and risk are derived server-side when derive=true or when the
+    client leaves them out.
+    """
     db_plan = TradingPlan(
-        **plan_data.dict(),
+        **_plan_values(plan_data, derive, instrument),
         user_id=current_user.id
     )
     
     db.add(db_plan)
-    db.commit()
-    db.refresh(db_plan)
+    await bump_versions(db, current_user.id, TRADING_PLANS)
+    await db.commit()
+    await db.refresh(db_plan)
     
     return db_plan
 
 @router.put("/{plan_id}", response_model=TradingPlanSchema)
-def update_trading_plan(
+async def update_trading_plan(
     plan_id: int,
     plan_data: TradingPlanUpdate,
+    derive: bool = False,
+    instrument: Optional[str] = None,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Update an existing trading plan"""
-    plan = db.query(TradingPlan).filter(
-        TradingPlan.id == plan_id, TradingPlan.user_id == current_user.id
-    ).first()
+    """Update an existing trading plan, optionally re-deriving lot sizes and risk"""
+    result = await db.execute(trading_plan_query(current_user.id, plan_id))
+    plan = result.scalars().first()
     
     if not plan:
         raise HTTPException(
@@ -76,24 +268,24 @@ def update_trading_plan(
         )
     
     # Update plan fields
-    for key, value in plan_data.dict().items():
+    for key, value in _plan_values(plan_data, derive, instrument).items():
         setattr(plan, key, value)
     
-    db.commit()
-    db.refresh(plan)
+    await bump_versions(db, current_user.id, TRADING_PLANS)
+    await db.commit()
+    await db.refresh(plan)
     
     return plan
 
 @router.delete("/{plan_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_trading_plan(
+async def delete_trading_plan(
     plan_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete a trading plan"""
-    plan = db.query(TradingPlan).filter(
-        TradingPlan.id == plan_id, TradingPlan.user_id == current_user.id
-    ).first()
+    result = await db.execute(trading_plan_query(current_user.id, plan_id))
+    plan = result.scalars().first()
     
     if not plan:
         raise HTTPException(
@@ -101,21 +293,21 @@ def delete_trading_plan(
             detail="Trading plan not found"
         )
     
-    db.delete(plan)
-    db.commit()
+    await db.delete(plan)
+    await bump_versions(db, current_user.id, TRADING_PLANS)
+    await db.commit()
     
     return None
 
 @router.patch("/{plan_id}/toggle-status", response_model=TradingPlanSchema)
-def toggle_plan_status(
+async def toggle_plan_status(
     plan_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Toggle the status of a trading plan (pending/done)"""
-    plan = db.query(TradingPlan).filter(
-        TradingPlan.id == plan_id, TradingPlan.user_id == current_user.id
-    ).first()
+    result = await db.execute(trading_plan_query(current_user.id, plan_id))
+    plan = result.scalars().first()
     
     if not plan:
         raise HTTPException(
@@ -126,7 +318,8 @@ def toggle_plan_status(
     # Toggle status
     plan.status = not plan.status
     
-    db.commit()
-    db.refresh(plan)
+    await bump_versions(db, current_user.id, TRADING_PLANS)
+    await db.commit()
+    await db.refresh(plan)
     
     return plan
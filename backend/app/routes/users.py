@@ -1,7 +1,5 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
 
-from app.database.database import get_db
 from app.models.schemas import User as UserSchema
 from app.utils.auth import get_current_active_user
 
@@ -0,0 +1,111 @@
+from typing import Dict, Sequence
+
+import numpy as np
+
+from app.models.trading_daily_book import TradingResult
+
+# Results that count as an actual trading day for the win rate
+TRADED_RESULTS = (
+    TradingResult.PROFIT_OVERALL,
+    TradingResult.LOSS_OVERALL,
+    TradingResult.LIQUIDATED,
+    TradingResult.BREAKEVEN,
+)
+_RESULT_ORDER = list(TradingResult)
+_RESULT_INDEX = {result: index for index, result in enumerate(_RESULT_ORDER)}
+_WIN_INDEX = _RESULT_INDEX[TradingResult.PROFIT_OVERALL]
+_TRADED_MASK = np.array([result in TRADED_RESULTS for result in _RESULT_ORDER])
+
+def daily_pnl(starting: np.ndarray, ending: np.ndarray, withdraw: np.ndarray) -> np.ndarray:
+    """Per-day profit/loss, using the same definition as the frontend"""
+    return ending - starting - withdraw
+
+def empty_performance() -> Dict:
+    """Statistics for an account without any daily books"""
+    return {
+        "entries": 0,
+        "net_pnl": 0.0,
+        "total_withdrawals": 0.0,
+        "max_drawdown": 0.0,
+        "max_drawdown_pct": 0.0,
+        "win_rate": 0.0,
+        "results": {result: 0 for result in _RESULT_ORDER},
+        "average_daily_return": 0.0,
+        "equity_curve": [],
+    }
+
+def account_performance(rows: Sequence[tuple], include_curve: bool = True) -> Dict[int, Dict]:
+    """
+    Compute equity curves and summary statistics per account.
+
+    rows must be (account_id, date, starting_balance, ending_balance,
+    withdraw, result) tuples ordered by account_id, date, id. All
+    arithmetic runs column-wise in NumPy; Python only loops per account.
+    """
+    if not rows:
+        return {}
+
+    account_ids, dates, starting, ending, withdraw, results = zip(*rows)
+    account_ids = np.asarray(account_ids, dtype=np.int64)
+    starting = np.nan_to_num(np.asarray(starting, dtype=np.float64))
+    ending = np.nan_to_num(np.asarray(ending, dtype=np.float64))
+    withdraw = np.nan_to_num(np.asarray(withdraw, dtype=np.float64))
+    result_codes = np.fromiter(
+        (_RESULT_INDEX.get(result, _RESULT_INDEX[TradingResult.NO_RESULT]) for result in results),
+        dtype=np.int64,
+        count=len(results),
+    )
+
+    pnl = daily_pnl(starting, ending, withdraw)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = np.where(starting > 0, pnl / starting, np.nan)
+
+    # Segment boundaries of each account in the sorted columns
+    starts = np.flatnonzero(np.r_[True, account_ids[1:] != account_ids[:-1]])
+    ends = np.r_[starts[1:], len(account_ids)]
+
+    # Result counts for every account at once
+    segment_index = np.repeat(np.arange(len(starts)), ends - starts)
+    counts = np.zeros((len(starts), len(_RESULT_ORDER)), dtype=np.int64)
+    np.add.at(counts, (segment_index, result_codes), 1)
+
+    net_pnl = np.add.reduceat(pnl, starts)
+    total_withdrawals = np.add.reduceat(withdraw, starts)
+
+    performance = {}
+    for segment, (start, end) in enumerate(zip(starts, ends)):
+        # Equity excludes withdrawals so taking money out is not a drawdown
+        cumulative = np.cumsum(pnl[start:end])
+        equity = starting[start] + cumulative
+        peaks = np.maximum.accumulate(np.r_[starting[start], equity])[1:]
+        drawdowns = peaks - equity
+        worst = int(np.argmax(drawdowns))
+        max_drawdown = float(drawdowns[worst])
+        max_drawdown_pct = float(max_drawdown / peaks[worst] * 100) if peaks[worst] > 0 else 0.0
+
+        segment_counts = counts[segment]
+        traded = int(segment_counts[_TRADED_MASK].sum())
+        segment_returns = returns[start:end]
+        valid_returns = segment_returns[~np.isnan(segment_returns)]
+
+        entry = {
+            "entries": int(end - start),
+            "net_pnl": float(net_pnl[segment]),
+            "total_withdrawals": float(total_withdrawals[segment]),
+            "max_drawdown": max_drawdown,
+            "max_drawdown_pct": max_drawdown_pct,
+            "win_rate": float(segment_counts[_WIN_INDEX] / traded * 100) if traded else 0.0,
+            "results": dict(zip(_RESULT_ORDER, segment_counts.tolist())),
+            "average_daily_return": float(valid_returns.mean() * 100) if valid_returns.size else 0.0,
+            "equity_curve": [],
+        }
+        if include_curve:
+            entry["equity_curve"] = [
+                {"date": day, "balance": balance, "cumulative_pnl": total}
+                for day, balance, total in zip(
+                    dates[start:end], ending[start:end].tolist(), cumulative.tolist()
+                )
+            ]
+        performance[int(account_ids[start])] = entry
+
+    return performance
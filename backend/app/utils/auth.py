@@ -1,14 +1,21 @@
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
+import os
+import time
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
 
 from app.models.schemas import TokenData
 from app.models.user import User
 from app.database.database import get_db
+from app.utils.cache import TTLCache
+from app.utils.hashing import run_password_job
 
 # Secret key for JWT token
 # In production, this should be stored securely and not in the code
@@ -16,31 +23,104 @@ SECRET_KEY = "09d25e094faa6ca2556c818166b7a9563b93f7099f6f0f4caa6cf63b88e8d3e7"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Comma-separated emails allowed to use the /admin endpoints
+ADMIN_EMAILS = {
+    email.strip().lower() for email in os.getenv("ADMIN_EMAILS", "").split(",") if email.strip()
+}
+
+# bcrypt cost factor; hashes below it are upgraded the next time the user logs in
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
 # Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+)
 
 # OAuth2 scheme for token authentication
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
+# Cache of validated tokens -> resolved principal, so authenticated requests
+# can skip both the JWT decode and the users table lookup
+AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "60"))
+AUTH_CACHE_MAX_SIZE = int(os.getenv("AUTH_CACHE_MAX_SIZE", "4096"))
+principal_cache = TTLCache(max_size=AUTH_CACHE_MAX_SIZE, ttl=AUTH_CACHE_TTL_SECONDS)
+
+@dataclass(frozen=True)
+class AuthenticatedUser:
+    """Detached snapshot of the user behind a token"""
+    id: int
+    email: str
+    username: str
+    is_active: bool
+
+# Drop every cached token belonging to a user
+def invalidate_user_cache(user_id: int):
+    return principal_cache.delete_where(lambda token, principal: principal.id == user_id)
+
+# Users changed in a session's open transaction, keyed in Session.info
+_CHANGED_USERS = "changed_user_ids"
+
+# Remember every user row updated or deleted by a flush...
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _record_user_change(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_CHANGED_USERS, set()).add(target.id)
+
+# ...and drop their tokens only once the change is committed; invalidating
+# at flush would let a concurrent request re-cache the old row before commit
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session):
+    for user_id in session.info.pop(_CHANGED_USERS, ()):
+        invalidate_user_cache(user_id)
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_users(session):
+    session.info.pop(_CHANGED_USERS, None)
+
 # Verify password
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
+# Verify password and return a replacement hash if the stored one is outdated
+def verify_and_update_password(plain_password, hashed_password):
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
 # Hash password
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+# Hash password in the dedicated bcrypt pool
+async def hash_password_async(password):
+    return await run_password_job(get_password_hash, password)
+
+def user_by_email_query(email: str):
+    return select(User).filter(User.email == email)
+
 # Get user by username
-def get_user_by_email(db: Session, email: str):
-    return db.query(User).filter(User.email == email).first()
+async def get_user_by_email(db: AsyncSession, email: str):
+    result = await db.execute(user_by_email_query(email))
+    return result.scalars().first()
 
 # Authenticate user
-def authenticate_user(db: Session, email: str, password: str):
-    user = get_user_by_email(db, email)
+async def authenticate_user(db: AsyncSession, email: str, password: str):
+    user = await get_user_by_email(db, email)
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    # bcrypt is CPU-bound; keep it off the event loop
+    verified, new_hash = await run_password_job(
+        verify_and_update_password, password, user.hashed_password
+    )
+    if not verified:
         return False
+    # Transparently re-hash with the current cost factor
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
     return user
 
 # Create access token
@@ -55,7 +135,11 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 # Get current user from token
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
+    cached = principal_cache.get(token)
+    if cached is not None:
+        return cached
+    
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -69,13 +153,26 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         token_data = TokenData(username=username)
     except JWTError:
         raise credentials_exception
-    user = db.query(User).filter(User.email == token_data.username).first()
+    user = await get_user_by_email(db, token_data.username)
     if user is None:
         raise credentials_exception
-    return user
+    
+    principal = AuthenticatedUser(
+        id=user.id, email=user.email, username=user.username, is_active=user.is_active
+    )
+    # Never serve a cached principal past the token's own expiry
+    expires_in = payload["exp"] - time.time() if "exp" in payload else None
+    principal_cache.set(token, principal, ttl=expires_in)
+    return principal
 
 # Get current active user
-async def get_current_active_user(current_user: User = Depends(get_current_user)):
+async def get_current_active_user(current_user: AuthenticatedUser = Depends(get_current_user)):
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
+
+# Get current active user, requiring them to be listed in ADMIN_EMAILS
+async def get_current_admin_user(current_user: AuthenticatedUser = Depends(get_current_active_user)):
+    if current_user.email.lower() not in ADMIN_EMAILS:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return current_user
@@ -0,0 +1,124 @@
+from datetime import date
+from typing import Iterable, Optional, Tuple
+
+from sqlalchemy import func, literal, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+from app.models.trading_daily_book import TradingDailyBook
+from app.utils.ledger import lock_account, set_account_balance
+from app.utils.summaries import month_start, next_month, refresh_summaries
+
+def _chain_bounds(from_date: date, from_id: int, inclusive: bool):
+    """(before, after) conditions splitting the chain at a (date, id) position"""
+    position = tuple_(TradingDailyBook.date, TradingDailyBook.id)
+    start = tuple_(literal(from_date, type_=TradingDailyBook.date.type), literal(from_id))
+    return (position < start, position >= start) if inclusive else (position <= start, position > start)
+
+def chain_anchor_query(account_id: int, from_date: date, from_id: int, inclusive: bool) -> Select:
+    """Ending balance of the latest entry before the rechained ones"""
+    before, _ = _chain_bounds(from_date, from_id, inclusive)
+    return (
+        select(TradingDailyBook.ending_balance)
+        .where(TradingDailyBook.account_id == account_id, before)
+        .order_by(TradingDailyBook.date.desc(), TradingDailyBook.id.desc())
+        .limit(1)
+    )
+
+async def _rechain(db: AsyncSession, account_id: int, from_date: date, from_id: int, inclusive: bool):
+    """One set-based UPDATE chaining the entries after (or from) a position"""
+    book = TradingDailyBook
+    ordering = (book.date, book.id)
+    _, after = _chain_bounds(from_date, from_id, inclusive)
+    anchor_balance = await db.scalar(chain_anchor_query(account_id, from_date, from_id, inclusive))
+
+    change = book.ending_balance - book.starting_balance
+    running_change = func.sum(change).over(order_by=ordering, rows=(None, 0))
+    if anchor_balance is None:
+        # Nothing earlier to chain from: the first entry keeps its starting balance
+        base = func.first_value(book.starting_balance).over(order_by=ordering)
+    else:
+        base = literal(anchor_balance)
+
+    chain = select(
+        book.id.label("id"),
+        (base + running_change).label("ending_balance"),
+        change.label("change"),
+    ).where(book.account_id == account_id, after).subquery()
+
+    await db.execute(
+        update(book)
+        .where(book.id == chain.c.id)
+        .values(
+            starting_balance=chain.c.ending_balance - chain.c.change,
+            ending_balance=chain.c.ending_balance,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+async def recompute_balance_chain(
+    db: AsyncSession,
+    account_id: int,
+    user_id: int,
+    from_date: date,
+    from_id: int,
+    inclusive: bool,
+    reason: str,
+    book_id: Optional[int] = None,
+    buckets: Iterable[Optional[Tuple[int, date]]] = (),
+    keep_ending: Optional[float] = None,
+) -> bool:
+    """
+    Restore starting/ending balance continuity for every entry of an account
+    after the position (from_date, from_id), or from it when inclusive.
+
+    Each rechained entry keeps its own daily change (ending - starting) and
+    starts where the previous entry ended, computed with one set-based
+    UPDATE over a window SUM. With keep_ending, entry book_id instead keeps
+    that ending balance: only its starting balance follows the chain, and
+    the entries after it chain from it. The account balance is then reset
+    to the latest entry and the summaries of the shifted months are
+    refreshed, together with the extra (account_id, month) buckets the
+    caller passes for the months an entry left or landed in. Runs inside
+    the caller's transaction; returns False if the account is gone.
+    """
+    account = await lock_account(db, account_id, user_id)
+    if account is None:
+        return False
+    await db.flush()
+
+    book = TradingDailyBook
+    await _rechain(db, account_id, from_date, from_id, inclusive)
+
+    if keep_ending is not None and book_id is not None:
+        pinned_date = await db.scalar(
+            update(book)
+            .where(book.id == book_id, book.account_id == account_id)
+            .values(ending_balance=keep_ending)
+            .returning(book.date)
+            .execution_options(synchronize_session=False)
+        )
+        if pinned_date is not None:
+            await _rechain(db, account_id, pinned_date, book_id, inclusive=False)
+
+    latest_balance, last_date = (await db.execute(
+        select(book.ending_balance, book.date)
+        .where(book.account_id == account_id)
+        .order_by(book.date.desc(), book.id.desc())
+        .limit(1)
+    )).first() or (None, None)
+
+    if latest_balance is not None and latest_balance != account.account_balance:
+        set_account_balance(db, account, latest_balance, reason, book_id)
+
+    # Peak balances of every shifted month may have moved; the month of
+    # from_date changed even when nothing after it is left to shift
+    months = {(account_id, month_start(from_date)), *buckets}
+    if last_date is not None and last_date >= from_date:
+        month = month_start(from_date)
+        while month <= last_date:
+            months.add((account_id, month))
+            month = next_month(month)
+    await refresh_summaries(db, months)
+
+    return True
@@ -0,0 +1,169 @@
+import os
+import zlib
+from typing import Optional
+
+try:
+    import brotli
+except ImportError:  # Optional; responses fall back to gzip without it
+    brotli = None
+
+from app.utils.config import env_bool
+
+# Set COMPRESSION_ENABLED=false when a proxy in front already compresses
+COMPRESSION_ENABLED = env_bool("COMPRESSION_ENABLED", "true")
+
+# Responses smaller than this are sent as they are; streamed ones always compress
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+
+# Low levels: these are dynamic responses, compressed on every request
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+COMPRESSIBLE_TYPES = (
+    "text/", "application/json", "application/x-ndjson", "application/javascript", "application/xml",
+)
+
+def _supported_encodings():
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Best supported coding in an Accept-Encoding value, preferring br over
+    gzip at equal weight; None when the client accepts neither.
+    """
+    weights = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        if coding:
+            weights[coding] = weight
+
+    best, best_weight = None, 0.0
+    for coding in _supported_encodings():
+        weight = weights.get(coding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+def encoded_etag(etag: str, coding: str) -> str:
+    """
+    Strong ETag of the encoded representation: a compressed body is a
+    different set of bytes, so it needs its own validator
+    """
+    if etag.startswith('"') and etag.endswith('"'):
+        return f'{etag[:-1]}-{coding}"'
+    return etag
+
+def strip_encoding(etag: str) -> str:
+    """The identity ETag an encoded_etag() came from"""
+    for coding in ("br", "gzip"):
+        suffix = f'-{coding}"'
+        if etag.endswith(suffix):
+            return etag[:-len(suffix)] + '"'
+    return etag
+
+class _Compressor:
+    def __init__(self, coding: str):
+        if coding == "br":
+            self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+            self._compress = self._compressor.process
+            self._flush = self._compressor.flush
+            self._finish = self._compressor.finish
+        else:
+            # wbits=31 writes a gzip header and trailer
+            self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+            self._compress = self._compressor.compress
+            self._flush = lambda: self._compressor.flush(zlib.Z_SYNC_FLUSH)
+            self._finish = self._compressor.flush
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        """
+        Compress one chunk. Streamed chunks are flushed so the client can
+        decode each one as it arrives instead of waiting for the end.
+        """
+        chunk = self._compress(data) if data else b""
+        if final:
+            return chunk + self._finish()
+        return chunk + self._flush() if data else chunk
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing JSON, NDJSON, CSV and text responses with the
+    best coding the client accepts (brotli when installed, else gzip). Whole
+    responses below COMPRESSION_MIN_SIZE are left alone; streamed responses
+    are compressed chunk by chunk. ETags get a per-coding suffix.
+    """
+
+    def __init__(self, app, min_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.min_size = min_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        coding = negotiate_encoding(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if coding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        compressor = None
+
+        async def send_wrapper(message):
+            nonlocal start, compressor
+            if message["type"] == "http.response.start":
+                # Held back until the first body chunk shows how big the response is
+                start = message
+                return
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                response_headers = dict(start.get("headers", []))
+                content_type = response_headers.get(b"content-type", b"").decode("latin-1")
+                compressible = (
+                    content_type.startswith(COMPRESSIBLE_TYPES)
+                    and b"content-encoding" not in response_headers
+                    and start["status"] not in (204, 304)
+                )
+                if not compressible or (not more_body and len(body) < self.min_size):
+                    if compressible:
+                        start["headers"] = [*start.get("headers", []), (b"vary", b"Accept-Encoding")]
+                    await send(start)
+                    start = None
+                    await send(message)
+                    return
+
+                compressor = _Compressor(coding)
+                start["headers"] = [
+                    (name, encoded_etag(value.decode("latin-1"), coding).encode("latin-1") if name == b"etag" else value)
+                    for name, value in start.get("headers", [])
+                    if name != b"content-length"
+                ] + [(b"content-encoding", coding.encode()), (b"vary", b"Accept-Encoding")]
+                if not more_body:
+                    body = compressor.compress(body, final=True)
+                    start["headers"].append((b"content-length", str(len(body)).encode()))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                await send(start)
+
+            chunk = compressor.compress(body, final=not more_body)
+            if chunk or not more_body:
+                await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
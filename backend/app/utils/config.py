@@ -0,0 +1,5 @@
+import os
+
+def env_bool(name: str, default: str) -> bool:
+    """Boolean setting from the environment; 1/true/yes/on (any case) are true"""
+    return os.getenv(name, default).strip().lower() in ("1", "true", "yes", "on")
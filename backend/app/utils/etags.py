@@ -0,0 +1,108 @@
+import hashlib
+from datetime import date
+from typing import Dict, Iterable, Optional
+
+from fastapi import Depends, HTTPException, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.database import get_db
+from app.models.collection_version import CollectionVersion
+from app.models.user import User
+from app.utils.auth import get_current_active_user
+from app.utils.compression import strip_encoding
+
+# Collections with their own version counter
+ACCOUNTS = "accounts"
+TRADING_PLANS = "trading_plans"
+TRADING_DAILY_BOOKS = "trading_daily_books"
+
+def month_collection(month: date) -> str:
+    """Counter of one calendar month of daily books, bumped by summary refreshes"""
+    return f"{TRADING_DAILY_BOOKS}:{month:%Y-%m}"
+
+# Clients must revalidate every time, but may reuse the body on a 304
+CACHE_CONTROL = "private, no-cache"
+
+async def bump_versions(db: AsyncSession, user_id: int, *collections: str):
+    """
+    Increment the user's version of each collection inside the caller's
+    transaction, so the new ETag becomes visible exactly when the write does.
+    Call it right before commit; the counter rows stay locked until then.
+    """
+    dialect = db.get_bind().dialect.name
+    insert = postgresql_insert if dialect == "postgresql" else sqlite_insert
+    # Always in the same order so concurrent writers cannot deadlock
+    for collection in sorted(set(collections)):
+        statement = insert(CollectionVersion).values(user_id=user_id, collection=collection, version=1)
+        await db.execute(statement.on_conflict_do_update(
+            index_elements=[CollectionVersion.user_id, CollectionVersion.collection],
+            set_={"version": CollectionVersion.version + 1},
+        ))
+
+async def get_versions(db: AsyncSession, user_id: int, collections: Iterable[str]) -> Dict[str, int]:
+    """Current version of each collection; never-written collections are at 0"""
+    collections = sorted(set(collections))
+    result = await db.execute(select(CollectionVersion.collection, CollectionVersion.version).filter(
+        CollectionVersion.user_id == user_id, CollectionVersion.collection.in_(collections)
+    ))
+    versions = dict.fromkeys(collections, 0)
+    versions.update(result.all())
+    return versions
+
+def compute_etag(request: Request, user_id: int, versions: Dict[str, int]) -> str:
+    """
+    Strong ETag of one representation: the same URL for the same user at
+    the same collection versions always renders the same bytes. Today's
+    date is included because some views default to it.
+    """
+    query = "&".join(sorted(f"{key}={value}" for key, value in request.query_params.multi_items()))
+    state = ",".join(f"{collection}:{version}" for collection, version in versions.items())
+    key = f"{user_id}|{request.url.path}?{query}|{state}|{date.today().isoformat()}"
+    return '"' + hashlib.sha256(key.encode()).hexdigest()[:32] + '"'
+
+def matching_etag(if_none_match: str, etag: str) -> Optional[str]:
+    """
+    The tag in an If-None-Match value that names this representation, or
+    None. Tags of compressed variants match their identity ETag.
+    """
+    if if_none_match.strip() == "*":
+        return etag
+    for candidate in if_none_match.split(","):
+        # Weak comparison, as RFC 9110 requires for If-None-Match
+        candidate = candidate.strip().removeprefix("W/")
+        if strip_encoding(candidate) == etag:
+            return candidate
+    return None
+
+def conditional_get(*collections: str):
+    """
+    Route dependency that sets a strong ETag from the versions of the
+    collections the route reads, and answers a matching If-None-Match with
+    304 after one primary-key lookup, before the route touches its tables.
+    """
+
+    async def check_etag(
+        request: Request,
+        response: Response,
+        current_user: User = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_db)
+    ):
+        versions = await get_versions(db, current_user.id, collections)
+        etag = compute_etag(request, current_user.id, versions)
+        headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+        if_none_match = request.headers.get("if-none-match")
+        matched = matching_etag(if_none_match, etag) if if_none_match else None
+        if matched is not None:
+            # Echo the tag of the variant the client holds, compressed or not
+            raise HTTPException(
+                status_code=status.HTTP_304_NOT_MODIFIED,
+                headers={**headers, "ETag": matched}
+            )
+
+        response.headers.update(headers)
+
+    return Depends(check_etag)
@@ -0,0 +1,65 @@
+import csv
+import enum
+import io
+import json
+from datetime import date
+from typing import AsyncIterator, Sequence
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy.sql import Select
+
+from app.database.database import AsyncSessionLocal
+
+# Rows fetched from the server-side cursor and encoded per chunk
+EXPORT_CHUNK_SIZE = 1000
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+def _plain(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+def _encode_csv(columns: Sequence[str], rows) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows([[_plain(value) for value in row] for row in rows])
+    return buffer.getvalue()
+
+def _encode_csv_header(columns: Sequence[str]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(columns)
+    return buffer.getvalue()
+
+def _encode_ndjson(columns: Sequence[str], rows) -> str:
+    return "".join(
+        json.dumps({column: _plain(value) for column, value in zip(columns, row)}) + "\n"
+        for row in rows
+    )
+
+async def _stream_rows(statement: Select, columns: Sequence[str], file_format: str) -> AsyncIterator[str]:
+    # The session lives as long as the response body, not the request handler
+    async with AsyncSessionLocal() as db:
+        if file_format == "csv":
+            # Send the header straight away so the client sees first bytes immediately
+            yield _encode_csv_header(columns)
+        encode = _encode_csv if file_format == "csv" else _encode_ndjson
+        result = await db.stream(statement.execution_options(yield_per=EXPORT_CHUNK_SIZE))
+        async for rows in result.partitions():
+            yield encode(columns, rows)
+
+def streaming_export(statement: Select, columns: Sequence[str], file_format: str, filename: str) -> StreamingResponse:
+    """
+    Stream the rows of a column-only SELECT as CSV or NDJSON, encoding and
+    flushing one server-side cursor chunk at a time so memory stays flat.
+    """
+    return StreamingResponse(
+        _stream_rows(statement, columns, file_format),
+        media_type=EXPORT_MEDIA_TYPES[file_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{file_format}"'},
+    )
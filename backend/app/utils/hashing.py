@@ -0,0 +1,54 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+from fastapi import HTTPException, status
+
+from app.utils.metrics import PASSWORD_HASH_TIME
+
+# bcrypt work runs in its own small pool so a burst of logins cannot starve
+# the threadpool that serves the rest of the API
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+
+# Maximum number of hashing jobs (running + waiting) before new ones are shed
+PASSWORD_HASH_QUEUE_LIMIT = int(os.getenv("PASSWORD_HASH_QUEUE_LIMIT", "32"))
+
+# Seconds clients are told to wait before retrying when the pool is full
+PASSWORD_HASH_RETRY_AFTER = os.getenv("PASSWORD_HASH_RETRY_AFTER", "1")
+
+_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
+_pending = 0
+_pending_lock = threading.Lock()
+
+def _release():
+    global _pending
+    with _pending_lock:
+        _pending -= 1
+
+# Run a password hashing function in the dedicated pool, failing fast when
+# the queue is already full
+async def run_password_job(func, *args):
+    global _pending
+    with _pending_lock:
+        if _pending >= PASSWORD_HASH_QUEUE_LIMIT:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication service is busy, please retry shortly",
+                headers={"Retry-After": PASSWORD_HASH_RETRY_AFTER},
+            )
+        _pending += 1
+    started = perf_counter()
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor, func, *args)
+    finally:
+        _release()
+        PASSWORD_HASH_TIME.observe(perf_counter() - started)
+
+# Current number of admitted hashing jobs
+def pending_password_jobs() -> int:
+    return _pending
@@ -0,0 +1,57 @@
+import csv
+import io
+import json
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+from pydantic import ValidationError
+
+from app.models.schemas import TradingDailyBookImportRow
+
+SUPPORTED_FORMATS = ("csv", "ndjson")
+
+def detect_format(filename: Optional[str], content_type: Optional[str]) -> Optional[str]:
+    """Guess the import format from the upload's file name or content type"""
+    name = (filename or "").lower()
+    content_type = (content_type or "").lower()
+    if name.endswith(".csv") or "csv" in content_type:
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl")) or "ndjson" in content_type or "jsonl" in content_type:
+        return "ndjson"
+    return None
+
+def _iter_raw_rows(file: BinaryIO, file_format: str) -> Iterator[Tuple[int, object]]:
+    """Yield (row number, raw record) pairs one at a time from the upload"""
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        if file_format == "csv":
+            for number, record in enumerate(csv.DictReader(text), start=1):
+                # Empty cells fall back to the schema defaults
+                yield number, {key: value for key, value in record.items() if key and value not in ("", None)}
+        else:
+            for number, line in enumerate(text, start=1):
+                if line.strip():
+                    yield number, line
+    finally:
+        # Leave the underlying upload open for its owner to close
+        text.detach()
+
+def _format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc']) or 'row'}: {detail['msg']}"
+        for detail in error.errors()
+    )
+
+def iter_import_rows(file: BinaryIO, file_format: str) -> Iterator[Tuple[int, Optional[TradingDailyBookImportRow], Optional[str]]]:
+    """
+    Parse and validate an uploaded CSV or NDJSON file row by row.
+    Yields (row number, parsed row, None) or (row number, None, error).
+    """
+    for number, raw in _iter_raw_rows(file, file_format):
+        try:
+            if file_format == "ndjson":
+                raw = json.loads(raw)
+            yield number, TradingDailyBookImportRow.model_validate(raw), None
+        except json.JSONDecodeError as e:
+            yield number, None, f"Invalid JSON: {e.msg}"
+        except ValidationError as e:
+            yield number, None, _format_validation_error(e)
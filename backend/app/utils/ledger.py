@@ -0,0 +1,49 @@
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.account import Account
+from app.models.balance_ledger import BalanceLedgerEntry
+
+# Ledger reasons
+ACCOUNT_OPENED = "account_opened"
+MANUAL_ADJUSTMENT = "manual_adjustment"
+DAILY_BOOK_CREATED = "daily_book_created"
+DAILY_BOOK_UPDATED = "daily_book_updated"
+DAILY_BOOK_DELETED = "daily_book_deleted"
+DAILY_BOOK_IMPORT = "daily_book_import"
+
+def _ledger_entry(account_id: int, user_id: int, delta: float, balance_after: float,
+                  reason: str, book_id: Optional[int]) -> BalanceLedgerEntry:
+    return BalanceLedgerEntry(
+        account_id=account_id,
+        user_id=user_id,
+        book_id=book_id,
+        delta=delta,
+        balance_after=balance_after,
+        reason=reason,
+    )
+
+async def lock_account(db: AsyncSession, account_id: int, user_id: int) -> Optional[Account]:
+    """
+    Load an account with a row lock held until the transaction ends, so
+    concurrent writers read-modify-write its balance one at a time.
+    Take it as late as possible to keep the critical section short.
+    Accounts pending deletion are not returned.
+    """
+    result = await db.execute(
+        select(Account).filter(
+            Account.id == account_id, Account.user_id == user_id, Account.pending_delete.is_(False)
+        )
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    return result.scalars().first()
+
+def set_account_balance(db: AsyncSession, account: Account, new_balance: float,
+                        reason: str, book_id: Optional[int] = None):
+    """Set the balance of an account locked with lock_account and record it in the ledger"""
+    delta = new_balance - (account.account_balance or 0.0)
+    account.account_balance = new_balance
+    db.add(_ledger_entry(account.id, account.user_id, delta, new_balance, reason, book_id))
@@ -0,0 +1,245 @@
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+from app.utils.config import env_bool
+
+# Set METRICS_ENABLED=false to drop the middleware, engine hooks and /metrics
+METRICS_ENABLED = env_bool("METRICS_ENABLED", "true")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Counter:
+    """Monotonic counter, optionally split by labels"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, labels: tuple = ()):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}{_labels(self.label_names, labels)} {value}"
+
+class Gauge(Counter):
+    """Value that can go up and down"""
+
+    kind = "gauge"
+
+    def set(self, value: float, labels: tuple = ()):
+        with self._lock:
+            self._values[labels] = value
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus exposition format"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float], labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.label_names = tuple(labels)
+        # labels -> [per-bucket counts (+Inf last), sum]
+        self._series: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, labels: tuple = ()):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def totals(self) -> Dict[tuple, Tuple[int, float]]:
+        """(count, sum) of every label set"""
+        with self._lock:
+            return {labels: (sum(counts), total) for labels, (counts, total) in self._series.items()}
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            series = [(labels, list(counts), total) for labels, (counts, total) in self._series.items()]
+        for labels, counts, total in series:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                yield f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.label_names, labels)} {total}"
+            yield f"{self.name}_count{_labels(self.label_names, labels)} {cumulative}"
+
+REQUESTS = Counter("http_requests_total", "HTTP requests served", ("method", "route", "status"))
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Time until the last response byte was sent",
+    LATENCY_BUCKETS, ("method", "route")
+)
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes", "Response body size", SIZE_BUCKETS, ("method", "route")
+)
+IN_FLIGHT = Gauge("http_requests_in_flight", "Requests currently being served")
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries", "Database statements executed per request",
+    QUERY_COUNT_BUCKETS, ("method", "route")
+)
+REQUEST_DB_TIME = Histogram(
+    "http_request_db_seconds", "Database time spent per request", LATENCY_BUCKETS, ("method", "route")
+)
+DB_QUERIES = Counter("db_queries_total", "Database statements executed")
+DB_QUERY_TIME = Counter("db_query_seconds_total", "Time spent executing database statements")
+POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection", POOL_WAIT_BUCKETS
+)
+PASSWORD_HASH_TIME = Histogram(
+    "password_hash_seconds", "Time bcrypt jobs spent queued and running", LATENCY_BUCKETS
+)
+
+REGISTRY: List = [
+    REQUESTS, REQUEST_LATENCY, RESPONSE_SIZE, IN_FLIGHT, REQUEST_QUERIES, REQUEST_DB_TIME,
+    DB_QUERIES, DB_QUERY_TIME, POOL_CHECKOUT_WAIT, PASSWORD_HASH_TIME,
+]
+
+# Gauges sampled only when /metrics is scraped: name -> (help, callback)
+_collectors: Dict[str, Tuple[str, Callable[[], float], str]] = {}
+
+def register_collector(name: str, documentation: str, callback: Callable[[], float], kind: str = "gauge"):
+    """Value read at scrape time; kind="counter" for monotonic totals, named *_total"""
+    _collectors[name] = (documentation, callback, kind)
+
+def render_metrics() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.samples())
+    for name, (documentation, callback, kind) in _collectors.items():
+        lines.append(f"# HELP {name} {documentation}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.append(f"{name} {callback()}")
+    return "\n".join(lines) + "\n"
+
+class RequestStats:
+    __slots__ = ("scope", "queries", "db_seconds")
+
+    def __init__(self, scope: Optional[dict] = None):
+        self.scope = scope
+        self.queries = 0
+        self.db_seconds = 0.0
+
+# Database work of the request being served; None outside a request
+request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_started = perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_metrics_started", None)
+    if started is None:
+        return
+    elapsed = perf_counter() - started
+    DB_QUERIES.inc()
+    DB_QUERY_TIME.inc(elapsed)
+    stats = request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+
+def instrument_engine(sync_engine):
+    """Count statements and database time on an engine (use .sync_engine for async engines)"""
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+def timed_pool_class(pool_class):
+    """Subclass of a SQLAlchemy pool class that records how long each checkout waits"""
+
+    class TimedPool(pool_class):
+        def _do_get(self):
+            started = perf_counter()
+            try:
+                return super()._do_get()
+            finally:
+                POOL_CHECKOUT_WAIT.observe(perf_counter() - started)
+
+    TimedPool.__name__ = f"Timed{pool_class.__name__}"
+    return TimedPool
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency, response size, status and the
+    request's database work, labelled by route template. Timing stops at the
+    last body chunk so background tasks do not inflate request latency.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = perf_counter()
+        stats = RequestStats(scope)
+        token = request_stats.set(stats)
+        state = {"status": 500, "size": 0, "done": False}
+
+        def finish():
+            state["done"] = True
+            route = scope.get("route")
+            labels = (scope["method"], route.path if route is not None else "unmatched")
+            REQUESTS.inc(labels=(*labels, state["status"]))
+            REQUEST_LATENCY.observe(perf_counter() - started, labels)
+            RESPONSE_SIZE.observe(state["size"], labels)
+            REQUEST_QUERIES.observe(stats.queries, labels)
+            REQUEST_DB_TIME.observe(stats.db_seconds, labels)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+                # Expose the database share of the response time to clients and benchmarks
+                message.setdefault("headers", [])
+                message["headers"] = [
+                    *message["headers"],
+                    (b"server-timing", f'db;dur={stats.db_seconds * 1000:.2f};desc="{stats.queries} queries"'.encode()),
+                ]
+            elif message["type"] == "http.response.body":
+                state["size"] += len(message.get("body", b""))
+                if not message.get("more_body", False) and not state["done"]:
+                    finish()
+            await send(message)
+
+        IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            IN_FLIGHT.inc(-1)
+            if not state["done"]:
+                finish()
+            request_stats.reset(token)
@@ -0,0 +1,29 @@
+import base64
+from datetime import date
+from typing import Tuple
+
+from fastapi import HTTPException, status
+
+# Header used to hand the next page cursor back to the client
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Header carrying the offset of the next page of ranked search results
+NEXT_OFFSET_HEADER = "X-Next-Offset"
+
+# Encode a (date, id) keyset position into an opaque cursor string
+def encode_cursor(cursor_date: date, cursor_id: int) -> str:
+    raw = f"{cursor_date.isoformat()}|{cursor_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+# Decode a cursor string back into its (date, id) keyset position
+def decode_cursor(cursor: str) -> Tuple[date, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        cursor_date, cursor_id = raw.split("|", 1)
+        return date.fromisoformat(cursor_date), int(cursor_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
@@ -0,0 +1,112 @@
+import os
+from datetime import date
+from typing import Dict, List, Optional
+
+from sqlalchemy import case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.trading_daily_book import TradingDailyBook, TradingResult
+from app.utils.cache import TTLCache
+from app.utils.etags import get_versions, month_collection
+from app.utils.summaries import month_start, next_month
+
+# Closed months kept per (user, account filter); they only change on back-dated edits
+CALENDAR_CACHE_MAX_MONTHS = int(os.getenv("CALENDAR_CACHE_MAX_MONTHS", "4096"))
+CALENDAR_CACHE_TTL = float(os.getenv("CALENDAR_CACHE_TTL", "3600"))
+
+# Longest range one calendar request may cover
+CALENDAR_MAX_MONTHS = int(os.getenv("CALENDAR_MAX_MONTHS", "60"))
+
+_months = TTLCache(max_size=CALENDAR_CACHE_MAX_MONTHS, ttl=CALENDAR_CACHE_TTL)
+
+def calendar_cache_stats() -> dict:
+    return _months.stats()
+
+def _day_result(pnl: float, entries: int, lowest, highest, liquidated: int) -> TradingResult:
+    """One result for a day across accounts: a liquidation wins, then a shared result, then the P&L sign"""
+    if liquidated:
+        return TradingResult.LIQUIDATED
+    if entries == 1 or lowest == highest:
+        return TradingResult(lowest)
+    if pnl > 0:
+        return TradingResult.PROFIT_OVERALL
+    if pnl < 0:
+        return TradingResult.LOSS_OVERALL
+    return TradingResult.BREAKEVEN
+
+async def _daily_rows(db: AsyncSession, user_id: int, account_id: Optional[int], first: date, last: date):
+    """Per-day P&L of [first, next_month(last)), one GROUP BY date across accounts"""
+    withdraw = func.coalesce(TradingDailyBook.withdraw, 0.0)
+    pnl = TradingDailyBook.ending_balance - TradingDailyBook.starting_balance - withdraw
+    query = select(
+        TradingDailyBook.date,
+        func.coalesce(func.sum(pnl), 0.0),
+        func.count(TradingDailyBook.id),
+        func.min(TradingDailyBook.result),
+        func.max(TradingDailyBook.result),
+        func.sum(case((TradingDailyBook.result == TradingResult.LIQUIDATED, 1), else_=0)),
+    ).filter(
+        TradingDailyBook.user_id == user_id,
+        TradingDailyBook.date >= first,
+        TradingDailyBook.date < next_month(last),
+    )
+    if account_id is not None:
+        query = query.filter(TradingDailyBook.account_id == account_id)
+
+    days: Dict[date, List[dict]] = {}
+    rows = await db.execute(query.group_by(TradingDailyBook.date).order_by(TradingDailyBook.date))
+    for day, day_pnl, entries, lowest, highest, liquidated in rows:
+        days.setdefault(month_start(day), []).append({
+            "date": day,
+            "pnl": round(day_pnl, 2),
+            "result": _day_result(day_pnl, entries, lowest, highest, liquidated),
+            "entries": entries,
+        })
+    return days
+
+def month_range(first: date, last: date) -> List[date]:
+    months = []
+    month = month_start(first)
+    while month <= last:
+        months.append(month)
+        month = next_month(month)
+    return months
+
+async def calendar_months(
+    db: AsyncSession, user_id: int, months: List[date], account_id: Optional[int] = None
+) -> List[dict]:
+    """
+    Daily P&L and result of each month, with month totals. Months before
+    the current one come from the cache while their version is unchanged;
+    everything else is aggregated in a single query, and the closed months
+    are stored with the version read before it.
+    """
+    current = month_start(date.today())
+    closed = [month for month in months if month < current]
+    versions = await get_versions(db, user_id, [month_collection(month) for month in closed])
+
+    days: Dict[date, List[dict]] = {}
+    missing = []
+    for month in months:
+        cached = _months.get((user_id, account_id, month)) if month < current else None
+        if cached is not None and cached[0] == versions[month_collection(month)]:
+            days[month] = cached[1]
+        else:
+            missing.append(month)
+
+    if missing:
+        fetched = await _daily_rows(db, user_id, account_id, missing[0], missing[-1])
+        for month in missing:
+            days[month] = fetched.get(month, [])
+            if month < current:
+                _months.set((user_id, account_id, month), (versions[month_collection(month)], days[month]))
+
+    return [
+        {
+            "month": month,
+            "pnl": round(sum(day["pnl"] for day in days[month]), 2),
+            "entries": sum(day["entries"] for day in days[month]),
+            "days": days[month],
+        }
+        for month in months
+    ]
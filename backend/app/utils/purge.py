@@ -0,0 +1,87 @@
+import logging
+import os
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.database import AsyncSessionLocal
+from app.models.account import Account
+from app.models.trading_daily_book import TradingDailyBook
+from app.utils.etags import ACCOUNTS, TRADING_DAILY_BOOKS, bump_versions
+from app.utils.summaries import account_month_collections
+
+logger = logging.getLogger(__name__)
+
+# Accounts with more journal entries than this are purged in the background
+ACCOUNT_PURGE_THRESHOLD = int(os.getenv("ACCOUNT_PURGE_THRESHOLD", "5000"))
+
+# Daily books removed per transaction by the background purge
+ACCOUNT_PURGE_BATCH_SIZE = int(os.getenv("ACCOUNT_PURGE_BATCH_SIZE", "2000"))
+
+# Accounts this process is purging, so repeated deletes do not start a
+# second job; the pending-delete flag on the account is what outlives it
+_purging = set()
+
+async def count_daily_books(db: AsyncSession, account_id: int) -> int:
+    return await db.scalar(
+        select(func.count()).select_from(TradingDailyBook).where(TradingDailyBook.account_id == account_id)
+    )
+
+async def delete_account_rows(db: AsyncSession, account_id: int, user_id: int) -> bool:
+    """
+    Delete an account with one statement; its daily books, summaries and
+    ledger go with it through ON DELETE CASCADE. Returns False if the
+    account no longer exists.
+    """
+    result = await db.execute(
+        delete(Account).where(Account.id == account_id, Account.user_id == user_id)
+    )
+    return result.rowcount > 0
+
+async def mark_pending_delete(db: AsyncSession, account_id: int, user_id: int):
+    """Flag an account for a background purge, hiding it and rejecting its writes"""
+    await db.execute(
+        update(Account)
+        .where(Account.id == account_id, Account.user_id == user_id)
+        .values(pending_delete=True)
+    )
+
+def start_purge(account_id: int) -> bool:
+    """Reserve an account for a background purge; False if one is already running"""
+    if account_id in _purging:
+        return False
+    _purging.add(account_id)
+    return True
+
+async def purge_account(account_id: int, user_id: int):
+    """
+    Background task for very large accounts: delete the journal in short
+    batches so no single transaction holds locks on the whole account, then
+    drop the account itself. Commit mark_pending_delete() and call
+    start_purge() before scheduling it.
+    """
+    batch = (
+        select(TradingDailyBook.id)
+        .where(TradingDailyBook.account_id == account_id)
+        .limit(ACCOUNT_PURGE_BATCH_SIZE)
+        .scalar_subquery()
+    )
+    try:
+        async with AsyncSessionLocal() as db:
+            while True:
+                result = await db.execute(delete(TradingDailyBook).where(TradingDailyBook.id.in_(batch)))
+                # The monthly summaries stay until the account goes, listing every month touched
+                months = await account_month_collections(db, account_id)
+                await bump_versions(db, user_id, ACCOUNTS, TRADING_DAILY_BOOKS, *months)
+                await db.commit()
+                if result.rowcount < ACCOUNT_PURGE_BATCH_SIZE:
+                    break
+
+            months = await account_month_collections(db, account_id)
+            await delete_account_rows(db, account_id, user_id)
+            await bump_versions(db, user_id, ACCOUNTS, TRADING_DAILY_BOOKS, *months)
+            await db.commit()
+    except Exception:
+        logger.exception("Purge of account %s failed", account_id)
+    finally:
+        _purging.discard(account_id)
@@ -0,0 +1,161 @@
+"""
+Statements the routers issue, built in one place so that check-indexes
+explains exactly the queries that are served.
+"""
+from datetime import date
+from typing import Optional, Sequence, Tuple
+
+from sqlalchemy import and_, func, select, tuple_
+from sqlalchemy.sql import Select
+
+from app.models.account import Account
+from app.models.account_summary import AccountMonthlySummary, AccountSummary
+from app.models.balance_ledger import BalanceLedgerEntry
+from app.models.trading_daily_book import TradingDailyBook, TradingResult
+from app.models.trading_plan import TradingPlan
+from app.utils.summaries import RESULT_COUNT_COLUMNS, RESULT_PNL_COLUMNS, month_start
+
+# Accounts
+
+def accounts_query(user_id: int) -> Select:
+    """Accounts of a user, without those pending deletion"""
+    return select(Account).filter(Account.user_id == user_id, Account.pending_delete.is_(False))
+
+def account_query(user_id: int, account_id: int) -> Select:
+    return accounts_query(user_id).filter(Account.id == account_id)
+
+def ledger_query(user_id: int, account_id: int, before_id: Optional[int], limit: int) -> Select:
+    """A page of an account's balance ledger, newest first"""
+    query = select(BalanceLedgerEntry).filter(
+        BalanceLedgerEntry.account_id == account_id,
+        BalanceLedgerEntry.user_id == user_id
+    )
+    if before_id is not None:
+        query = query.filter(BalanceLedgerEntry.id < before_id)
+    return query.order_by(BalanceLedgerEntry.id.desc()).limit(limit)
+
+# Daily books
+
+def _filter_books(query: Select, account_id: Optional[int], from_date: Optional[date],
+                  to_date: Optional[date]) -> Select:
+    if account_id is not None:
+        query = query.filter(TradingDailyBook.account_id == account_id)
+    if from_date is not None:
+        query = query.filter(TradingDailyBook.date >= from_date)
+    if to_date is not None:
+        query = query.filter(TradingDailyBook.date <= to_date)
+    return query
+
+def daily_books_query(
+    user_id: int,
+    account_id: Optional[int] = None,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    result: Optional[TradingResult] = None,
+    before: Optional[Tuple[date, int]] = None,
+) -> Select:
+    """Daily books of a user, newest first on (date, id), strictly before a keyset position"""
+    query = _filter_books(
+        select(TradingDailyBook).filter(TradingDailyBook.user_id == user_id), account_id, from_date, to_date
+    )
+    if result is not None:
+        query = query.filter(TradingDailyBook.result == result)
+    if before is not None:
+        query = query.filter(tuple_(TradingDailyBook.date, TradingDailyBook.id) < tuple_(*before))
+    return query.order_by(TradingDailyBook.date.desc(), TradingDailyBook.id.desc())
+
+def daily_book_query(user_id: int, book_id: int) -> Select:
+    return select(TradingDailyBook).filter(TradingDailyBook.id == book_id, TradingDailyBook.user_id == user_id)
+
+def writable_daily_book_query(user_id: int, book_id: int) -> Select:
+    """A daily book, unless its account is pending deletion"""
+    return daily_book_query(user_id, book_id).join(TradingDailyBook.account).filter(
+        Account.pending_delete.is_(False)
+    )
+
+def daily_books_export_query(user_id: int, columns: Sequence[str], account_id: Optional[int],
+                             from_date: Optional[date], to_date: Optional[date]) -> Select:
+    query = select(*[getattr(TradingDailyBook, column) for column in columns]).filter(
+        TradingDailyBook.user_id == user_id
+    )
+    query = _filter_books(query, account_id, from_date, to_date)
+    return query.order_by(TradingDailyBook.date, TradingDailyBook.id)
+
+def recent_books_query(user_id: int, limit: int) -> Select:
+    return daily_books_query(user_id).limit(limit)
+
+# Analytics
+
+def performance_books_query(user_id: int, account_id: Optional[int], from_date: Optional[date],
+                            to_date: Optional[date]) -> Select:
+    """Daily books in chain order per account, as account_performance() reads them"""
+    query = select(
+        TradingDailyBook.account_id,
+        TradingDailyBook.date,
+        TradingDailyBook.starting_balance,
+        TradingDailyBook.ending_balance,
+        func.coalesce(TradingDailyBook.withdraw, 0.0),
+        TradingDailyBook.result,
+    ).filter(TradingDailyBook.user_id == user_id)
+    query = _filter_books(query, account_id, from_date, to_date)
+    return query.order_by(TradingDailyBook.account_id, TradingDailyBook.date, TradingDailyBook.id)
+
+def account_summaries_query(user_id: int) -> Select:
+    return select(AccountSummary).filter(AccountSummary.user_id == user_id).order_by(AccountSummary.account_id)
+
+def monthly_summaries_query(user_id: int, account_id: Optional[int] = None, from_date: Optional[date] = None,
+                            to_date: Optional[date] = None) -> Select:
+    query = select(AccountMonthlySummary).filter(AccountMonthlySummary.user_id == user_id)
+    if account_id is not None:
+        query = query.filter(AccountMonthlySummary.account_id == account_id)
+    if from_date is not None:
+        query = query.filter(AccountMonthlySummary.month >= month_start(from_date))
+    if to_date is not None:
+        query = query.filter(AccountMonthlySummary.month <= to_date)
+    return query.order_by(AccountMonthlySummary.account_id, AccountMonthlySummary.month)
+
+# Dashboard
+
+def dashboard_accounts_query(user_id: int, day: date) -> Select:
+    """Account balances joined with the monthly summary of the month of day"""
+    return select(
+        Account.id,
+        Account.account_name,
+        Account.broker,
+        Account.account_balance,
+        func.coalesce(AccountMonthlySummary.total_pnl, 0.0).label("month_to_date_pnl"),
+        func.coalesce(AccountMonthlySummary.total_withdrawals, 0.0).label("month_to_date_withdrawals"),
+        func.coalesce(AccountMonthlySummary.entries, 0).label("month_to_date_entries"),
+    ).outerjoin(AccountMonthlySummary, and_(
+        AccountMonthlySummary.account_id == Account.id,
+        AccountMonthlySummary.month == month_start(day),
+    )).filter(Account.user_id == user_id, Account.pending_delete.is_(False)).order_by(Account.id)
+
+def result_totals_query(user_id: int) -> Select:
+    """Count and P&L of each trading result, summed over the account summaries"""
+    return select(*[
+        func.coalesce(func.sum(getattr(AccountSummary, column)), 0).label(column)
+        for column in (*RESULT_COUNT_COLUMNS.values(), *RESULT_PNL_COLUMNS.values())
+    ]).filter(AccountSummary.user_id == user_id)
+
+# Trading plans
+
+def trading_plans_query(user_id: int) -> Select:
+    return select(TradingPlan).filter(TradingPlan.user_id == user_id)
+
+def trading_plan_query(user_id: int, plan_id: int) -> Select:
+    return select(TradingPlan).filter(TradingPlan.id == plan_id, TradingPlan.user_id == user_id)
+
+def plans_of_day_query(user_id: int, day: date) -> Select:
+    return select(TradingPlan).filter(
+        TradingPlan.user_id == user_id, TradingPlan.plan_date == day
+    ).order_by(TradingPlan.id)
+
+def trading_plans_export_query(user_id: int, columns: Sequence[str], from_date: Optional[date],
+                               to_date: Optional[date]) -> Select:
+    query = select(*[getattr(TradingPlan, column) for column in columns]).filter(TradingPlan.user_id == user_id)
+    if from_date is not None:
+        query = query.filter(TradingPlan.plan_date >= from_date)
+    if to_date is not None:
+        query = query.filter(TradingPlan.plan_date <= to_date)
+    return query.order_by(TradingPlan.plan_date, TradingPlan.id)
@@ -0,0 +1,169 @@
+from datetime import date, timedelta
+from typing import List, NamedTuple, Tuple
+
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.sql import Select
+
+from app.models.account import Account
+from app.models.balance_ledger import BalanceLedgerEntry
+from app.models.trading_daily_book import TradingDailyBook, TradingResult
+from app.models.trading_plan import TradingPlan
+from app.models.user import User
+from app.utils.auth import user_by_email_query
+from app.utils.balance_chain import chain_anchor_query
+from app.utils.queries import (
+    account_query,
+    account_summaries_query,
+    accounts_query,
+    dashboard_accounts_query,
+    daily_book_query,
+    daily_books_export_query,
+    daily_books_query,
+    ledger_query,
+    monthly_summaries_query,
+    performance_books_query,
+    plans_of_day_query,
+    recent_books_query,
+    result_totals_query,
+    trading_plan_query,
+    trading_plans_export_query,
+    trading_plans_query,
+    writable_daily_book_query
+)
+from app.utils.summaries import month_aggregates
+
+# Prefix of the throwaway users created by the seed, so they never clash
+SEED_EMAIL_PREFIX = "query-plan-check"
+
+class PlanFixture(NamedTuple):
+    """Seeded user, and one of their accounts, daily books and plans"""
+    user_id: int
+    account_id: int
+    book_id: int
+    plan_id: int
+
+async def seed_plan_fixture(
+    connection: AsyncConnection,
+    users: int,
+    accounts_per_user: int,
+    books_per_account: int,
+    plans_per_user: int,
+) -> PlanFixture:
+    """
+    Insert a synthetic journal big enough for the planner to prefer indexes.
+    Returns the rows the route queries are explained for.
+    """
+    results = list(TradingResult)
+    first_day = date(2020, 1, 1)
+
+    user_ids = []
+    for n in range(users):
+        user_ids.append(await connection.scalar(insert(User).values(
+            email=f"{SEED_EMAIL_PREFIX}-{n}@example.invalid",
+            username=f"{SEED_EMAIL_PREFIX}-{n}",
+            hashed_password="!",
+            is_active=True,
+        ).returning(User.id)))
+
+    account_ids = []
+    for user_id in user_ids:
+        for n in range(accounts_per_user):
+            account_id = await connection.scalar(insert(Account).values(
+                account_name=f"Account {n}", purpose="", broker="", account_balance=1000.0, user_id=user_id,
+            ).returning(Account.id))
+            account_ids.append((user_id, account_id))
+
+            await connection.execute(insert(TradingDailyBook), [
+                {
+                    "date": first_day + timedelta(days=day),
+                    "starting_balance": 1000.0 + day,
+                    "ending_balance": 1001.0 + day,
+                    "withdraw": 0.0,
+                    "result": results[day % len(results)],
+                    "account_id": account_id,
+                    "user_id": user_id,
+                }
+                for day in range(books_per_account)
+            ])
+            await connection.execute(insert(BalanceLedgerEntry), [
+                {
+                    "account_id": account_id,
+                    "user_id": user_id,
+                    "delta": 1.0,
+                    "balance_after": 1000.0 + day,
+                    "reason": "query_plan_check",
+                }
+                for day in range(books_per_account)
+            ])
+
+        await connection.execute(insert(TradingPlan), [
+            {
+                "day": "Monday",
+                "account_balance": 1000.0,
+                "daily_target": 10.0,
+                "sl_pips": 10.0,
+                "tp_pips": 20.0,
+                "status": False,
+                "plan_date": first_day + timedelta(days=day),
+                "user_id": user_id,
+            }
+            for day in range(plans_per_user)
+        ])
+
+    # Give the planner statistics for the freshly inserted rows
+    await connection.execute(text("ANALYZE"))
+
+    # Explain for a user in the middle of the id range
+    user_id, account_id = account_ids[len(account_ids) // 2]
+    book_id = await connection.scalar(
+        select(func.min(TradingDailyBook.id)).where(TradingDailyBook.account_id == account_id)
+    )
+    plan_id = await connection.scalar(select(func.min(TradingPlan.id)).where(TradingPlan.user_id == user_id))
+    return PlanFixture(user_id, account_id, book_id or 0, plan_id or 0)
+
+def route_queries(fixture: PlanFixture) -> List[Tuple[str, Select]]:
+    """The statements the routers issue, from the same builders, keyed by the route that runs them"""
+    user_id, account_id, book_id, plan_id = fixture
+    day = date(2021, 1, 1)
+
+    return [
+        ("GET /accounts/", accounts_query(user_id)),
+        ("GET /accounts/{id}", account_query(user_id, account_id)),
+        ("GET /accounts/{id}/ledger", ledger_query(user_id, account_id, None, 100)),
+        ("GET /trading-daily-books/", daily_books_query(user_id).limit(101)),
+        ("GET /trading-daily-books/?cursor", daily_books_query(user_id, before=(day, 0)).limit(101)),
+        ("GET /trading-daily-books/?account_id", daily_books_query(user_id, account_id).limit(101)),
+        ("GET /trading-daily-books/export", daily_books_export_query(user_id, ("id", "date"), None, day, None)),
+        ("GET /trading-daily-books/{id}", daily_book_query(user_id, book_id)),
+        ("PUT /trading-daily-books/{id}", writable_daily_book_query(user_id, book_id)),
+        ("GET /analytics/accounts", performance_books_query(user_id, None, None, None)),
+        ("GET /analytics/summaries", account_summaries_query(user_id)),
+        ("GET /analytics/summaries/monthly", monthly_summaries_query(user_id)),
+        ("balance chain anchor", chain_anchor_query(account_id, day, 0, inclusive=True)),
+        ("monthly summary refresh", month_aggregates(account_id, day)),
+        ("GET /trading-plans/", trading_plans_query(user_id)),
+        ("GET /trading-plans/export", trading_plans_export_query(user_id, ("id", "plan_date"), day, None)),
+        ("GET /trading-plans/{id}", trading_plan_query(user_id, plan_id)),
+        ("GET /dashboard/ accounts", dashboard_accounts_query(user_id, day)),
+        ("GET /dashboard/ plans", plans_of_day_query(user_id, day)),
+        ("GET /dashboard/ recent", recent_books_query(user_id, 10)),
+        ("GET /dashboard/ results", result_totals_query(user_id)),
+        ("login", user_by_email_query(f"{SEED_EMAIL_PREFIX}-0@example.invalid")),
+    ]
+
+async def explain(connection: AsyncConnection, statement: Select) -> List[str]:
+    """Plan of a statement as text lines, in the dialect's own EXPLAIN format"""
+    sql = str(statement.compile(dialect=connection.dialect, compile_kwargs={"literal_binds": True}))
+    if connection.dialect.name == "sqlite":
+        rows = await connection.execute(text(f"EXPLAIN QUERY PLAN {sql}"))
+        return [row[-1] for row in rows]
+    rows = await connection.execute(text(f"EXPLAIN {sql}"))
+    return [row[0] for row in rows]
+
+def sequential_scans(plan: List[str]) -> List[str]:
+    """Plan lines that read a whole table instead of using an index"""
+    return [
+        line.strip() for line in plan
+        if "Seq Scan" in line or (line.startswith("SCAN ") and "INDEX" not in line)
+    ]
@@ -0,0 +1,348 @@
+import asyncio
+import math
+import os
+import re
+import weakref
+from dataclasses import dataclass, field
+from datetime import date
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.schemas import TradingDailyBook as TradingDailyBookSchema
+from app.models.trading_daily_book import TradingDailyBook, TradingResult
+from app.utils.cache import TTLCache
+from app.utils.etags import TRADING_DAILY_BOOKS, get_versions
+from app.utils.serialization import schema_columns
+
+# Users whose in-process index is kept, and for how long it may sit unused
+SEARCH_INDEX_MAX_USERS = int(os.getenv("SEARCH_INDEX_MAX_USERS", "64"))
+SEARCH_INDEX_TTL = float(os.getenv("SEARCH_INDEX_TTL", "900"))
+
+# Searched text fields, with the weights PostgreSQL's ts_rank gives to the
+# A, B and C labels of the search_vector column
+SEARCH_FIELDS = ("summary", "remarks", "sentiment")
+FIELD_WEIGHTS = (1.0, 0.4, 0.2)
+
+# Text search configuration the search_vector column was generated with
+SEARCH_CONFIG = "english"
+
+# ts_rank_cd normalization 32 scales ranks to rank / (rank + 1)
+_RANK_NORMALIZATION = 32
+
+_search_vector = literal_column("trading_daily_books.search_vector")
+
+# --- Text analysis for the in-process index ---
+
+_WORD = re.compile(r"[a-z0-9]+")
+_QUERY_PART = re.compile(r'(-?)"([^"]*)"?|(-?)(\S+)')
+
+STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being below between
+both but by can did do does doing down during each few for from further had has have having he her here
+hers herself him himself his how i if in into is it its itself just me more most my myself no nor not now
+of off on once only or other our ours ourselves out over own same she should so some such than that the
+their theirs them themselves then there these they this those through to too under until up very was we
+were what when where which while who whom why will with you your yours yourself yourselves
+""".split())
+
+_VOWELS = frozenset("aeiou")
+
+def _is_consonant(word: str, i: int) -> bool:
+    if word[i] in _VOWELS:
+        return False
+    if word[i] == "y":
+        return i == 0 or not _is_consonant(word, i - 1)
+    return True
+
+def _measure(stem: str) -> int:
+    """Number of vowel-consonant sequences in a stem (Porter's m)"""
+    pattern = "".join("c" if _is_consonant(stem, i) else "v" for i in range(len(stem)))
+    return pattern.lstrip("c").rstrip("v").count("vc") if pattern else 0
+
+def _has_vowel(stem: str) -> bool:
+    return any(not _is_consonant(stem, i) for i in range(len(stem)))
+
+def _ends_cvc(stem: str) -> bool:
+    return (
+        len(stem) >= 3
+        and _is_consonant(stem, len(stem) - 3)
+        and not _is_consonant(stem, len(stem) - 2)
+        and _is_consonant(stem, len(stem) - 1)
+        and stem[-1] not in "wxy"
+    )
+
+# Journals reuse a small vocabulary, so each word is stemmed once
+@lru_cache(maxsize=65536)
+def stem(word: str) -> str:
+    """
+    Step 1 of the Porter stemmer: plurals, -ed/-ing and a final -y, so
+    "trades", "traded" and "trading" all index as "trade" (as they do in
+    PostgreSQL's english configuration)
+    """
+    if len(word) <= 2:
+        return word
+    if word.endswith("sses") or word.endswith("ies"):
+        word = word[:-2]
+    elif word.endswith("s") and not word.endswith("ss"):
+        word = word[:-1]
+
+    if word.endswith("eed"):
+        if _measure(word[:-3]) > 0:
+            word = word[:-1]
+    else:
+        for suffix in ("ed", "ing"):
+            if word.endswith(suffix) and _has_vowel(word[:-len(suffix)]):
+                word = word[:-len(suffix)]
+                if word.endswith(("at", "bl", "iz")):
+                    word += "e"
+                elif len(word) >= 2 and word[-1] == word[-2] and _is_consonant(word, len(word) - 1) \
+                        and word[-1] not in "lsz":
+                    word = word[:-1]
+                elif _measure(word) == 1 and _ends_cvc(word):
+                    word += "e"
+                break
+
+    if word.endswith("y") and _has_vowel(word[:-1]):
+        word = word[:-1] + "i"
+    return word
+
+def analyze(text: Optional[str]) -> List[Tuple[str, int]]:
+    """
+    (term, position) pairs of a text. Stopwords are dropped but still take
+    up a position, so phrases only match words that were really adjacent.
+    """
+    if not text:
+        return []
+    return [
+        (stem(word), position)
+        for position, word in enumerate(_WORD.findall(text.lower()))
+        if word not in STOPWORDS
+    ]
+
+# A phrase is a list of (term, offset from the phrase's first term)
+Phrase = List[Tuple[str, int]]
+
+def parse_query(query: str) -> Tuple[List[Phrase], List[Phrase]]:
+    """
+    Split a web-search style query into required and excluded phrases:
+    words are ANDed, "quoted words" must be adjacent and -word excludes.
+    """
+    required, excluded = [], []
+    for match in _QUERY_PART.finditer(query):
+        negated = bool(match.group(1) or match.group(3))
+        terms = analyze(match.group(2) if match.group(2) is not None else match.group(4))
+        if not terms:
+            continue
+        first = terms[0][1]
+        phrase = [(term, position - first) for term, position in terms]
+        (excluded if negated else required).append(phrase)
+    return required, excluded
+
+# --- In-process inverted index ---
+
+@dataclass
+class BookIndex:
+    """Inverted index of one user's journal, valid for one collection version"""
+    version: int
+    # term -> book id -> [(field, position)]
+    postings: Dict[str, Dict[int, List[Tuple[int, int]]]] = field(default_factory=dict)
+    # book id -> (date, account id, result)
+    books: Dict[int, Tuple[date, int, TradingResult]] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, version: int, rows) -> "BookIndex":
+        index = cls(version)
+        postings = index.postings
+        for book_id, book_date, account_id, result, *texts in rows:
+            index.books[book_id] = (book_date, account_id, result)
+            for field_number, text in enumerate(texts):
+                for term, position in analyze(text):
+                    books = postings.get(term)
+                    if books is None:
+                        books = postings[term] = {}
+                    occurrences = books.get(book_id)
+                    if occurrences is None:
+                        books[book_id] = [(field_number, position)]
+                    else:
+                        occurrences.append((field_number, position))
+        return index
+
+    def _phrase_hits(self, phrase: Phrase, book_id: int) -> List[int]:
+        """Field of every occurrence of a phrase in one book"""
+        first_term, _ = phrase[0]
+        occurrences = self.postings[first_term][book_id]
+        if len(phrase) == 1:
+            return [field_number for field_number, _ in occurrences]
+        rest = [(set(self.postings[term][book_id]), offset) for term, offset in phrase[1:]]
+        return [
+            field_number for field_number, position in occurrences
+            if all((field_number, position + offset) in positions for positions, offset in rest)
+        ]
+
+    def search(
+        self,
+        required: List[Phrase],
+        excluded: List[Phrase],
+        account_id: Optional[int] = None,
+        from_date: Optional[date] = None,
+        to_date: Optional[date] = None,
+        result: Optional[TradingResult] = None,
+    ) -> List[Tuple[int, float]]:
+        """(book id, rank) of every matching book, in no particular order"""
+        terms = {term for phrase in required for term, _ in phrase}
+        if not terms or any(term not in self.postings for term in terms):
+            return []
+        # Walk the rarest term's postings, checking the others against it
+        rarest = min(terms, key=lambda term: len(self.postings[term]))
+        candidates = [
+            book_id for book_id in self.postings[rarest]
+            if all(book_id in self.postings[term] for term in terms)
+        ]
+
+        total = len(self.books)
+        idf = {term: math.log(1 + total / len(self.postings[term])) for term in terms}
+        hits = []
+        for book_id in candidates:
+            book_date, book_account_id, book_result = self.books[book_id]
+            if account_id is not None and book_account_id != account_id:
+                continue
+            if from_date is not None and book_date < from_date:
+                continue
+            if to_date is not None and book_date > to_date:
+                continue
+            if result is not None and book_result != result:
+                continue
+            if any(
+                all(term in self.postings and book_id in self.postings[term] for term, _ in phrase)
+                and self._phrase_hits(phrase, book_id)
+                for phrase in excluded
+            ):
+                continue
+
+            score = 0.0
+            for phrase in required:
+                fields = self._phrase_hits(phrase, book_id)
+                if not fields:
+                    break
+                weight = max(idf[term] for term, _ in phrase)
+                score += weight * sum(FIELD_WEIGHTS[field_number] for field_number in fields)
+            else:
+                hits.append((book_id, score / (score + 1)))
+        return hits
+
+_indexes = TTLCache(max_size=SEARCH_INDEX_MAX_USERS, ttl=SEARCH_INDEX_TTL)
+
+# One build per user at a time; concurrent searches wait for it and reuse it.
+# A lock lives only while a search holds or waits on it, so the map stays
+# as small as the number of builds in flight.
+_build_locks: "weakref.WeakValueDictionary[int, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+def search_index_stats() -> dict:
+    return _indexes.stats()
+
+async def _user_index(db: AsyncSession, user_id: int) -> BookIndex:
+    """
+    The user's index, rebuilt whenever the daily book collection version has
+    moved since it was built, so writes from any worker are picked up
+    """
+    version = (await get_versions(db, user_id, [TRADING_DAILY_BOOKS]))[TRADING_DAILY_BOOKS]
+    index = _indexes.get(user_id)
+    if index is not None and index.version >= version:
+        return index
+
+    lock = _build_locks.get(user_id)
+    if lock is None:
+        lock = _build_locks[user_id] = asyncio.Lock()
+    async with lock:
+        index = _indexes.get(user_id)
+        if index is not None and index.version >= version:
+            return index
+        rows = await db.execute(select(
+            TradingDailyBook.id, TradingDailyBook.date, TradingDailyBook.account_id, TradingDailyBook.result,
+            *[getattr(TradingDailyBook, name) for name in SEARCH_FIELDS]
+        ).filter(TradingDailyBook.user_id == user_id))
+        # Tokenizing a large journal is CPU work; keep it off the event loop
+        index = await asyncio.to_thread(BookIndex.build, version, rows.all())
+        _indexes.set(user_id, index)
+        return index
+
+# --- Search ---
+
+async def _search_postgresql(db: AsyncSession, user_id: int, query: str, filters, sort: str, offset: int, limit: int):
+    tsquery = func.websearch_to_tsquery(literal_column(f"'{SEARCH_CONFIG}'::regconfig"), query)
+    rank = func.ts_rank_cd(_search_vector, tsquery, _RANK_NORMALIZATION)
+    statement = select(
+        *schema_columns(TradingDailyBookSchema, TradingDailyBook), rank.label("rank")
+    ).filter(
+        TradingDailyBook.user_id == user_id, _search_vector.op("@@")(tsquery), *filters
+    )
+    newest_first = (TradingDailyBook.date.desc(), TradingDailyBook.id.desc())
+    order = (rank.desc(), *newest_first) if sort == "rank" else newest_first
+    rows = await db.execute(statement.order_by(*order).offset(offset).limit(limit))
+    return [row._asdict() for row in rows]
+
+async def _search_in_process(
+    db: AsyncSession, user_id: int, query: str, account_id, from_date, to_date, result,
+    sort: str, offset: int, limit: int
+):
+    required, excluded = parse_query(query)
+    if not required:
+        return []
+    index = await _user_index(db, user_id)
+    hits = index.search(required, excluded, account_id, from_date, to_date, result)
+
+    def newest_first(hit):
+        book_date, _, _ = index.books[hit[0]]
+        return (book_date, hit[0])
+
+    if sort == "rank":
+        hits.sort(key=lambda hit: (hit[1], *newest_first(hit)), reverse=True)
+    else:
+        hits.sort(key=newest_first, reverse=True)
+    page = hits[offset:offset + limit]
+    if not page:
+        return []
+
+    ranks = dict(page)
+    rows = await db.execute(select(*schema_columns(TradingDailyBookSchema, TradingDailyBook)).filter(
+        TradingDailyBook.user_id == user_id, TradingDailyBook.id.in_(ranks)
+    ))
+    by_id = {row.id: row._asdict() for row in rows}
+    # A book deleted since the index was built is simply left out
+    return [{**by_id[book_id], "rank": rank} for book_id, rank in page if book_id in by_id]
+
+async def search_books(
+    db: AsyncSession,
+    user_id: int,
+    query: str,
+    account_id: Optional[int] = None,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    result: Optional[TradingResult] = None,
+    sort: str = "rank",
+    offset: int = 0,
+    limit: int = 50,
+) -> List[dict]:
+    """
+    Daily books of a user whose summary, remarks or sentiment match a
+    web-search style query, as response dicts with a `rank` in [0, 1).
+    PostgreSQL answers from the GIN-indexed search_vector column; other
+    databases from an in-process inverted index of the user's journal.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        filters = []
+        if account_id is not None:
+            filters.append(TradingDailyBook.account_id == account_id)
+        if from_date is not None:
+            filters.append(TradingDailyBook.date >= from_date)
+        if to_date is not None:
+            filters.append(TradingDailyBook.date <= to_date)
+        if result is not None:
+            filters.append(TradingDailyBook.result == result)
+        return await _search_postgresql(db, user_id, query, filters, sort, offset, limit)
+    return await _search_in_process(
+        db, user_id, query, account_id, from_date, to_date, result, sort, offset, limit
+    )
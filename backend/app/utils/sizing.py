@@ -0,0 +1,154 @@
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Union
+
+import numpy as np
+
+@dataclass(frozen=True)
+class InstrumentSpec:
+    contract_size: float  # Units of the base asset in one standard lot
+    pip_size: float  # Price move that counts as one pip
+    lot_step: float = 0.01  # Smallest lot increment the broker accepts
+
+    @property
+    def pip_value(self) -> float:
+        """Value of one pip for one standard lot, in the quote currency"""
+        return self.contract_size * self.pip_size
+
+# Instrument used when a plan does not name one; matches the
+# pip value of 10 the trading plan form has always assumed
+DEFAULT_INSTRUMENT = "DEFAULT"
+
+# USD-quoted instruments, so pip values are in the account currency
+INSTRUMENTS: Dict[str, InstrumentSpec] = {
+    DEFAULT_INSTRUMENT: InstrumentSpec(contract_size=100_000, pip_size=0.0001),
+    "EURUSD": InstrumentSpec(contract_size=100_000, pip_size=0.0001),
+    "GBPUSD": InstrumentSpec(contract_size=100_000, pip_size=0.0001),
+    "AUDUSD": InstrumentSpec(contract_size=100_000, pip_size=0.0001),
+    "NZDUSD": InstrumentSpec(contract_size=100_000, pip_size=0.0001),
+    "XAUUSD": InstrumentSpec(contract_size=100, pip_size=0.1),
+    "XAGUSD": InstrumentSpec(contract_size=5_000, pip_size=0.001),
+    "BTCUSD": InstrumentSpec(contract_size=1, pip_size=1.0),
+    "ETHUSD": InstrumentSpec(contract_size=1, pip_size=0.1),
+}
+
+# Precomputed lookup arrays so a batch resolves instruments with one take()
+_INSTRUMENT_INDEX = {symbol: index for index, symbol in enumerate(INSTRUMENTS)}
+_PIP_VALUES = np.array([spec.pip_value for spec in INSTRUMENTS.values()], dtype=np.float64)
+_LOT_STEPS = np.array([spec.lot_step for spec in INSTRUMENTS.values()], dtype=np.float64)
+
+def normalize_instrument(symbol: Optional[str]) -> str:
+    return (symbol or DEFAULT_INSTRUMENT).replace("/", "").strip().upper()
+
+def unknown_instruments(symbols: Sequence[Optional[str]]) -> list:
+    return sorted({normalize_instrument(s) for s in symbols} - INSTRUMENTS.keys())
+
+def compute_sizing(
+    account_balance: Sequence[float],
+    daily_target: Sequence[float],
+    tp_pips: Sequence[float],
+    sl_pips: Sequence[float],
+    risk_amount: Optional[Sequence[Optional[float]]] = None,
+    instruments: Union[None, str, Sequence[Optional[str]]] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Vectorized lot sizing for any number of scenarios at once.
+
+    required_lots = daily_target / (tp_pips * pip_value), rounded to the
+    instrument's lot step; missing risk amounts are derived from the stop
+    loss. instruments is one symbol for every scenario or one per scenario,
+    already validated with unknown_instruments().
+    """
+    balance = np.asarray(account_balance, dtype=np.float64)
+    target = np.asarray(daily_target, dtype=np.float64)
+    tp = np.asarray(tp_pips, dtype=np.float64)
+    sl = np.asarray(sl_pips, dtype=np.float64)
+
+    if instruments is None or isinstance(instruments, str):
+        index = np.full(balance.shape, _INSTRUMENT_INDEX[normalize_instrument(instruments)])
+    else:
+        index = np.array([_INSTRUMENT_INDEX[normalize_instrument(s)] for s in instruments], dtype=np.int64)
+    pip_value = _PIP_VALUES.take(index)
+    lot_step = _LOT_STEPS.take(index)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        required = np.where(tp > 0, target / (tp * pip_value), 0.0)
+    required = np.round(np.maximum(required, 0.0), 2)
+    rounded = np.round(np.round(required / lot_step) * lot_step, 2)
+
+    derived_risk = rounded * sl * pip_value
+    if risk_amount is None:
+        risk = derived_risk
+    else:
+        given = np.array([np.nan if r is None else r for r in risk_amount], dtype=np.float64)
+        risk = np.where(np.isnan(given), derived_risk, given)
+    risk = np.round(risk, 2)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        risk_percentage = np.where(balance > 0, risk / balance * 100, 0.0)
+
+    return {
+        "pip_value": pip_value,
+        "required_lots": required,
+        "rounded_lots": rounded,
+        "risk_amount": risk,
+        "risk_percentage": np.round(risk_percentage, 2),
+    }
+
+# Weekday names as stored in TradingPlan.day, Monday first
+WEEKDAYS = np.array(["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"])
+
+def project_plans(
+    account_balance: float,
+    start_date,
+    days: int,
+    daily_target: float,
+    compounding: bool,
+    risk_percentage: float,
+    sl_pips: float,
+    tp_pips: float,
+    instrument: Optional[str] = None,
+    trading_days_only: bool = True,
+) -> Dict[str, np.ndarray]:
+    """
+    Project a horizon of daily plans as column arrays, assuming each day's
+    target is met. With compounding, daily_target is a percentage of the
+    running balance; otherwise it is a fixed amount per day.
+    """
+    steps = np.arange(days)
+    start = np.datetime64(start_date, "D")
+    if trading_days_only:
+        plan_dates = np.busday_offset(start, steps, roll="forward")
+    else:
+        plan_dates = start + steps
+
+    if compounding:
+        rate = daily_target / 100
+        balance = account_balance * np.power(1 + rate, steps)
+        target = balance * rate
+    else:
+        balance = account_balance + daily_target * steps
+        target = np.full(days, float(daily_target))
+
+    risk_amount = balance * risk_percentage / 100
+    sizing = compute_sizing(
+        balance,
+        target,
+        np.full(days, float(tp_pips)),
+        np.full(days, float(sl_pips)),
+        risk_amount=None,
+        instruments=normalize_instrument(instrument),
+    )
+    # Risk follows the requested percentage rather than the stop-loss estimate
+    sizing["risk_amount"] = np.round(risk_amount, 2)
+    sizing["risk_percentage"] = np.full(days, round(float(risk_percentage), 2))
+
+    # 1970-01-01 was a Thursday, so shift day numbers to make Monday 0
+    weekday = (plan_dates.astype("datetime64[D]").astype(np.int64) + 3) % 7
+
+    return {
+        "plan_date": plan_dates,
+        "day": WEEKDAYS.take(weekday),
+        "account_balance": np.round(balance, 2),
+        "daily_target": np.round(target, 2),
+        **sizing,
+    }
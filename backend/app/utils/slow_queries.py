@@ -0,0 +1,217 @@
+import asyncio
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from time import perf_counter
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+
+from app.utils.config import env_bool
+from app.utils.metrics import request_stats
+
+logger = logging.getLogger(__name__)
+
+# The recorder is opt-in; nothing is hooked unless this is set
+SLOW_QUERY_LOG_ENABLED = env_bool("SLOW_QUERY_LOG_ENABLED", "false")
+
+# Statements slower than this are recorded
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "200"))
+
+# Capture a plan for slow statements, and run EXPLAIN ANALYZE for SELECTs
+SLOW_QUERY_EXPLAIN = env_bool("SLOW_QUERY_EXPLAIN", "true")
+SLOW_QUERY_EXPLAIN_ANALYZE = env_bool("SLOW_QUERY_EXPLAIN_ANALYZE", "false")
+
+# Minimum seconds between two plans of the same statement
+SLOW_QUERY_EXPLAIN_INTERVAL = float(os.getenv("SLOW_QUERY_EXPLAIN_INTERVAL", "300"))
+
+# Distinct statements kept in the in-memory table
+SLOW_QUERY_MAX_STATEMENTS = int(os.getenv("SLOW_QUERY_MAX_STATEMENTS", "200"))
+
+# Statements that have a plan worth capturing
+_EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+
+# Execution option that keeps the recorder's own EXPLAIN out of the table
+_SKIP_OPTION = "skip_slow_query_log"
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w$.])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"\$\d+|%\(\w+\)s|%s|(?<!:):\w+|\?")
+_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_VALUES_ROWS = re.compile(r"(VALUES\s*\(\.\.\.\))(?:\s*,\s*\(\.\.\.\))+", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_sql(statement: str) -> str:
+    """Statement with literals and placeholders replaced, so variants group together"""
+    sql = _STRING_LITERAL.sub("?", statement)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _LIST.sub("(...)", sql)
+    sql = _VALUES_ROWS.sub(r"\1", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+def _shape(parameters) -> str:
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{key}: {type(value).__name__}" for key, value in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        return "(" + ", ".join(type(value).__name__ for value in parameters) + ")"
+    return type(parameters).__name__
+
+def parameter_shape(parameters, executemany: bool) -> str:
+    """Types of the bound parameters, never their values"""
+    if executemany:
+        batch = list(parameters)
+        return f"{len(batch)} x {_shape(batch[0]) if batch else '()'}"
+    return _shape(parameters)
+
+class SlowQueryLog:
+    """
+    In-memory table of slow statements grouped by normalized SQL, with the
+    most recent EXPLAIN plan of each. The least expensive statement is
+    evicted once max_statements distinct statements are tracked.
+    """
+
+    def __init__(self, max_statements: int = 200):
+        self.max_statements = max_statements
+        self._entries: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def record(self, sql: str, elapsed_ms: float, shape: str, route: Optional[str]) -> bool:
+        """Add one execution; returns True when the statement is due a new plan"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(sql)
+            if entry is None:
+                if len(self._entries) >= self.max_statements:
+                    cheapest = min(self._entries, key=lambda key: self._entries[key]["total_ms"])
+                    del self._entries[cheapest]
+                entry = self._entries[sql] = {
+                    "sql": sql,
+                    "calls": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "routes": {},
+                    "parameter_shape": shape,
+                    "plan": None,
+                    "plan_captured_at": None,
+                    "_next_explain": 0.0,
+                }
+            entry["calls"] += 1
+            entry["total_ms"] += elapsed_ms
+            entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+            entry["last_ms"] = elapsed_ms
+            entry["last_seen"] = datetime.now(timezone.utc)
+            entry["parameter_shape"] = shape
+            route = route or "-"
+            entry["routes"][route] = entry["routes"].get(route, 0) + 1
+
+            return now >= entry["_next_explain"]
+
+    def plan_scheduled(self, sql: str):
+        """Hold off further plans of this statement for SLOW_QUERY_EXPLAIN_INTERVAL"""
+        with self._lock:
+            entry = self._entries.get(sql)
+            if entry is not None:
+                entry["_next_explain"] = time.monotonic() + SLOW_QUERY_EXPLAIN_INTERVAL
+
+    def set_plan(self, sql: str, plan: str):
+        with self._lock:
+            entry = self._entries.get(sql)
+            if entry is not None:
+                entry["plan"] = plan
+                entry["plan_captured_at"] = datetime.now(timezone.utc)
+
+    def top(self, limit: int = 20, order_by: str = "total_ms") -> List[dict]:
+        with self._lock:
+            entries = sorted(self._entries.values(), key=lambda entry: entry[order_by], reverse=True)[:limit]
+            return [
+                {
+                    **{key: value for key, value in entry.items() if not key.startswith("_")},
+                    "mean_ms": entry["total_ms"] / entry["calls"],
+                    "routes": dict(entry["routes"]),
+                }
+                for entry in entries
+            ]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+slow_query_log = SlowQueryLog(SLOW_QUERY_MAX_STATEMENTS)
+
+# Only one plan is captured at a time, so a burst of slow queries cannot
+# pile extra load on an already struggling database
+_explain_running = threading.Lock()
+
+def _current_route() -> Optional[str]:
+    stats = request_stats.get()
+    if stats is None or stats.scope is None:
+        return None
+    route = stats.scope.get("route")
+    return f"{stats.scope['method']} {route.path}" if route is not None else None
+
+def _explain_prefix(dialect_name: str, statement: str) -> str:
+    if dialect_name == "sqlite":
+        return "EXPLAIN QUERY PLAN "
+    # ANALYZE executes the statement, so only reads are ever analyzed
+    if SLOW_QUERY_EXPLAIN_ANALYZE and statement.lstrip().upper().startswith(("SELECT", "WITH")):
+        return "EXPLAIN (ANALYZE, BUFFERS) "
+    return "EXPLAIN "
+
+async def _capture_plan(async_engine, sql: str, statement: str, parameters):
+    # The task inherited the request's context; keep the EXPLAIN out of its stats
+    request_stats.set(None)
+    try:
+        async with async_engine.connect() as connection:
+            connection = await connection.execution_options(**{_SKIP_OPTION: True})
+            prefix = _explain_prefix(connection.dialect.name, statement)
+            result = await connection.exec_driver_sql(prefix + statement, parameters)
+            plan = "\n".join(str(row[-1]) for row in result)
+            # Never keep anything an analyzed statement may have changed
+            await connection.rollback()
+        slow_query_log.set_plan(sql, plan)
+    except Exception:
+        logger.warning("Could not capture the plan of a slow query", exc_info=True)
+    finally:
+        _explain_running.release()
+
+def install_slow_query_log(async_engine):
+    """Record statements on the async engine that exceed SLOW_QUERY_THRESHOLD_MS"""
+    sync_engine = async_engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _start_timer(conn, cursor, statement, parameters, context, executemany):
+        context._slow_query_started = perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _record_slow_query(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_slow_query_started", None)
+        if started is None:
+            return
+        elapsed_ms = (perf_counter() - started) * 1000
+        if elapsed_ms < SLOW_QUERY_THRESHOLD_MS or context.execution_options.get(_SKIP_OPTION):
+            return
+
+        sql = normalize_sql(statement)
+        shape = parameter_shape(parameters, executemany)
+        route = _current_route()
+        logger.warning("Slow query (%.1f ms) from %s: %s params=%s", elapsed_ms, route or "-", sql, shape)
+
+        if not slow_query_log.record(sql, elapsed_ms, shape, route):
+            return
+        if not SLOW_QUERY_EXPLAIN or executemany or not sql.upper().startswith(_EXPLAINABLE):
+            return
+        if not _explain_running.acquire(blocking=False):
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Not on the event loop (sync engine in a worker thread)
+            _explain_running.release()
+            return
+        # The plan is captured on its own connection once this statement has returned
+        slow_query_log.plan_scheduled(sql)
+        loop.create_task(_capture_plan(async_engine, sql, statement, parameters))
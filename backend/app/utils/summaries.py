@@ -0,0 +1,155 @@
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import case, delete, func, insert, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.account import Account
+from app.models.account_summary import AccountSummary, AccountMonthlySummary
+from app.models.trading_daily_book import TradingDailyBook, TradingResult
+from app.utils.etags import bump_versions, month_collection
+
+# Count column of the summaries for each trading result
+RESULT_COUNT_COLUMNS = {
+    TradingResult.PROFIT_OVERALL: "profit_count",
+    TradingResult.LOSS_OVERALL: "loss_count",
+    TradingResult.LIQUIDATED: "liquidated_count",
+    TradingResult.BREAKEVEN: "breakeven_count",
+    TradingResult.NO_TRADE: "no_trade_count",
+    TradingResult.NO_RESULT: "no_result_count",
+}
+
+# P&L column of the summaries for each trading result
+RESULT_PNL_COLUMNS = {
+    TradingResult.PROFIT_OVERALL: "profit_pnl",
+    TradingResult.LOSS_OVERALL: "loss_pnl",
+    TradingResult.LIQUIDATED: "liquidated_pnl",
+    TradingResult.BREAKEVEN: "breakeven_pnl",
+    TradingResult.NO_TRADE: "no_trade_pnl",
+    TradingResult.NO_RESULT: "no_result_pnl",
+}
+
+SUM_COLUMNS = [
+    "entries", *RESULT_COUNT_COLUMNS.values(), "total_pnl", "total_withdrawals", *RESULT_PNL_COLUMNS.values()
+]
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+def next_month(day: date) -> date:
+    return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+
+def book_month_key(account_id: Optional[int], day: Optional[date]) -> Optional[Tuple[int, date]]:
+    """(account_id, month) bucket a daily book belongs to"""
+    if account_id is None or day is None:
+        return None
+    return account_id, month_start(day)
+
+def month_aggregates(account_id: int, month: date):
+    """SELECT producing one monthly summary row from the raw daily books"""
+    withdraw = func.coalesce(TradingDailyBook.withdraw, 0.0)
+    pnl = TradingDailyBook.ending_balance - TradingDailyBook.starting_balance - withdraw
+    counts = [
+        func.coalesce(func.sum(case((TradingDailyBook.result == result, 1), else_=0)), 0).label(column)
+        for result, column in RESULT_COUNT_COLUMNS.items()
+    ]
+    result_pnls = [
+        func.coalesce(func.sum(case((TradingDailyBook.result == result, pnl), else_=0.0)), 0.0).label(column)
+        for result, column in RESULT_PNL_COLUMNS.items()
+    ]
+    return select(
+        TradingDailyBook.account_id,
+        literal(month, type_=AccountMonthlySummary.month.type).label("month"),
+        Account.user_id,
+        func.count(TradingDailyBook.id).label("entries"),
+        *counts,
+        func.coalesce(func.sum(pnl), 0.0).label("total_pnl"),
+        func.coalesce(func.sum(withdraw), 0.0).label("total_withdrawals"),
+        *result_pnls,
+        func.max(TradingDailyBook.ending_balance).label("peak_balance"),
+        func.max(TradingDailyBook.date).label("last_entry_date"),
+    ).join(
+        Account, Account.id == TradingDailyBook.account_id
+    ).filter(
+        TradingDailyBook.account_id == account_id,
+        TradingDailyBook.date >= month,
+        TradingDailyBook.date < next_month(month),
+    ).group_by(TradingDailyBook.account_id, Account.user_id)
+
+async def _refresh_month(db: AsyncSession, account_id: int, month: date) -> Set[int]:
+    """Re-aggregate one month; returns the owner, if the month has or had rows"""
+    deleted = await db.execute(delete(AccountMonthlySummary).where(
+        AccountMonthlySummary.account_id == account_id,
+        AccountMonthlySummary.month == month,
+    ).returning(AccountMonthlySummary.user_id))
+    columns = ["account_id", "month", "user_id", *SUM_COLUMNS, "peak_balance", "last_entry_date"]
+    inserted = await db.execute(
+        insert(AccountMonthlySummary).from_select(
+            columns, month_aggregates(account_id, month)
+        ).returning(AccountMonthlySummary.user_id)
+    )
+    return {*deleted.scalars(), *inserted.scalars()}
+
+async def _refresh_account(db: AsyncSession, account_id: int):
+    """Roll the monthly rows of an account up into its account-level row"""
+    await db.execute(delete(AccountSummary).where(AccountSummary.account_id == account_id))
+    monthly = AccountMonthlySummary
+    rollup = select(
+        monthly.account_id,
+        monthly.user_id,
+        *[func.sum(getattr(monthly, column)).label(column) for column in SUM_COLUMNS],
+        func.max(monthly.peak_balance).label("peak_balance"),
+        func.max(monthly.last_entry_date).label("last_entry_date"),
+    ).filter(monthly.account_id == account_id).group_by(monthly.account_id, monthly.user_id)
+    columns = ["account_id", "user_id", *SUM_COLUMNS, "peak_balance", "last_entry_date"]
+    await db.execute(insert(AccountSummary).from_select(columns, rollup))
+
+async def refresh_summaries(db: AsyncSession, keys: Iterable[Optional[Tuple[int, date]]]):
+    """
+    Recompute the summaries of the given (account_id, month) buckets.
+    Each month is re-aggregated from its own rows and the account row is
+    rolled up from its months, so the cost does not grow with the journal.
+    The month's version counter is bumped too, so cached calendar months
+    of it are recomputed. Runs inside the caller's transaction; the caller
+    commits.
+    """
+    buckets: Set[Tuple[int, date]] = {key for key in keys if key is not None}
+    if not buckets:
+        return
+    # Pending ORM changes must be visible to the aggregate queries
+    await db.flush()
+    changed: Dict[int, Set[str]] = {}
+    for account_id, month in sorted(buckets):
+        for user_id in await _refresh_month(db, account_id, month):
+            changed.setdefault(user_id, set()).add(month_collection(month))
+    for user_id, collections in sorted(changed.items()):
+        await bump_versions(db, user_id, *collections)
+    for account_id in sorted({account_id for account_id, _ in buckets}):
+        await _refresh_account(db, account_id)
+
+async def account_month_collections(db: AsyncSession, account_id: int) -> List[str]:
+    """Month version counters of every month the account has daily books in"""
+    result = await db.execute(select(AccountMonthlySummary.month).filter(
+        AccountMonthlySummary.account_id == account_id
+    ))
+    return [month_collection(month) for month in result.scalars()]
+
+async def rebuild_summaries(db: AsyncSession, account_id: Optional[int] = None) -> int:
+    """Backfill every summary (or those of one account) from the daily books"""
+    monthly_filter = []
+    account_filter = []
+    book_filter = []
+    if account_id is not None:
+        monthly_filter.append(AccountMonthlySummary.account_id == account_id)
+        account_filter.append(AccountSummary.account_id == account_id)
+        book_filter.append(TradingDailyBook.account_id == account_id)
+
+    await db.execute(delete(AccountMonthlySummary).where(*monthly_filter))
+    await db.execute(delete(AccountSummary).where(*account_filter))
+
+    result = await db.execute(
+        select(TradingDailyBook.account_id, TradingDailyBook.date).filter(*book_filter).distinct()
+    )
+    buckets = {book_month_key(row_account_id, day) for row_account_id, day in result.all()}
+    await refresh_summaries(db, buckets)
+    return len({key[0] for key in buckets if key is not None})
@@ -0,0 +1,10 @@
+"""
+Benchmarks seed and delete rows, so unless DATABASE_URL is set they run
+against a throwaway SQLite file, never the app's default database. This
+runs before any app module reads the setting.
+"""
+import os
+import tempfile
+
+if not os.getenv("DATABASE_URL"):
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp(prefix='tj-bench-')}/bench.db"
@@ -0,0 +1,382 @@
+"""
+Load-test every router against a seeded database and report JSON.
+
+Usage (from backend/):
+    python -m benchmarks.run [--users 5] [--accounts-per-user 2] [--years 2]
+                             [--plans-per-user 250] [--requests 200]
+                             [--concurrency 16] [--scenario NAME ...]
+                             [--base-url URL] [--output results.json]
+                             [--baseline previous.json] [--max-regression 0.25]
+                             [--keep-data] [--allow-remote-database]
+
+The app is driven in-process through httpx.ASGITransport unless --base-url
+points at a running server, which must use the same database. Data is
+seeded under bench-user-* accounts and removed afterwards unless
+--keep-data is given. Without DATABASE_URL that is a temporary SQLite
+file; a DATABASE_URL on a host other than localhost is refused unless
+--allow-remote-database says it is a throwaway database. Queries per request are read from
+the Server-Timing header added by the metrics middleware; streamed exports
+query after their headers are sent, so they report none.
+
+With --baseline, any route whose p95 latency grew by more than
+--max-regression (a fraction) over the baseline run fails the command.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import re
+import sys
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from time import perf_counter
+from typing import Callable, Dict, List
+
+import httpx
+import numpy as np
+
+from app.database.database import async_engine
+from benchmarks.seed import BENCH_PASSWORD, SeedVolumes, remove_seed, seed
+
+_SERVER_TIMING = re.compile(r'db;dur=([\d.]+);desc="(\d+) queries"')
+
+@dataclass
+class UserContext:
+    email: str
+    account_ids: List[int]
+    headers: Dict[str, str] = field(default_factory=dict)
+    book_ids: List[int] = field(default_factory=list)
+    plan_ids: List[int] = field(default_factory=list)
+
+class Recorder:
+    """Latency, status and database work of every request, grouped by route"""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+
+    async def call(self, client: httpx.AsyncClient, route: str, method: str, url: str, **kwargs) -> httpx.Response:
+        started = perf_counter()
+        response = await client.request(method, url, **kwargs)
+        elapsed = perf_counter() - started
+
+        timing = _SERVER_TIMING.search(response.headers.get("server-timing", ""))
+        db_ms, queries = (float(timing.group(1)), int(timing.group(2))) if timing else (None, None)
+        self.samples[route].append((elapsed, response.status_code, queries, db_ms))
+        return response
+
+    def report(self) -> Dict[str, dict]:
+        routes = {}
+        for route, samples in sorted(self.samples.items()):
+            latencies = np.array([sample[0] for sample in samples]) * 1000
+            queries = [sample[2] for sample in samples if sample[2] is not None]
+            db_ms = [sample[3] for sample in samples if sample[3] is not None]
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+            routes[route] = {
+                "requests": len(samples),
+                "errors": sum(1 for sample in samples if sample[1] >= 400),
+                "mean_ms": round(float(latencies.mean()), 3),
+                "p50_ms": round(float(p50), 3),
+                "p95_ms": round(float(p95), 3),
+                "p99_ms": round(float(p99), 3),
+                "queries_per_request": round(float(np.mean(queries)), 2) if queries else None,
+                "db_ms_per_request": round(float(np.mean(db_ms)), 3) if db_ms else None,
+            }
+        return routes
+
+# Scenarios: one iteration of a user journey, recorded route by route
+
+async def login(client, rec, user, rng):
+    await rec.call(client, "POST /auth/login", "POST", "/auth/login",
+                   data={"username": user.email, "password": BENCH_PASSWORD})
+
+async def read_profile(client, rec, user, rng):
+    await rec.call(client, "GET /users/me", "GET", "/users/me", headers=user.headers)
+
+async def read_accounts(client, rec, user, rng):
+    account_id = rng.choice(user.account_ids)
+    await rec.call(client, "GET /accounts/", "GET", "/accounts/", headers=user.headers)
+    await rec.call(client, "GET /accounts/{account_id}", "GET", f"/accounts/{account_id}", headers=user.headers)
+    await rec.call(client, "GET /accounts/{account_id}/ledger", "GET", f"/accounts/{account_id}/ledger",
+                   headers=user.headers)
+
+async def write_accounts(client, rec, user, rng):
+    account = {"account_name": "Bench scratch", "purpose": "Benchmark", "broker": "Bench", "account_balance": 1000.0}
+    response = await rec.call(client, "POST /accounts/", "POST", "/accounts/", json=account, headers=user.headers)
+    account_id = response.json()["id"]
+    await rec.call(client, "PUT /accounts/{account_id}", "PUT", f"/accounts/{account_id}",
+                   json={**account, "account_balance": 1500.0}, headers=user.headers)
+    await rec.call(client, "DELETE /accounts/{account_id}", "DELETE", f"/accounts/{account_id}", headers=user.headers)
+
+async def read_plans(client, rec, user, rng):
+    await rec.call(client, "GET /trading-plans/", "GET", "/trading-plans/", headers=user.headers)
+    await rec.call(client, "GET /trading-plans/{plan_id}", "GET", f"/trading-plans/{rng.choice(user.plan_ids)}",
+                   headers=user.headers)
+    await rec.call(client, "GET /trading-plans/instruments", "GET", "/trading-plans/instruments",
+                   headers=user.headers)
+
+async def export_plans(client, rec, user, rng):
+    await rec.call(client, "GET /trading-plans/export", "GET", "/trading-plans/export?format=ndjson",
+                   headers=user.headers)
+
+async def size_plans(client, rec, user, rng):
+    scenarios = [
+        {"account_balance": 10_000.0, "daily_target": rng.uniform(50, 500), "tp_pips": rng.uniform(5, 50),
+         "sl_pips": rng.uniform(5, 50), "instrument": rng.choice(["EURUSD", "XAUUSD", None])}
+        for _ in range(50)
+    ]
+    await rec.call(client, "POST /trading-plans/sizing", "POST", "/trading-plans/sizing",
+                   json={"scenarios": scenarios}, headers=user.headers)
+    await rec.call(client, "POST /trading-plans/projection", "POST", "/trading-plans/projection", json={
+        "account_balance": 10_000.0, "start_date": date.today().isoformat(), "days": 60, "daily_target": 1.0,
+        "risk_percentage": 1.0, "sl_pips": 20.0, "tp_pips": 20.0,
+    }, headers=user.headers)
+
+async def write_plans(client, rec, user, rng):
+    plan = {
+        "day": "Monday", "account_balance": 10_000.0, "daily_target": 100.0, "sl_pips": 20.0, "tp_pips": 20.0,
+        "plan_date": date.today().isoformat(),
+    }
+    response = await rec.call(client, "POST /trading-plans/", "POST", "/trading-plans/?derive=true",
+                              json=plan, headers=user.headers)
+    plan_id = response.json()["id"]
+    await rec.call(client, "PUT /trading-plans/{plan_id}", "PUT", f"/trading-plans/{plan_id}?derive=true",
+                   json={**plan, "daily_target": 150.0}, headers=user.headers)
+    await rec.call(client, "PATCH /trading-plans/{plan_id}/toggle-status", "PATCH",
+                   f"/trading-plans/{plan_id}/toggle-status", headers=user.headers)
+    await rec.call(client, "DELETE /trading-plans/{plan_id}", "DELETE", f"/trading-plans/{plan_id}",
+                   headers=user.headers)
+
+async def read_books(client, rec, user, rng):
+    response = await rec.call(client, "GET /trading-daily-books/", "GET", "/trading-daily-books/?limit=100",
+                              headers=user.headers)
+    cursor = response.headers.get("x-next-cursor")
+    if cursor:
+        await rec.call(client, "GET /trading-daily-books/?cursor", "GET",
+                       f"/trading-daily-books/?limit=100&cursor={cursor}", headers=user.headers)
+    await rec.call(client, "GET /trading-daily-books/?account_id", "GET",
+                   f"/trading-daily-books/?limit=100&account_id={rng.choice(user.account_ids)}", headers=user.headers)
+    await rec.call(client, "GET /trading-daily-books/accounts", "GET", "/trading-daily-books/accounts",
+                   headers=user.headers)
+    await rec.call(client, "GET /trading-daily-books/{book_id}", "GET",
+                   f"/trading-daily-books/{rng.choice(user.book_ids)}", headers=user.headers)
+
+async def export_books(client, rec, user, rng):
+    await rec.call(client, "GET /trading-daily-books/export", "GET", "/trading-daily-books/export?format=csv",
+                   headers=user.headers)
+
+async def write_books(client, rec, user, rng):
+    # Newest entry of the account, so the balance chain has nothing to shift
+    account_id = rng.choice(user.account_ids)
+    book = {
+        "date": (date.today() + timedelta(days=1)).isoformat(), "account_id": account_id,
+        "starting_balance": 10_000.0, "ending_balance": 10_050.0, "result": "Profit Overall",
+    }
+    response = await rec.call(client, "POST /trading-daily-books/", "POST", "/trading-daily-books/",
+                              json=book, headers=user.headers)
+    book_id = response.json()["id"]
+    await rec.call(client, "PUT /trading-daily-books/{book_id}", "PUT", f"/trading-daily-books/{book_id}",
+                   json={"ending_balance": 10_075.0}, headers=user.headers)
+    await rec.call(client, "DELETE /trading-daily-books/{book_id}", "DELETE", f"/trading-daily-books/{book_id}",
+                   headers=user.headers)
+
+async def import_books(client, rec, user, rng):
+    # Imports go into a scratch account that is deleted again
+    response = await rec.call(client, "POST /accounts/", "POST", "/accounts/", json={
+        "account_name": "Bench import", "purpose": "Benchmark", "broker": "Bench", "account_balance": 1000.0,
+    }, headers=user.headers)
+    account_id = response.json()["id"]
+    first_day = date.today() - timedelta(days=100)
+    lines = ["date,account_id,ending_balance,result"] + [
+        f"{(first_day + timedelta(days=day)).isoformat()},{account_id},{1000 + day * 5},Profit Overall"
+        for day in range(100)
+    ]
+    await rec.call(client, "POST /trading-daily-books/import", "POST", "/trading-daily-books/import?format=csv",
+                   files={"file": ("books.csv", "\n".join(lines).encode(), "text/csv")}, headers=user.headers)
+    await rec.call(client, "DELETE /accounts/{account_id}", "DELETE", f"/accounts/{account_id}", headers=user.headers)
+
+async def read_analytics(client, rec, user, rng):
+    await rec.call(client, "GET /analytics/accounts", "GET", "/analytics/accounts", headers=user.headers)
+    await rec.call(client, "GET /analytics/summaries", "GET", "/analytics/summaries", headers=user.headers)
+    await rec.call(client, "GET /analytics/summaries/monthly", "GET", "/analytics/summaries/monthly",
+                   headers=user.headers)
+
+async def search_books(client, rec, user, rng):
+    # Seeded summaries read "Day N session notes"; sentiments are single words
+    await rec.call(client, "GET /trading-daily-books/search", "GET", "/trading-daily-books/search",
+                   params={"q": rng.choice(["session notes", "calm", "anxious -confident", f'"day {rng.randrange(700)}"'])},
+                   headers=user.headers)
+
+async def read_dashboard(client, rec, user, rng):
+    await rec.call(client, "GET /dashboard/", "GET", "/dashboard/?recent=20", headers=user.headers)
+
+# name -> (scenario, share of --requests it runs); bcrypt-bound and bulk
+# routes run fewer iterations so one run stays a few minutes long
+SCENARIOS: Dict[str, tuple] = {
+    "login": (login, 0.1),
+    "read_profile": (read_profile, 1.0),
+    "read_accounts": (read_accounts, 1.0),
+    "write_accounts": (write_accounts, 0.5),
+    "read_plans": (read_plans, 1.0),
+    "export_plans": (export_plans, 0.25),
+    "size_plans": (size_plans, 0.5),
+    "write_plans": (write_plans, 0.5),
+    "read_books": (read_books, 1.0),
+    "export_books": (export_books, 0.1),
+    "write_books": (write_books, 0.5),
+    "import_books": (import_books, 0.1),
+    "read_analytics": (read_analytics, 0.5),
+    "read_dashboard": (read_dashboard, 1.0),
+    "search_books": (search_books, 1.0),
+}
+
+async def _prepare_users(client: httpx.AsyncClient, seeded) -> List[UserContext]:
+    users = []
+    for seeded_user in seeded:
+        user = UserContext(email=seeded_user.email, account_ids=seeded_user.account_ids)
+        response = await client.post("/auth/login", data={"username": user.email, "password": BENCH_PASSWORD})
+        response.raise_for_status()
+        user.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        books = await client.get("/trading-daily-books/?limit=500", headers=user.headers)
+        user.book_ids = [book["id"] for book in books.json()]
+        plans = await client.get("/trading-plans/", headers=user.headers)
+        user.plan_ids = [plan["id"] for plan in plans.json()]
+        users.append(user)
+    return users
+
+async def _run_scenario(
+    client: httpx.AsyncClient,
+    scenario: Callable,
+    iterations: int,
+    concurrency: int,
+    users: List[UserContext],
+    rng_seed: int,
+) -> dict:
+    rec = Recorder()
+    pending = iter(range(iterations))
+
+    async def worker(number: int):
+        rng = random.Random(rng_seed + number)
+        # Workers share one iterator, so exactly `iterations` journeys run
+        for iteration in pending:
+            await scenario(client, rec, users[iteration % len(users)], rng)
+
+    started = perf_counter()
+    await asyncio.gather(*(worker(number) for number in range(concurrency)))
+    elapsed = perf_counter() - started
+
+    routes = rec.report()
+    requests = sum(route["requests"] for route in routes.values())
+    return {
+        "iterations": iterations,
+        "elapsed_s": round(elapsed, 3),
+        "requests": requests,
+        "errors": sum(route["errors"] for route in routes.values()),
+        "throughput_rps": round(requests / elapsed, 2) if elapsed else None,
+        "routes": routes,
+    }
+
+def find_regressions(results: dict, baseline: dict, max_regression: float) -> List[str]:
+    """Routes whose p95 latency grew by more than max_regression over the baseline"""
+    regressions = []
+    for name, scenario in results["scenarios"].items():
+        baseline_routes = baseline.get("scenarios", {}).get(name, {}).get("routes", {})
+        for route, stats in scenario["routes"].items():
+            previous = baseline_routes.get(route)
+            if previous and previous["p95_ms"] and stats["p95_ms"] > previous["p95_ms"] * (1 + max_regression):
+                regressions.append(f"{route}: p95 {previous['p95_ms']} ms -> {stats['p95_ms']} ms")
+    return regressions
+
+async def run(args) -> dict:
+    volumes = SeedVolumes(args.users, args.accounts_per_user, args.years, args.plans_per_user)
+    print(f"Seeding {volumes.as_dict()}", file=sys.stderr)
+    seeded = await seed(volumes, rng_seed=args.seed, allow_remote=args.allow_remote_database)
+
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout)
+    else:
+        from app.main import app
+
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=args.timeout
+        )
+
+    results = {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "target": args.base_url or "in-process",
+        "python": platform.python_version(),
+        "database": async_engine.dialect.name,
+        "concurrency": args.concurrency,
+        "seed": volumes.as_dict(),
+        "scenarios": {},
+    }
+    try:
+        async with client:
+            users = await _prepare_users(client, seeded)
+            for name in args.scenario or SCENARIOS:
+                scenario, share = SCENARIOS[name]
+                iterations = max(1, int(args.requests * share))
+                print(f"Running {name} ({iterations} iterations)", file=sys.stderr)
+                results["scenarios"][name] = await _run_scenario(
+                    client, scenario, iterations, args.concurrency, users, args.seed
+                )
+    finally:
+        if not args.keep_data:
+            await remove_seed(args.allow_remote_database)
+        await async_engine.dispose()
+
+    scenarios = results["scenarios"].values()
+    elapsed = sum(scenario["elapsed_s"] for scenario in scenarios)
+    requests = sum(scenario["requests"] for scenario in scenarios)
+    results["totals"] = {
+        "requests": requests,
+        "errors": sum(scenario["errors"] for scenario in scenarios),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(requests / elapsed, 2) if elapsed else None,
+    }
+    return results
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run")
+    parser.add_argument("--users", type=int, default=5, help="Users to seed")
+    parser.add_argument("--accounts-per-user", type=int, default=2, help="Accounts seeded per user")
+    parser.add_argument("--years", type=float, default=2.0, help="Years of daily books per account")
+    parser.add_argument("--plans-per-user", type=int, default=250, help="Trading plans seeded per user")
+    parser.add_argument("--requests", type=int, default=200, help="Iterations of a full-weight scenario")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS), help="Only run these scenarios")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for data and request mix")
+    parser.add_argument("--base-url", default=None, help="Benchmark a running server instead of in-process")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout in seconds")
+    parser.add_argument("--output", default=None, help="Write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", default=None, help="Previous JSON report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.25, help="Allowed p95 growth over the baseline")
+    parser.add_argument("--keep-data", action="store_true", help="Leave the seeded data in place")
+    parser.add_argument(
+        "--allow-remote-database", action="store_true", help="Seed a non-local DATABASE_URL (throwaway databases only)"
+    )
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    results = asyncio.run(run(args))
+
+    report = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as output:
+            output.write(report + "\n")
+    else:
+        print(report)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = find_regressions(results, json.load(baseline_file), args.max_regression)
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
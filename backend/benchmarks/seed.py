@@ -0,0 +1,173 @@
+import random
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Dict, List
+
+from sqlalchemy import delete, insert, select, update
+
+from app.database.database import AsyncSessionLocal, async_engine, init_db
+from app.models.account import Account
+from app.models.trading_daily_book import TradingDailyBook, TradingResult
+from app.models.trading_plan import TradingPlan
+from app.models.user import User
+from app.utils.auth import get_password_hash
+from app.utils.summaries import rebuild_summaries
+
+# Seeded users are recognisable (and removable) by this email prefix
+BENCH_EMAIL_PREFIX = "bench-user"
+BENCH_PASSWORD = "bench-password"
+
+# Rows sent per executemany while seeding
+SEED_BATCH_SIZE = 5000
+
+# Database hosts seeded and cleaned up without allow_remote
+LOCAL_HOSTS = ("localhost", "127.0.0.1", "::1")
+
+WEEKDAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+@dataclass
+class SeededUser:
+    email: str
+    account_ids: List[int] = field(default_factory=list)
+
+@dataclass
+class SeedVolumes:
+    users: int
+    accounts_per_user: int
+    years: float
+    plans_per_user: int
+
+    @property
+    def days(self) -> int:
+        return max(1, int(self.years * 365))
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "users": self.users,
+            "accounts_per_user": self.accounts_per_user,
+            "years": self.years,
+            "plans_per_user": self.plans_per_user,
+            "daily_books": self.users * self.accounts_per_user * self.days,
+            "trading_plans": self.users * self.plans_per_user,
+        }
+
+def _book_rows(rng: random.Random, account_id: int, user_id: int, days: int, first_day: date):
+    balance = 10_000.0
+    for day in range(days):
+        change = round(rng.gauss(15, 120), 2)
+        withdraw = 100.0 if day % 30 == 29 else 0.0
+        ending = round(balance + change - withdraw, 2)
+        if change > 0:
+            result = TradingResult.PROFIT_OVERALL
+        elif change < 0:
+            result = TradingResult.LOSS_OVERALL
+        else:
+            result = TradingResult.BREAKEVEN
+        yield {
+            "date": first_day + timedelta(days=day),
+            "starting_balance": balance,
+            "ending_balance": ending,
+            "withdraw": withdraw,
+            "result": result,
+            "sentiment": rng.choice(["Calm", "Anxious", "Confident", None]),
+            "summary": f"Day {day} session notes",
+            "remarks": None,
+            "account_id": account_id,
+            "user_id": user_id,
+        }
+        balance = ending
+
+def _plan_rows(user_id: int, plans: int, first_day: date):
+    for day in range(plans):
+        plan_date = first_day + timedelta(days=day)
+        yield {
+            "day": WEEKDAY_NAMES[plan_date.weekday()],
+            "account_balance": 10_000.0,
+            "daily_target": 100.0,
+            "required_lots": 0.5,
+            "rounded_lots": 0.5,
+            "risk_amount": 100.0,
+            "risk_percentage": 1.0,
+            "sl_pips": 20.0,
+            "tp_pips": 20.0,
+            "status": day % 3 == 0,
+            "plan_date": plan_date,
+            "user_id": user_id,
+        }
+
+async def _insert_batched(db, model, rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= SEED_BATCH_SIZE:
+            await db.execute(insert(model), batch)
+            batch = []
+    if batch:
+        await db.execute(insert(model), batch)
+
+def check_bench_database(allow_remote: bool = False):
+    """Refuse to write to any database but SQLite or a local server, unless allowed"""
+    url = async_engine.url
+    if allow_remote or url.get_backend_name() == "sqlite" or url.host in LOCAL_HOSTS:
+        return
+    raise RuntimeError(
+        f"Refusing to seed {url.render_as_string(hide_password=True)}: point DATABASE_URL at a "
+        "local or throwaway database, or pass --allow-remote-database if it is one"
+    )
+
+async def remove_seed(allow_remote: bool = False):
+    """Delete every benchmark user and everything they own"""
+    check_bench_database(allow_remote)
+    async with AsyncSessionLocal() as db:
+        user_ids = select(User.id).where(User.email.like(f"{BENCH_EMAIL_PREFIX}-%")).scalar_subquery()
+        # Accounts take their books, summaries and ledger with them
+        await db.execute(delete(Account).where(Account.user_id.in_(user_ids)))
+        await db.execute(delete(TradingDailyBook).where(TradingDailyBook.user_id.in_(user_ids)))
+        await db.execute(delete(TradingPlan).where(TradingPlan.user_id.in_(user_ids)))
+        await db.execute(delete(User).where(User.email.like(f"{BENCH_EMAIL_PREFIX}-%")))
+        await db.commit()
+
+async def seed(volumes: SeedVolumes, rng_seed: int = 42, allow_remote: bool = False) -> List[SeededUser]:
+    """
+    Replace any previous benchmark data with users x accounts x years of
+    daily books x plans, generated deterministically from rng_seed.
+    """
+    check_bench_database(allow_remote)
+    rng = random.Random(rng_seed)
+    first_day = date.today() - timedelta(days=volumes.days)
+    await init_db()
+    await remove_seed(allow_remote)
+
+    # Every seeded user shares one hash so seeding does not pay bcrypt per user
+    hashed_password = get_password_hash(BENCH_PASSWORD)
+    seeded = []
+    async with AsyncSessionLocal() as db:
+        for n in range(volumes.users):
+            email = f"{BENCH_EMAIL_PREFIX}-{n}@example.com"
+            user_id = await db.scalar(insert(User).values(
+                email=email, username=f"{BENCH_EMAIL_PREFIX}-{n}", hashed_password=hashed_password, is_active=True,
+            ).returning(User.id))
+            user = SeededUser(email=email)
+
+            for a in range(volumes.accounts_per_user):
+                account_id = await db.scalar(insert(Account).values(
+                    account_name=f"Bench account {a}", purpose="Benchmark", broker="Bench",
+                    account_balance=0.0, user_id=user_id,
+                ).returning(Account.id))
+                user.account_ids.append(account_id)
+                rows = list(_book_rows(rng, account_id, user_id, volumes.days, first_day))
+                await _insert_batched(db, TradingDailyBook, rows)
+                await db.execute(
+                    update(Account).where(Account.id == account_id).values(account_balance=rows[-1]["ending_balance"])
+                )
+
+            await _insert_batched(db, TradingPlan, _plan_rows(user_id, volumes.plans_per_user, first_day))
+            await db.commit()
+            seeded.append(user)
+
+        for user in seeded:
+            for account_id in user.account_ids:
+                await rebuild_summaries(db, account_id=account_id)
+        await db.commit()
+
+    return seeded
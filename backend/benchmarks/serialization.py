@@ -0,0 +1,135 @@
+"""
+Measure the per-row cost of the list endpoints' response path, with and
+without FAST_LIST_RESPONSES, and report JSON.
+
+Usage (from backend/):
+    python -m benchmarks.serialization [--rows 100 --rows 1000 ...]
+                                       [--repeat 7] [--output results.json]
+
+Rows are generated into a private in-memory SQLite database, so no seeded
+or configured database is needed. For each size, "orm" loads ORM instances
+and serializes them exactly as FastAPI does for response_model=List[...];
+"fast" selects only the schema's columns and uses encode_rows(). Times are
+the median over --repeat runs, each in a fresh session.
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+from datetime import date
+from time import perf_counter
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.database.database import Base
+from app.models.schemas import TradingDailyBook as TradingDailyBookSchema, TradingPlan as TradingPlanSchema
+from app.models.trading_daily_book import TradingDailyBook
+from app.models.trading_plan import TradingPlan
+from app.routes import trading_daily_books, trading_plans
+from app.utils.serialization import encode_rows, schema_columns
+from benchmarks.seed import _book_rows, _plan_rows
+
+# (name, model, schema, route whose response field the ORM path serializes through)
+TARGETS = (
+    ("trading_daily_books", TradingDailyBook, TradingDailyBookSchema, trading_daily_books.get_trading_daily_books),
+    ("trading_plans", TradingPlan, TradingPlanSchema, trading_plans.get_trading_plans),
+)
+
+def _response_field(endpoint):
+    for router in (trading_daily_books.router, trading_plans.router):
+        for route in router.routes:
+            if getattr(route, "endpoint", None) is endpoint:
+                return route.secure_cloned_response_field or route.response_field
+    raise LookupError(endpoint.__name__)
+
+async def _orm_path(session_factory, model, field, rows: int):
+    async with session_factory() as db:
+        started = perf_counter()
+        result = await db.execute(select(model).order_by(model.id).limit(rows))
+        instances = result.scalars().all()
+        fetched = perf_counter()
+        content = await serialize_response(field=field, response_content=instances)
+        body = JSONResponse(content).body
+        return fetched - started, perf_counter() - fetched, len(body)
+
+async def _fast_path(session_factory, model, schema, rows: int):
+    async with session_factory() as db:
+        started = perf_counter()
+        result = await db.execute(select(*schema_columns(schema, model)).order_by(model.id).limit(rows))
+        column_rows = result.all()
+        fetched = perf_counter()
+        body = encode_rows(schema, column_rows)
+        return fetched - started, perf_counter() - fetched, len(body)
+
+def _summarize(samples, rows: int) -> dict:
+    fetch = statistics.median(sample[0] for sample in samples)
+    encode = statistics.median(sample[1] for sample in samples)
+    return {
+        "fetch_ms": round(fetch * 1000, 3),
+        "encode_ms": round(encode * 1000, 3),
+        "total_ms": round((fetch + encode) * 1000, 3),
+        "us_per_row": round((fetch + encode) / rows * 1_000_000, 3),
+        "body_bytes": samples[0][2],
+    }
+
+async def run(args) -> dict:
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:", poolclass=StaticPool, connect_args={"check_same_thread": False}
+    )
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    largest = max(args.rows)
+
+    async with engine.begin() as connection:
+        from app.models import user, account, account_summary, balance_ledger, collection_version  # noqa: F401
+        await connection.run_sync(Base.metadata.create_all)
+        rng = random.Random(args.seed)
+        await connection.execute(insert(TradingDailyBook), list(_book_rows(rng, 1, 1, largest, date(2000, 1, 1))))
+        await connection.execute(insert(TradingPlan), list(_plan_rows(1, largest, date(2000, 1, 1))))
+
+    results = {}
+    for name, model, schema, endpoint in TARGETS:
+        field = _response_field(endpoint)
+        results[name] = {}
+        for rows in args.rows:
+            # One untimed pass of each path warms caches and the TypeAdapter
+            await _orm_path(session_factory, model, field, rows)
+            await _fast_path(session_factory, model, schema, rows)
+            orm = [await _orm_path(session_factory, model, field, rows) for _ in range(args.repeat)]
+            fast = [await _fast_path(session_factory, model, schema, rows) for _ in range(args.repeat)]
+            orm, fast = _summarize(orm, rows), _summarize(fast, rows)
+            results[name][str(rows)] = {
+                "orm": orm,
+                "fast": fast,
+                "speedup": round(orm["total_ms"] / fast["total_ms"], 2) if fast["total_ms"] else None,
+            }
+
+    await engine.dispose()
+    return {"repeat": args.repeat, "results": results}
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.serialization")
+    parser.add_argument("--rows", type=int, action="append", help="Rows per response (repeatable)")
+    parser.add_argument("--repeat", type=int, default=7, help="Timed runs per size and path")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for the generated rows")
+    parser.add_argument("--output", default=None, help="Write the JSON report here instead of stdout")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.rows = args.rows or [100, 1000, 10000]
+    report = json.dumps(asyncio.run(run(args)), indent=2)
+    if args.output:
+        with open(args.output, "w") as output:
+            output.write(report + "\n")
+    else:
+        print(report)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
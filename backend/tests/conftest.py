@@ -0,0 +1,49 @@
+import os
+import tempfile
+import uuid
+
+import pytest
+
+# Point the app at a throwaway SQLite file before anything imports it
+_DB_DIR = tempfile.mkdtemp(prefix="tj-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB_DIR}/test.db"
+os.environ["DB_INIT_ON_STARTUP"] = "1"
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.main import app  # noqa: E402
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as test_client:
+        yield test_client
+
+@pytest.fixture
+def auth_headers(client):
+    """Headers of a freshly registered user, so tests never share data"""
+    name = uuid.uuid4().hex[:12]
+    email = f"{name}@example.com"
+    client.post("/auth/register", json={"email": email, "username": name, "password": "pw"})
+    token = client.post("/auth/login", data={"username": email, "password": "pw"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+@pytest.fixture
+def create_account(client, auth_headers):
+    def create(balance=100.0):
+        response = client.post("/accounts/", json={
+            "account_name": "Test", "purpose": "Testing", "broker": "Broker", "account_balance": balance,
+        }, headers=auth_headers)
+        assert response.status_code == 201, response.text
+        return response.json()["id"]
+    return create
+
+@pytest.fixture
+def create_book(client, auth_headers):
+    def create(account_id, day, starting_balance, ending_balance, result="Profit Overall"):
+        response = client.post("/trading-daily-books/", json={
+            "date": day, "account_id": account_id, "starting_balance": starting_balance,
+            "ending_balance": ending_balance, "result": result,
+        }, headers=auth_headers)
+        assert response.status_code == 201, response.text
+        return response.json()["id"]
+    return create
@@ -0,0 +1,55 @@
+def test_token_resolves_the_current_user(client, auth_headers):
+    response = client.get("/users/me", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["is_active"] is True
+
+    # A second request is served from the principal cache with the same result
+    assert client.get("/users/me", headers=auth_headers).json() == response.json()
+
+def test_invalid_token_is_rejected(client):
+    response = client.get("/users/me", headers={"Authorization": "Bearer not-a-token"})
+    assert response.status_code == 401
+
+def test_register_is_shed_when_the_hash_queue_is_full(client, monkeypatch):
+    from app.utils import hashing
+
+    user = {"email": "shed@example.com", "username": "shed", "password": "pw"}
+    monkeypatch.setattr(hashing, "PASSWORD_HASH_QUEUE_LIMIT", 0)
+    response = client.post("/auth/register", json=user)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == hashing.PASSWORD_HASH_RETRY_AFTER
+    assert hashing.pending_password_jobs() == 0
+
+    # Nothing was created, so the same registration goes through once there is room
+    monkeypatch.setattr(hashing, "PASSWORD_HASH_QUEUE_LIMIT", 32)
+    assert client.post("/auth/register", json=user).status_code == 200
+
+def test_deactivated_users_cached_token_is_rejected(client, auth_headers):
+    from sqlalchemy import select
+
+    from app.database.database import AsyncSessionLocal
+    from app.models.user import User
+    from app.utils.auth import principal_cache
+
+    me = client.get("/users/me", headers=auth_headers).json()
+    token = auth_headers["Authorization"].removeprefix("Bearer ")
+    assert principal_cache.get(token) is not None
+
+    async def deactivate(flush_only):
+        async with AsyncSessionLocal() as db:
+            user = (await db.execute(select(User).filter(User.id == me["id"]))).scalars().one()
+            user.is_active = False
+            await db.flush()
+            # Still cached while the change is uncommitted
+            assert principal_cache.get(token) is not None
+            if not flush_only:
+                await db.commit()
+
+    # A rolled-back change keeps the token valid
+    client.portal.call(deactivate, True)
+    assert client.get("/users/me", headers=auth_headers).status_code == 200
+
+    client.portal.call(deactivate, False)
+    response = client.get("/users/me", headers=auth_headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Inactive user"
@@ -0,0 +1,100 @@
+def _monthly(client, auth_headers):
+    rows = client.get("/analytics/summaries/monthly", headers=auth_headers).json()
+    return {(row["account_id"], row["month"]): row["entries"] for row in rows}
+
+def _totals(client, auth_headers):
+    rows = client.get("/analytics/summaries", headers=auth_headers).json()
+    return {row["account_id"]: row["entries"] for row in rows}
+
+def _calendar_entries(client, auth_headers, month):
+    months = client.get("/analytics/calendar", params={"from": month, "to": month}, headers=auth_headers).json()
+    return months[0]["entries"]
+
+def test_delete_latest_entry_refreshes_summaries(client, auth_headers, create_account, create_book):
+    account_id = create_account()
+    create_book(account_id, "2024-08-30", 100, 110)
+    create_book(account_id, "2024-09-02", 110, 120)
+    latest = create_book(account_id, "2024-09-03", 120, 130)
+    # Cache the closed month before the delete
+    assert _calendar_entries(client, auth_headers, "2024-09") == 2
+
+    assert client.delete(f"/trading-daily-books/{latest}", headers=auth_headers).status_code == 204
+
+    assert _monthly(client, auth_headers)[(account_id, "2024-09-01")] == 1
+    assert _totals(client, auth_headers)[account_id] == 2
+    assert _calendar_entries(client, auth_headers, "2024-09") == 1
+
+def test_move_latest_entry_to_earlier_month_refreshes_both_months(client, auth_headers, create_account, create_book):
+    account_id = create_account()
+    create_book(account_id, "2024-08-30", 100, 110)
+    latest = create_book(account_id, "2024-09-03", 110, 120)
+    assert _calendar_entries(client, auth_headers, "2024-09") == 1
+
+    response = client.put(f"/trading-daily-books/{latest}", json={"date": "2024-08-31"}, headers=auth_headers)
+    assert response.status_code == 200
+
+    monthly = _monthly(client, auth_headers)
+    assert monthly[(account_id, "2024-08-01")] == 2
+    assert (account_id, "2024-09-01") not in monthly
+    assert _totals(client, auth_headers)[account_id] == 2
+    assert _calendar_entries(client, auth_headers, "2024-09") == 0
+    assert _calendar_entries(client, auth_headers, "2024-08") == 2
+
+def test_move_latest_entry_to_another_account_refreshes_both_accounts(client, auth_headers, create_account, create_book):
+    first_account = create_account()
+    second_account = create_account()
+    create_book(first_account, "2024-09-02", 100, 110)
+    latest = create_book(first_account, "2024-09-03", 110, 120)
+
+    response = client.put(f"/trading-daily-books/{latest}", json={"account_id": second_account}, headers=auth_headers)
+    assert response.status_code == 200
+
+    monthly = _monthly(client, auth_headers)
+    assert monthly[(first_account, "2024-09-01")] == 1
+    assert monthly[(second_account, "2024-09-01")] == 1
+    totals = _totals(client, auth_headers)
+    assert totals == {first_account: 1, second_account: 1}
+    assert _calendar_entries(client, auth_headers, "2024-09") == 2
+
+def _account_books(client, auth_headers, account_id):
+    books = client.get("/trading-daily-books/", params={"account_id": account_id}, headers=auth_headers).json()
+    return {book["id"]: (book["date"], book["starting_balance"], book["ending_balance"]) for book in books}
+
+def test_move_with_new_ending_balance_keeps_the_clients_balance(client, auth_headers, create_account, create_book):
+    account_id = create_account()
+    first = create_book(account_id, "2024-10-01", 100, 110)
+    second = create_book(account_id, "2024-10-02", 110, 144)
+    third = create_book(account_id, "2024-10-03", 144, 150)
+
+    # Move the second entry after the third and set its ending balance
+    response = client.put(
+        f"/trading-daily-books/{second}", json={"date": "2024-10-04", "ending_balance": 500}, headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert response.json()["ending_balance"] == 500
+
+    assert _account_books(client, auth_headers, account_id) == {
+        first: ("2024-10-01", 100, 110),
+        third: ("2024-10-03", 110, 116),
+        second: ("2024-10-04", 116, 500),
+    }
+    account = client.get(f"/accounts/{account_id}", headers=auth_headers).json()
+    assert account["account_balance"] == 500
+
+def test_move_to_another_account_with_new_ending_balance(client, auth_headers, create_account, create_book):
+    first_account = create_account()
+    second_account = create_account()
+    moved = create_book(first_account, "2024-10-01", 100, 120)
+    create_book(second_account, "2024-09-30", 100, 130)
+    later = create_book(second_account, "2024-10-02", 130, 140)
+
+    response = client.put(
+        f"/trading-daily-books/{moved}", json={"account_id": second_account, "ending_balance": 200}, headers=auth_headers
+    )
+    assert response.status_code == 200
+
+    books = _account_books(client, auth_headers, second_account)
+    assert books[moved] == ("2024-10-01", 130, 200)
+    assert books[later] == ("2024-10-02", 200, 210)
+    account = client.get(f"/accounts/{second_account}", headers=auth_headers).json()
+    assert account["account_balance"] == 210
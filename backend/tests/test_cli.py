@@ -0,0 +1,81 @@
+import os
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+def _cli(database_url, *args):
+    """Run the CLI in a fresh interpreter, where only app.cli has been imported"""
+    return subprocess.run(
+        [sys.executable, "-m", "app.cli", *args],
+        cwd=BACKEND_DIR,
+        env={**os.environ, "DATABASE_URL": database_url},
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+
+def test_rebuild_summaries_command(tmp_path):
+    database_url = f"sqlite:///{tmp_path}/cli.db"
+    assert _cli(database_url, "init-db").returncode == 0
+
+    result = _cli(database_url, "rebuild-summaries")
+    assert result.returncode == 0, result.stderr
+    assert "Rebuilt summaries for 0 account(s)" in result.stdout
+
+def test_rebuild_summaries_command_restores_summaries(client, auth_headers, create_account, create_book):
+    account_id = create_account()
+    create_book(account_id, "2024-03-04", 100, 120)
+    create_book(account_id, "2024-04-01", 120, 90, result="Loss Overall")
+
+    result = _cli(os.environ["DATABASE_URL"], "rebuild-summaries", "--account-id", str(account_id))
+    assert result.returncode == 0, result.stderr
+    assert "Rebuilt summaries for 1 account(s)" in result.stdout
+
+    summaries = client.get("/analytics/summaries", headers=auth_headers).json()
+    assert [(row["account_id"], row["entries"], row["total_pnl"]) for row in summaries] == [(account_id, 2, -10.0)]
+
+def test_init_db_adds_new_columns_and_rebuilds_summaries(tmp_path):
+    database_url = f"sqlite:///{tmp_path}/upgrade.db"
+    assert _cli(database_url, "init-db").returncode == 0
+
+    # A database from before the per-result P&L columns existed
+    connection = sqlite3.connect(tmp_path / "upgrade.db")
+    with connection:
+        connection.execute("INSERT INTO users (id, username, email, is_active) VALUES (1, 'old', 'old@example.com', 1)")
+        connection.execute("INSERT INTO accounts (id, account_name, account_balance, user_id) VALUES (1, 'Old', 80, 1)")
+        connection.executemany(
+            "INSERT INTO trading_daily_books (date, starting_balance, ending_balance, withdraw, result, account_id, user_id) "
+            "VALUES (?, ?, ?, 0, ?, 1, 1)",
+            [("2024-01-02", 100, 120, "PROFIT_OVERALL"), ("2024-01-03", 120, 80, "LOSS_OVERALL")],
+        )
+        for table in ("account_summaries", "account_monthly_summaries"):
+            for column in ("profit_pnl", "loss_pnl", "liquidated_pnl", "breakeven_pnl", "no_trade_pnl", "no_result_pnl"):
+                connection.execute(f"ALTER TABLE {table} DROP COLUMN {column}")
+        connection.execute("ALTER TABLE accounts DROP COLUMN pending_delete")
+    connection.close()
+
+    result = _cli(database_url, "init-db")
+    assert result.returncode == 0, result.stderr
+
+    connection = sqlite3.connect(tmp_path / "upgrade.db")
+    row = connection.execute("SELECT entries, profit_pnl, loss_pnl FROM account_summaries WHERE account_id = 1").fetchone()
+    pending_delete = connection.execute("SELECT pending_delete FROM accounts WHERE id = 1").fetchone()
+    connection.close()
+    assert row == (2, 20.0, -40.0)
+    assert pending_delete == (0,)
+
+    # Running it again finds nothing left to add
+    result = _cli(database_url, "init-db")
+    assert result.returncode == 0, result.stderr
+
+def test_check_indexes_command(tmp_path):
+    database_url = f"sqlite:///{tmp_path}/indexes.db"
+    assert _cli(database_url, "init-db").returncode == 0
+
+    result = _cli(database_url, "check-indexes", "--users", "10", "--books-per-account", "50")
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "ok        GET /trading-daily-books/{id}" in result.stdout
+    assert "Every route query is served by an index" in result.stdout
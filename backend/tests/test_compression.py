@@ -0,0 +1,42 @@
+import asyncio
+import zlib
+
+from app.utils.compression import CompressionMiddleware
+
+ROWS = [b"id,date,result\n", b"1,2024-01-02,Profit Overall\n", b"2,2024-01-03,Loss Overall\n"]
+
+async def _streaming_csv(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/csv")]})
+    for row in ROWS:
+        await send({"type": "http.response.body", "body": row, "more_body": True})
+    await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+def _run(app):
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "headers": [(b"accept-encoding", b"gzip")]}
+    asyncio.run(app(scope, receive, send))
+    return messages
+
+def test_streamed_chunks_decode_as_they_arrive():
+    messages = _run(CompressionMiddleware(_streaming_csv))
+    assert (b"content-encoding", b"gzip") in messages[0]["headers"]
+
+    decoder = zlib.decompressobj(31)
+    bodies = [message["body"] for message in messages[1:]]
+    # Every row is readable from its own chunk, before the stream ends
+    for row, body in zip(ROWS, bodies):
+        assert decoder.decompress(body) == row
+    assert decoder.decompress(b"".join(bodies[len(ROWS):])) == b""
+    assert decoder.eof
+
+def test_whole_response_compresses_in_one_body(client):
+    response = client.get("/openapi.json", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.json()["info"]
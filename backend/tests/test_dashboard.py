@@ -0,0 +1,22 @@
+def test_dashboard_results_come_from_summaries(client, auth_headers, create_account, create_book):
+    first_account = create_account()
+    second_account = create_account()
+    create_book(first_account, "2024-02-01", 100, 150)
+    create_book(first_account, "2024-02-02", 150, 140, result="Loss Overall")
+    create_book(second_account, "2024-02-01", 100, 130)
+    create_book(second_account, "2024-03-01", 130, 0, result="Liquidated")
+
+    results = client.get("/dashboard/", headers=auth_headers).json()["results"]
+    assert results == {
+        "Profit Overall": {"count": 2, "pnl": 80.0},
+        "Loss Overall": {"count": 1, "pnl": -10.0},
+        "Liquidated": {"count": 1, "pnl": -130.0},
+    }
+
+    summaries = client.get("/analytics/summaries", headers=auth_headers).json()
+    assert [(row["account_id"], row["profit_pnl"], row["loss_pnl"]) for row in summaries] == [
+        (first_account, 50.0, -10.0), (second_account, 30.0, 0.0),
+    ]
+
+def test_dashboard_without_entries_has_no_results(client, auth_headers):
+    assert client.get("/dashboard/", headers=auth_headers).json()["results"] == {}
@@ -0,0 +1,100 @@
+import pytest
+
+PLAN = {
+    "day": "Monday", "account_balance": 1000, "daily_target": 10, "sl_pips": 20, "tp_pips": 40,
+    "plan_date": "2024-07-01",
+}
+
+def _etag(client, auth_headers, url):
+    response = client.get(url, headers={**auth_headers, "Accept-Encoding": "identity"})
+    assert response.status_code == 200
+    return response.headers["ETag"]
+
+def _revalidate(client, auth_headers, url, etag, **headers):
+    return client.get(url, headers={**auth_headers, "If-None-Match": etag, **headers})
+
+def test_unchanged_list_answers_304(client, auth_headers, create_account):
+    create_account()
+    etag = _etag(client, auth_headers, "/accounts/")
+
+    response = _revalidate(client, auth_headers, "/accounts/", etag, **{"Accept-Encoding": "identity"})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+
+    # Another URL, or another user, never shares the tag
+    assert _revalidate(client, auth_headers, "/accounts/?x=1", etag).status_code == 200
+
+@pytest.mark.parametrize("write", [
+    "create_account", "update_account", "create_book", "update_book", "delete_book", "import_books",
+])
+def test_every_write_bumps_the_version(client, auth_headers, create_account, create_book, write):
+    account_id = create_account()
+    book_id = create_book(account_id, "2024-07-01", 0, 120)
+    urls = ["/accounts/", f"/accounts/{account_id}", "/trading-daily-books/"]
+    etags = {url: _etag(client, auth_headers, url) for url in urls}
+
+    if write == "create_account":
+        create_account()
+    elif write == "update_account":
+        response = client.put(f"/accounts/{account_id}", json={
+            "account_name": "Renamed", "purpose": "Testing", "broker": "Broker", "account_balance": 120,
+        }, headers=auth_headers)
+        assert response.status_code == 200
+    elif write == "create_book":
+        create_book(account_id, "2024-07-02", 0, 130)
+    elif write == "update_book":
+        response = client.put(f"/trading-daily-books/{book_id}", json={"remarks": "x"}, headers=auth_headers)
+        assert response.status_code == 200
+    elif write == "delete_book":
+        assert client.delete(f"/trading-daily-books/{book_id}", headers=auth_headers).status_code == 204
+    else:
+        upload = f"date,account_id,ending_balance\n2024-07-03,{account_id},140\n"
+        response = client.post(
+            "/trading-daily-books/import", files={"file": ("books.csv", upload, "text/csv")}, headers=auth_headers
+        )
+        assert response.json()["imported"] == 1
+
+    changed = [url for url in urls if _revalidate(client, auth_headers, url, etags[url]).status_code == 200]
+    expected = {
+        "create_account": ["/accounts/", f"/accounts/{account_id}"],
+        "update_account": ["/accounts/", f"/accounts/{account_id}"],
+    }.get(write, urls)
+    assert changed == expected
+
+def test_plan_writes_bump_the_plan_version(client, auth_headers):
+    response = client.post("/trading-plans/", json=PLAN, headers=auth_headers)
+    assert response.status_code == 201, response.text
+    plan_id = response.json()["id"]
+
+    for method, url, body in [
+        ("put", f"/trading-plans/{plan_id}", {**PLAN, "reason": "Updated"}),
+        ("patch", f"/trading-plans/{plan_id}/toggle-status", None),
+        ("delete", f"/trading-plans/{plan_id}", None),
+    ]:
+        etag = _etag(client, auth_headers, "/trading-plans/")
+        response = client.request(method.upper(), url, json=body, headers=auth_headers)
+        assert response.status_code < 300, response.text
+        assert _revalidate(client, auth_headers, "/trading-plans/", etag).status_code == 200
+
+def test_compressed_response_revalidates_with_either_tag(client, auth_headers, create_account, create_book):
+    account_id = create_account()
+    for day in range(1, 21):
+        create_book(account_id, f"2024-08-{day:02d}", 0, 100 + day)
+    url = "/trading-daily-books/"
+    identity = _etag(client, auth_headers, url)
+
+    response = client.get(url, headers={**auth_headers, "Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    gzip_etag = response.headers["ETag"]
+    assert gzip_etag == identity[:-1] + '-gzip"'
+
+    # The compressed variant's tag and the identity tag both match, and the
+    # 304 echoes the tag the client sent
+    for etag in (gzip_etag, f"W/{gzip_etag}", identity):
+        response = _revalidate(client, auth_headers, url, etag, **{"Accept-Encoding": "gzip"})
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag.removeprefix("W/")
+
+    create_book(account_id, "2024-08-21", 0, 150)
+    assert _revalidate(client, auth_headers, url, gzip_etag, **{"Accept-Encoding": "gzip"}).status_code == 200
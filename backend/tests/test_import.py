@@ -0,0 +1,72 @@
+def _import(client, auth_headers, name, content, content_type):
+    response = client.post(
+        "/trading-daily-books/import", files={"file": (name, content, content_type)}, headers=auth_headers
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def test_csv_import_reports_invalid_rows_and_keeps_the_rest(client, auth_headers, create_account):
+    account_id = create_account(balance=100.0)
+    result = _import(client, auth_headers, "books.csv", "\n".join([
+        "date,account_id,ending_balance,result",
+        f"2024-05-01,{account_id},110,Profit Overall",
+        f"not-a-date,{account_id},120,Profit Overall",
+        f"2024-05-02,{account_id},,Profit Overall",
+        "2024-05-03,999999,130,Profit Overall",
+        f"2024-05-04,{account_id},140,Profit Overall",
+    ]), "text/csv")
+
+    assert result["imported"] == 2
+    assert result["failed"] == 3
+    assert [error["row"] for error in result["errors"]] == [2, 3, 4]
+    assert result["errors"][0]["error"].startswith("date:")
+    assert result["errors"][1]["error"].startswith("ending_balance:")
+    assert result["errors"][2]["error"] == "Account not found or does not belong to you"
+
+    # Skipped rows leave no gap in the chain
+    books = client.get("/trading-daily-books/", params={"account_id": account_id}, headers=auth_headers).json()
+    assert [(book["date"], book["starting_balance"], book["ending_balance"]) for book in books] == [
+        ("2024-05-04", 110, 140),
+        ("2024-05-01", 100, 110),
+    ]
+
+def test_ndjson_import_reports_malformed_lines(client, auth_headers, create_account):
+    account_id = create_account(balance=100.0)
+    result = _import(client, auth_headers, "books.ndjson", "\n".join([
+        f'{{"date": "2024-05-01", "account_id": {account_id}, "ending_balance": 90, "result": "Loss Overall"}}',
+        '{"date": "2024-05-02",',
+        "",
+        f'{{"date": "2024-05-03", "account_id": {account_id}, "ending_balance": 95, "result": "Maybe"}}',
+    ]), "application/x-ndjson")
+
+    assert result["imported"] == 1
+    assert [error["row"] for error in result["errors"]] == [2, 4]
+    assert result["errors"][0]["error"].startswith("Invalid JSON:")
+    assert result["errors"][1]["error"].startswith("result:")
+
+def test_unknown_format_is_rejected(client, auth_headers):
+    response = client.post(
+        "/trading-daily-books/import", files={"file": ("books.txt", "x", "text/plain")}, headers=auth_headers
+    )
+    assert response.status_code == 400
+
+def test_backdated_import_rechains_the_later_entries(client, auth_headers, create_account, create_book):
+    account_id = create_account(balance=100.0)
+    create_book(account_id, "2024-05-10", 0, 150)
+
+    # Out of date order, and before the existing entry
+    result = _import(client, auth_headers, "books.csv", "\n".join([
+        "date,account_id,ending_balance",
+        f"2024-05-05,{account_id},170",
+        f"2024-05-01,{account_id},160",
+    ]), "text/csv")
+    assert result["imported"] == 2
+
+    books = client.get("/trading-daily-books/", params={"account_id": account_id}, headers=auth_headers).json()
+    chain = [(book["date"], book["starting_balance"], book["ending_balance"]) for book in reversed(books)]
+    # Rows are chained in file order from the balance of 150 (+20, then -10);
+    # every entry keeps that daily change and starts where the previous one
+    # ended, and the existing entry (+50) now follows the imported ones
+    assert chain == [("2024-05-01", 170, 160), ("2024-05-05", 160, 180), ("2024-05-10", 180, 230)]
+    account = client.get(f"/accounts/{account_id}", headers=auth_headers).json()
+    assert account["account_balance"] == 230
@@ -0,0 +1,86 @@
+from concurrent.futures import ThreadPoolExecutor
+
+def _books(client, auth_headers, account_id):
+    books = client.get("/trading-daily-books/", params={"account_id": account_id, "limit": 100}, headers=auth_headers).json()
+    return sorted(books, key=lambda book: book["id"])
+
+def _ledger(client, auth_headers, account_id):
+    entries = client.get(f"/accounts/{account_id}/ledger", headers=auth_headers).json()
+    return sorted(entries, key=lambda entry: entry["id"])
+
+def test_concurrent_creates_chain_one_after_another(client, auth_headers, create_account):
+    account_id = create_account(balance=100.0)
+
+    def create(n):
+        return client.post("/trading-daily-books/", json={
+            "date": "2024-06-03", "account_id": account_id, "starting_balance": 0,
+            "ending_balance": 200.0 + n, "result": "Profit Overall",
+        }, headers=auth_headers)
+
+    with ThreadPoolExecutor(max_workers=20) as pool:
+        responses = list(pool.map(create, range(20)))
+    assert [response.status_code for response in responses] == [201] * 20
+
+    # Each entry starts where the one committed before it ended
+    books = _books(client, auth_headers, account_id)
+    assert len(books) == 20
+    assert books[0]["starting_balance"] == 100.0
+    for previous, book in zip(books, books[1:]):
+        assert book["starting_balance"] == previous["ending_balance"]
+
+    account = client.get(f"/accounts/{account_id}", headers=auth_headers).json()
+    assert account["account_balance"] == books[-1]["ending_balance"]
+
+    # No ledger delta was lost either
+    ledger = _ledger(client, auth_headers, account_id)
+    assert sum(entry["delta"] for entry in ledger) == account["account_balance"]
+
+def test_create_update_and_delete_write_ledger_rows(client, auth_headers, create_account, create_book):
+    account_id = create_account(balance=100.0)
+    first = create_book(account_id, "2024-06-03", 0, 120.0)
+    second = create_book(account_id, "2024-06-04", 0, 150.0)
+
+    response = client.put(f"/trading-daily-books/{first}", json={"ending_balance": 110.0}, headers=auth_headers)
+    assert response.status_code == 200
+    response = client.delete(f"/trading-daily-books/{second}", headers=auth_headers)
+    assert response.status_code == 204
+
+    ledger = _ledger(client, auth_headers, account_id)
+    assert [(entry["reason"], entry["book_id"], entry["delta"], entry["balance_after"]) for entry in ledger] == [
+        ("account_opened", None, 100.0, 100.0),
+        ("daily_book_created", first, 20.0, 120.0),
+        ("daily_book_created", second, 30.0, 150.0),
+        # The edit shifts the chain: the later entry now ends at 140
+        ("daily_book_updated", first, -10.0, 140.0),
+        ("daily_book_deleted", second, -30.0, 110.0),
+    ]
+
+    account = client.get(f"/accounts/{account_id}", headers=auth_headers).json()
+    assert account["account_balance"] == 110.0
+    assert sum(entry["delta"] for entry in ledger) == account["account_balance"]
+
+def test_import_writes_one_ledger_row_per_account(client, auth_headers, create_account):
+    first_account = create_account(balance=100.0)
+    second_account = create_account(balance=50.0)
+    upload = "\n".join([
+        "date,account_id,ending_balance,result",
+        f"2024-06-03,{first_account},110,Profit Overall",
+        f"2024-06-04,{first_account},125,Profit Overall",
+        f"2024-06-03,{second_account},40,Loss Overall",
+    ])
+
+    response = client.post(
+        "/trading-daily-books/import",
+        files={"file": ("books.csv", upload, "text/csv")},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    assert response.json() == {"imported": 3, "failed": 0, "errors": []}
+
+    for account_id, delta, balance in ((first_account, 25.0, 125.0), (second_account, -10.0, 40.0)):
+        ledger = _ledger(client, auth_headers, account_id)
+        assert [(entry["reason"], entry["delta"], entry["balance_after"]) for entry in ledger[1:]] == [
+            ("daily_book_import", delta, balance),
+        ]
+        account = client.get(f"/accounts/{account_id}", headers=auth_headers).json()
+        assert account["account_balance"] == balance
@@ -0,0 +1,41 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+IN_MEMORY_METRICS = """
+from fastapi.testclient import TestClient
+from app.main import app
+with TestClient(app) as client:
+    response = client.get("/metrics")
+    print(response.status_code)
+    print("db_pool_size" in response.text)
+"""
+
+def test_metrics_exports_pool_gauges(client):
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert "# TYPE db_pool_size gauge" in response.text
+
+def test_metrics_without_queue_pool():
+    # The engine is configured at import, so the in-memory mode needs its own interpreter
+    result = subprocess.run(
+        [sys.executable, "-c", IN_MEMORY_METRICS],
+        cwd=BACKEND_DIR,
+        env={**os.environ, "DATABASE_URL": "sqlite:///:memory:", "DB_INIT_ON_STARTUP": "1"},
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split() == ["200", "False"]
+
+def test_principal_cache_totals_are_counters(client, auth_headers):
+    client.get("/accounts/", headers=auth_headers)
+    text = client.get("/metrics").text
+    for name in ("auth_principal_cache_hits_total", "auth_principal_cache_misses_total"):
+        assert f"# TYPE {name} counter" in text
+        assert any(line.startswith(f"{name} ") for line in text.splitlines())
+    assert "auth_principal_cache_size gauge" in text.replace("# TYPE ", "")
@@ -0,0 +1,38 @@
+def test_cursor_pages_cover_every_entry_once(client, auth_headers, create_account, create_book):
+    account_id = create_account()
+    ids = [create_book(account_id, f"2024-03-0{1 + n // 2}", 0, 100 + n) for n in range(7)]
+
+    pages, cursor = [], None
+    while True:
+        params = {"account_id": account_id, "limit": 3, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/trading-daily-books/", params=params, headers=auth_headers)
+        assert response.status_code == 200
+        pages.append([(book["date"], book["id"]) for book in response.json()])
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    rows = [row for page in pages for row in page]
+    # Newest first on (date, id), without gaps or repeats across pages
+    assert rows == sorted(rows, reverse=True)
+    assert sorted(book_id for _, book_id in rows) == ids
+
+def test_filters_combine_with_the_cursor(client, auth_headers, create_account, create_book):
+    account_id = create_account()
+    for n in range(6):
+        create_book(account_id, f"2024-04-0{1 + n}", 0, 100, "Profit Overall" if n % 2 else "Loss Overall")
+
+    params = {"account_id": account_id, "result": "Profit Overall", "from": "2024-04-03", "limit": 1}
+    first = client.get("/trading-daily-books/", params=params, headers=auth_headers)
+    second = client.get(
+        "/trading-daily-books/", params={**params, "cursor": first.headers["X-Next-Cursor"]}, headers=auth_headers
+    )
+    assert [book["date"] for book in first.json() + second.json()] == ["2024-04-06", "2024-04-04"]
+    assert "X-Next-Cursor" not in second.headers
+
+def test_bad_cursor_is_rejected(client, auth_headers):
+    for cursor in ("zzz", "bm90LWEtY3Vyc29y"):
+        response = client.get("/trading-daily-books/", params={"cursor": cursor}, headers=auth_headers)
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Invalid cursor"
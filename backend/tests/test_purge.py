@@ -0,0 +1,59 @@
+from app.routes import accounts
+from app.utils.purge import purge_account
+
+def test_large_delete_hides_the_account_until_purged(client, auth_headers, create_account, create_book, monkeypatch):
+    scheduled = []
+    monkeypatch.setattr(accounts, "ACCOUNT_PURGE_THRESHOLD", 1)
+    monkeypatch.setattr(accounts, "purge_account", lambda *args: scheduled.append(args))
+
+    account_id = create_account()
+    kept_id = create_account()
+    book_id = create_book(account_id, "2024-09-02", 0, 110)
+    create_book(account_id, "2024-09-03", 0, 120)
+
+    assert client.delete(f"/accounts/{account_id}", headers=auth_headers).status_code == 202
+    assert len(scheduled) == 1
+
+    # Flagged before the 202: hidden from listings and closed to writes
+    assert [account["id"] for account in client.get("/accounts/", headers=auth_headers).json()] == [kept_id]
+    assert client.get(f"/accounts/{account_id}", headers=auth_headers).status_code == 404
+    account = {"account_name": "x", "purpose": "x", "broker": "x", "account_balance": 1}
+    assert client.put(f"/accounts/{account_id}", json=account, headers=auth_headers).status_code == 404
+    book = {"date": "2024-09-04", "account_id": account_id, "starting_balance": 0, "ending_balance": 1}
+    assert client.post("/trading-daily-books/", json=book, headers=auth_headers).status_code == 404
+    assert client.put(
+        f"/trading-daily-books/{book_id}", json={"remarks": "x"}, headers=auth_headers
+    ).status_code == 404
+    assert client.delete(f"/trading-daily-books/{book_id}", headers=auth_headers).status_code == 404
+    book["account_id"] = kept_id
+    response = client.post("/trading-daily-books/", json=book, headers=auth_headers)
+    assert client.put(
+        f"/trading-daily-books/{response.json()['id']}", json={"account_id": account_id}, headers=auth_headers
+    ).status_code == 404
+
+    # Deleting again only reports the purge; it is still reserved in this process
+    assert client.delete(f"/accounts/{account_id}", headers=auth_headers).status_code == 202
+    assert len(scheduled) == 1
+
+    client.portal.call(purge_account, *scheduled[0])
+    assert client.delete(f"/accounts/{account_id}", headers=auth_headers).status_code == 404
+    books = client.get("/trading-daily-books/", headers=auth_headers).json()
+    assert [book["account_id"] for book in books] == [kept_id]
+
+def test_interrupted_purge_resumes_on_the_next_delete(client, auth_headers, create_account, create_book, monkeypatch):
+    from app.utils import purge
+
+    scheduled = []
+    monkeypatch.setattr(accounts, "ACCOUNT_PURGE_THRESHOLD", 0)
+    monkeypatch.setattr(accounts, "purge_account", lambda *args: scheduled.append(args))
+
+    account_id = create_account()
+    create_book(account_id, "2024-09-02", 0, 110)
+    assert client.delete(f"/accounts/{account_id}", headers=auth_headers).status_code == 202
+
+    # A restart forgets the in-process reservation, but not the flag
+    purge._purging.discard(account_id)
+    assert client.delete(f"/accounts/{account_id}", headers=auth_headers).status_code == 202
+    assert len(scheduled) == 2
+    client.portal.call(purge_account, *scheduled[-1])
+    assert client.delete(f"/accounts/{account_id}", headers=auth_headers).status_code == 404
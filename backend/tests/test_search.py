@@ -0,0 +1,18 @@
+import gc
+
+from app.utils import search
+
+def test_search_finds_entries_and_releases_build_locks(client, auth_headers, create_account):
+    account_id = create_account()
+    response = client.post("/trading-daily-books/", json={
+        "date": "2024-05-06", "account_id": account_id, "starting_balance": 100, "ending_balance": 90,
+        "result": "Loss Overall", "summary": "Revenge trade after the open",
+    }, headers=auth_headers)
+    assert response.status_code == 201
+
+    hits = client.get("/trading-daily-books/search", params={"q": "revenge"}, headers=auth_headers).json()
+    assert [hit["id"] for hit in hits] == [response.json()["id"]]
+
+    # Build locks do not outlive the builds they guard
+    gc.collect()
+    assert len(search._build_locks) == 0
@@ -1,7 +1,7 @@
 import { useState, useEffect, useRef } from 'react';
 import { useAuth } from '../context/AuthContext';
 import { useTheme } from '../context/ThemeContext';
-import { getAccounts, getTradingDailyBooks } from '../utils/api';
+import { getDashboard } from '../utils/api';
 import { format, parseISO } from 'date-fns';
 
 const Dashboard = () => {
@@ -32,17 +32,17 @@ const Dashboard = () => {
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const accountsData = await getAccounts();
-        const booksData = await getTradingDailyBooks();
+        // One request returns balances, recent books and per-result totals
+        const dashboard = await getDashboard({ recent: 20 });
         
-        setAccounts(accountsData);
-        setTradingBooks(booksData);
+        setAccounts(dashboard.accounts);
+        setTradingBooks(dashboard.recent_books);
         
         // Calculate statistics
-        calculateStats(accountsData, booksData);
+        calculateStats(dashboard.accounts, dashboard.results);
         
         // Process recent trades
-        processRecentTrades(booksData);
+        processRecentTrades(dashboard.recent_books);
       } catch (error) {
         console.error("Error fetching dashboard data:", error);
       } finally {
@@ -87,40 +87,29 @@ const Dashboard = () => {
     setRecentTrades(trades);
   };
 
-  // Function to calculate statistics
-  const calculateStats = (accounts, books) => {
+  // Function to calculate statistics from the per-result totals
+  const calculateStats = (accounts, results) => {
     const totalAccounts = accounts.length;
     
-    // Filter books with trade results
-    const tradesBooks = books.filter(book => book.result !== "No Trade" && book.result !== "No Result");
-    const totalTrades = tradesBooks.length;
+    // Only books with a trade result count as trades
+    const tradedResults = Object.entries(results).filter(([result]) => 
+      result !== "No Trade" && result !== "No Result"
+    );
+    const totalTrades = tradedResults.reduce((sum, [, totals]) => sum + totals.count, 0);
     
     // Calculate win rate
-    const winningTrades = tradesBooks.filter(book => book.result === "Profit Overall");
-    const winCount = winningTrades.length;
-    const lossCount = tradesBooks.filter(book => book.result === "Loss Overall").length;
+    const wins = results["Profit Overall"] || { count: 0, pnl: 0 };
+    const losses = results["Loss Overall"] || { count: 0, pnl: 0 };
+    const winCount = wins.count;
+    const lossCount = losses.count;
     const winRate = totalTrades > 0 ? (winCount / totalTrades) * 100 : 0;
     
     // Calculate profit/loss
-    const totalProfit = tradesBooks.reduce((sum, book) => {
-      const profitLoss = book.ending_balance - book.starting_balance - book.withdraw;
-      return sum + profitLoss;
-    }, 0);
+    const totalProfit = tradedResults.reduce((sum, [, totals]) => sum + totals.pnl, 0);
     
     // Calculate average win/loss
-    const winningTradesProfit = winningTrades.reduce((sum, book) => {
-      const profit = book.ending_balance - book.starting_balance - book.withdraw;
-      return sum + profit;
-    }, 0);
-    
-    const losingTrades = tradesBooks.filter(book => book.result === "Loss Overall");
-    const losingTradesLoss = losingTrades.reduce((sum, book) => {
-      const loss = book.starting_balance - book.ending_balance + book.withdraw;
-      return sum + Math.abs(loss);
-    }, 0);
-    
-    const averageWin = winningTrades.length > 0 ? winningTradesProfit / winningTrades.length : 0;
-    const averageLoss = losingTrades.length > 0 ? losingTradesLoss / losingTrades.length : 0;
+    const averageWin = winCount > 0 ? wins.pnl / winCount : 0;
+    const averageLoss = lossCount > 0 ? Math.abs(losses.pnl) / lossCount : 0;
     
     setStats({
       totalAccounts,
@@ -1,10 +1,38 @@
-import { useEffect, useRef } from 'react';
+import { useEffect, useRef, useState } from 'react';
+import { format, getDay, parseISO } from 'date-fns';
 import { useTheme } from '../context/ThemeContext';
+import { getPnlCalendar } from '../utils/api';
+
+const WEEKDAYS = ['S', 'M', 'T', 'W', 'T', 'F', 'S'];
+
+// Cell colour by P&L sign, stronger the larger the day is relative to the range's biggest move
+const pnlCellClass = (pnl, maxAbs) => {
+  if (pnl === 0 || maxAbs === 0) return 'bg-gray-200 dark:bg-gray-600';
+  const strength = Math.abs(pnl) / maxAbs;
+  if (pnl > 0) {
+    return strength > 0.66 ? 'bg-green-600' : strength > 0.33 ? 'bg-green-400' : 'bg-green-200';
+  }
+  return strength > 0.66 ? 'bg-red-600' : strength > 0.33 ? 'bg-red-400' : 'bg-red-200';
+};
 
 const HeatMap = () => {
   const { darkMode } = useTheme();
   const cryptoHeatmapRef = useRef(null);
   const stockHeatmapRef = useRef(null);
+  const [calendar, setCalendar] = useState([]);
+  const [calendarError, setCalendarError] = useState(null);
+
+  // Daily P&L of the last 12 months, aggregated server-side across accounts
+  useEffect(() => {
+    getPnlCalendar()
+      .then(setCalendar)
+      .catch(() => setCalendarError('Failed to load your P&L calendar'));
+  }, []);
+
+  const maxAbsPnl = calendar.reduce(
+    (max, month) => month.days.reduce((dayMax, day) => Math.max(dayMax, Math.abs(day.pnl)), max),
+    0
+  );
 
   // Load crypto heatmap widget
   useEffect(() => {
@@ -138,6 +166,47 @@ const HeatMap = () => {
 
       {/* Heatmap Content */}
       <div className="p-6 grid grid-cols-1 gap-8">
+        {/* P&L Calendar */}
+        <div>
+          <h2 className="text-xl font-semibold text-gray-800 dark:text-white mb-4">Your P&L Calendar</h2>
+          {calendarError ? (
+            <p className="text-red-500">{calendarError}</p>
+          ) : (
+            <div className="grid grid-cols-2 sm:grid-cols-3 lg:grid-cols-4 gap-4">
+              {calendar.map((month) => {
+                const days = Object.fromEntries(month.days.map((day) => [day.date, day]));
+                const start = parseISO(month.month);
+                const daysInMonth = new Date(start.getFullYear(), start.getMonth() + 1, 0).getDate();
+                return (
+                  <div key={month.month} className="bg-white dark:bg-gray-700 p-3 rounded-lg shadow-sm border border-gray-100 dark:border-gray-600">
+                    <div className="flex justify-between text-sm mb-2">
+                      <span className="font-medium text-gray-800 dark:text-white">{format(start, 'MMM yyyy')}</span>
+                      <span className={month.pnl >= 0 ? 'text-green-500' : 'text-red-500'}>
+                        {month.pnl >= 0 ? '+' : ''}{month.pnl.toFixed(2)}
+                      </span>
+                    </div>
+                    <div className="grid grid-cols-7 gap-1 text-xs text-center text-gray-500 dark:text-gray-400">
+                      {WEEKDAYS.map((weekday, index) => <span key={index}>{weekday}</span>)}
+                      {Array.from({ length: getDay(start) }, (_, index) => <span key={`blank-${index}`} />)}
+                      {Array.from({ length: daysInMonth }, (_, index) => {
+                        const date = format(new Date(start.getFullYear(), start.getMonth(), index + 1), 'yyyy-MM-dd');
+                        const day = days[date];
+                        return (
+                          <div
+                            key={date}
+                            title={day ? `${date}: ${day.pnl.toFixed(2)} (${day.result}, ${day.entries} entries)` : date}
+                            className={`h-5 rounded ${day ? pnlCellClass(day.pnl, maxAbsPnl) : 'bg-gray-100 dark:bg-gray-800'}`}
+                          />
+                        );
+                      })}
+                    </div>
+                  </div>
+                );
+              })}
+            </div>
+          )}
+        </div>
+
         {/* Crypto Heatmap */}
         <div>
           <h2 className="text-xl font-semibold text-gray-800 dark:text-white mb-4">Cryptocurrency Heatmap</h2>
@@ -165,10 +165,19 @@ export const toggleTradingPlanStatus = async (id) => {
 };
 
 // Trading Daily Book API calls
-export const getTradingDailyBooks = async () => {
-  try {
-    const response = await api.get('/trading-daily-books');
-    return response.data;
+export const getTradingDailyBooks = async (params = {}) => {
+  try {
+    // The list is cursor-paginated; follow X-Next-Cursor until exhausted
+    let books = [];
+    let cursor = null;
+    do {
+      const response = await api.get('/trading-daily-books', {
+        params: cursor ? { ...params, cursor } : params,
+      });
+      books = books.concat(response.data);
+      cursor = response.headers['x-next-cursor'];
+    } while (cursor);
+    return books;
   } catch (error) {
     throw error.response ? error.response.data : new Error('Failed to fetch trading daily books');
   }
@@ -219,4 +228,24 @@ export const deleteTradingDailyBook = async (id) => {
   }
 };
 
+// Dashboard API calls
+export const getDashboard = async (params = {}) => {
+  try {
+    const response = await api.get('/dashboard', { params });
+    return response.data;
+  } catch (error) {
+    throw error.response ? error.response.data : new Error('Failed to fetch dashboard');
+  }
+};
+
+// P&L calendar API calls
+export const getPnlCalendar = async (params = {}) => {
+  try {
+    const response = await api.get('/analytics/calendar', { params });
+    return response.data;
+  } catch (error) {
+    throw error.response ? error.response.data : new Error('Failed to fetch P&L calendar');
+  }
+};
+
 export default api;
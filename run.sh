@@ -9,6 +9,7 @@ start_backend() {
   else
     echo "Virtual environment not found, please create it first"
   fi
+  python -m app.cli init-db
   python -m uvicorn app.main:app --host 0.0.0.0 --port 8000 &
   BACKEND_PID=$!
   echo "Backend server started with PID: $BACKEND_PID"
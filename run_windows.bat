@@ -20,6 +20,10 @@ echo Installing requirements...
 pip install -r requirements.txt
 echo.
 
+echo Creating database tables...
+python -m app.cli init-db
+echo.
+
 REM Create two separate command windows for frontend and backend
 echo Starting FastAPI backend server...
 start cmd /k "cd backend && call venv\Scripts\activate.bat && python -m uvicorn app.main:app --host 0.0.0.0 --port 8000"